@@ -0,0 +1,263 @@
+"""Non-device capture/playout backends for CI, benchmarks and bots.
+
+MediaEngine accepts one of these objects, or a spec string, wherever it takes a device id:
+
+    file:PATH.wav        WAV file in / WAV file out
+    test:WAVE[:FREQ]     audiotestsrc pattern (sine, square, ticks, silence, ...)
+    numpy                NumPy-fed appsrc / recording appsink (API use only)
+    null                 fakesink
+
+Append `@fast` to a spec to run as fast as possible instead of in real time.
+Fast sources push buffers as soon as downstream accepts them, and fast sinks do not sync to the clock.
+Sources timestamp from a sample counter, so a given input produces the same buffers on every run.
+audiotestsrc's noise waves are seeded randomly; use NumpySource with a seeded generator for noise.
+"""
+import threading
+import time
+import wave
+from abc import ABC, abstractmethod
+
+import numpy as np
+from gi.repository import Gst
+
+
+def _f32_caps(rate):
+    return Gst.Caps.from_string(f"audio/x-raw,format=F32LE,rate={int(rate)},channels=1,layout=interleaved")
+
+
+def _make(factory, name, **props):
+    element = Gst.ElementFactory.make(factory, name)
+    if element is None:
+        raise RuntimeError(f"Failed to create GStreamer element: {factory}")
+    for key, value in props.items():
+        element.set_property(key.replace("_", "-"), value)
+    return element
+
+
+def _bin(name, elements, pad_name):
+    """Chain elements inside a bin and ghost the outer pad (src of the last / sink of the first)."""
+    container = Gst.Bin.new(name)
+    for element in elements:
+        container.add(element)
+    for upstream, downstream in zip(elements, elements[1:]):
+        if not upstream.link(downstream):
+            raise RuntimeError(f"Failed to link {upstream.get_name()} -> {downstream.get_name()}")
+    target = elements[-1] if pad_name == "src" else elements[0]
+    container.add_pad(Gst.GhostPad.new(pad_name, target.get_static_pad(pad_name)))
+    return container
+
+
+class AudioBackend(ABC):
+    kind = None
+    direction = None
+
+    def __init__(self, realtime=True):
+        self.realtime = realtime
+
+    @abstractmethod
+    def make(self, rate, name):
+        """Build this backend's element or bin for `rate` Hz; `name` prefixes its element names."""
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        clock = "realtime" if self.realtime else "fast"
+        return f"{self.kind}-{self.direction}@{clock}"
+
+
+class FileSource(AudioBackend):
+    kind = "file"
+    direction = "input"
+
+    def __init__(self, path, realtime=True):
+        super().__init__(realtime)
+        self.path = path
+
+    def make(self, rate, name):
+        elements = [
+            _make("filesrc", f"{name}_file", location=self.path),
+            _make("wavparse", f"{name}_parse"),
+            _make("audioconvert", f"{name}_conv"),
+            _make("audioresample", f"{name}_res"),
+            _make("capsfilter", f"{name}_caps", caps=_f32_caps(rate)),
+        ]
+        if self.realtime:
+            elements.append(_make("identity", f"{name}_clock", sync=True))
+        return _bin(name, elements, "src")
+
+
+class PatternSource(AudioBackend):
+    kind = "test"
+    direction = "input"
+
+    def __init__(self, wave="sine", freq=440.0, volume=0.5, realtime=True):
+        super().__init__(realtime)
+        self.wave = wave
+        self.freq = float(freq)
+        self.volume = float(volume)
+
+    def make(self, rate, name):
+        src = _make("audiotestsrc", f"{name}_test", is_live=self.realtime, samplesperbuffer=int(rate) // 100)
+        Gst.util_set_object_arg(src, "wave", str(self.wave))
+        src.set_property("freq", self.freq)
+        src.set_property("volume", self.volume)
+        return _bin(name, [src, _make("capsfilter", f"{name}_caps", caps=_f32_caps(rate))], "src")
+
+
+class NumpySource(AudioBackend):
+    """Feeds a float32 mono array (at the engine's target rate) through appsrc in 10 ms buffers.
+
+    `sent` records (first sample index, time.monotonic()) as each buffer leaves the source.
+    """
+
+    kind = "numpy"
+    direction = "input"
+
+    def __init__(self, data, realtime=True, loop=False):
+        super().__init__(realtime)
+        self.data = np.ascontiguousarray(data, dtype=np.float32).reshape(-1)
+        self.loop = loop
+        self.done = threading.Event()
+        self._offset = 0
+        self._samples = 0
+        self.sent = []
+
+    def make(self, rate, name):
+        self._rate = int(rate)
+        self._offset = 0
+        self._samples = 0
+        self.sent = []
+        self.done.clear()
+        src = _make("appsrc", f"{name}_app", caps=_f32_caps(rate), is_live=False, block=True)
+        src.set_property("format", Gst.Format.TIME)
+        src.connect("need-data", self._on_need_data)
+        elements = [src]
+        if self.realtime:
+            elements.append(_make("identity", f"{name}_clock", sync=True))
+        elements[-1].get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, self._on_sent)
+        return _bin(name, elements, "src")
+
+    def _on_sent(self, _pad, info):
+        buf = info.get_buffer()
+        if buf:
+            self.sent.append((buf.offset, time.monotonic()))
+        return Gst.PadProbeReturn.OK
+
+    def _on_need_data(self, src, _length):
+        if self._offset >= self.data.size:
+            if not self.loop or self.data.size == 0:
+                src.emit("end-of-stream")
+                self.done.set()
+                return
+            self._offset = 0
+        chunk = self.data[self._offset:self._offset + self._rate // 100]
+        buf = Gst.Buffer.new_wrapped(chunk.tobytes())
+        buf.pts = self._samples * Gst.SECOND // self._rate
+        buf.duration = chunk.size * Gst.SECOND // self._rate
+        buf.offset = self._samples
+        self._offset += chunk.size
+        self._samples += chunk.size
+        src.emit("push-buffer", buf)
+
+
+class NumpySink(AudioBackend):
+    """Records everything played out; `audio()` returns it as one float32 array.
+
+    `arrivals` records (first sample index, time.monotonic()) for each rendered buffer.
+    """
+
+    kind = "numpy"
+    direction = "output"
+
+    def __init__(self, realtime=True):
+        super().__init__(realtime)
+        self._chunks = []
+        self._samples = 0
+        self.arrivals = []
+        self._lock = threading.Lock()
+        self.rate = None
+
+    def make(self, rate, name):
+        self.rate = int(rate)
+        sink = _make("appsink", name, caps=_f32_caps(rate), emit_signals=True, sync=self.realtime)
+        sink.connect("new-sample", self._on_sample)
+        return sink
+
+    def _on_sample(self, sink):
+        now = time.monotonic()
+        sample = sink.emit("pull-sample")
+        buffer = sample.get_buffer() if sample else None
+        if buffer:
+            ok, info = buffer.map(Gst.MapFlags.READ)
+            if ok:
+                try:
+                    chunk = np.frombuffer(info.data, dtype=np.float32).copy()
+                finally:
+                    buffer.unmap(info)
+                with self._lock:
+                    self.arrivals.append((self._samples, now))
+                    self._chunks.append(chunk)
+                    self._samples += chunk.size
+        return Gst.FlowReturn.OK
+
+    def audio(self):
+        with self._lock:
+            return np.concatenate(self._chunks) if self._chunks else np.zeros(0, dtype=np.float32)
+
+    def clear(self):
+        with self._lock:
+            self._chunks = []
+            self._samples = 0
+            self.arrivals = []
+
+
+class FileSink(NumpySink):
+    """Records like NumpySink and writes a 16-bit WAV when the pipeline stops."""
+
+    kind = "file"
+
+    def __init__(self, path, realtime=True):
+        super().__init__(realtime)
+        self.path = path
+
+    def close(self):
+        if self.rate is None:
+            return
+        audio = self.audio()
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype("<i2")
+        with wave.open(self.path, "wb") as fh:
+            fh.setnchannels(1)
+            fh.setsampwidth(2)
+            fh.setframerate(self.rate)
+            fh.writeframes(pcm.tobytes())
+
+
+class NullSink(AudioBackend):
+    kind = "null"
+    direction = "output"
+
+    def make(self, rate, name):
+        return _make("fakesink", name, sync=self.realtime)
+
+
+def from_spec(spec, direction):
+    """Turn a device argument into a backend; returns None for real device ids."""
+    if isinstance(spec, AudioBackend) or not isinstance(spec, str):
+        return spec if isinstance(spec, AudioBackend) else None
+    realtime = True
+    body = spec
+    head, _, clock = spec.rpartition("@")
+    if head and clock in ("fast", "realtime"):
+        body, realtime = head, clock == "realtime"
+    kind, _, arg = body.partition(":")
+    if kind == "file" and arg:
+        return FileSource(arg, realtime) if direction == "input" else FileSink(arg, realtime)
+    if kind == "test" and direction == "input":
+        wave_name, _, freq = arg.partition(":")
+        return PatternSource(wave_name or "sine", float(freq) if freq else 440.0, realtime=realtime)
+    if kind == "numpy" and direction == "output":
+        return NumpySink(realtime)
+    if kind == "null" and direction == "output":
+        return NullSink(realtime)
+    return None
@@ -0,0 +1,116 @@
+import math
+import threading
+
+
+class LossCounter:
+    """Per-interval receiver reports from rtpjitterbuffer's cumulative `stats` counters."""
+
+    FIELDS = (("num-pushed", "received"), ("num-lost", "lost"), ("num-late", "late"), ("num-duplicates", "duplicates"))
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._last = None
+        self._last_ts = None
+
+    def update(self, counters, now_s):
+        """counters maps stat names to running totals; returns the change since the last call (None at first)."""
+        current = {key: int(counters.get(stat) or 0) for stat, key in self.FIELDS}
+        last, last_ts = self._last, self._last_ts
+        self._last, self._last_ts = current, now_s
+        if last is None:
+            return None
+        if any(current[key] < last[key] for key in current):
+            # A rebuilt jitter buffer starts counting from zero.
+            last = dict.fromkeys(current, 0)
+        report = {key: current[key] - last[key] for key in current}
+        # Packets that arrive after being declared lost stay in `lost` and are also counted as `late`.
+        expected = report["received"] + report["lost"]
+        report["loss_pct"] = round(100.0 * report["lost"] / expected, 2) if expected else 0.0
+        report["interval_ms"] = int(round((now_s - last_ts) * 1000.0))
+        return report
+
+
+class OpusLossAdapter:
+    """Opus loss settings that follow the far end's receiver reports, with hysteresis.
+
+    Loss is smoothed across reports. The encoder's expected-loss hint rises at once and falls
+    only after `hold` calmer reports. FEC turns on at `fec_on_pct` and off below `fec_off_pct`.
+    Loss above `congested_pct` cuts the bitrate by 20 % per report, down to `min_bitrate`. After
+    `hold` clean reports it grows back by 10 %.
+    """
+
+    def __init__(self, min_bitrate=16000, fec_on_pct=2.0, fec_off_pct=0.5, congested_pct=8.0, hold=3,
+                 smoothing=0.5, max_hint_pct=30):
+        self.min_bitrate = int(min_bitrate)
+        self.fec_on_pct = float(fec_on_pct)
+        self.fec_off_pct = min(float(fec_off_pct), self.fec_on_pct)
+        self.congested_pct = float(congested_pct)
+        self.hold = max(1, int(hold))
+        self.smoothing = min(1.0, max(0.05, float(smoothing)))
+        self.max_hint_pct = int(max_hint_pct)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.loss_pct = None
+            self.packet_loss = None
+            self.fec = None
+            self.bitrate_scale = 1.0
+            self._calm = 0
+            self._clean = 0
+            self.reports = 0
+
+    def update(self, report):
+        """Fold in one receiver report; returns True when the encoder settings changed."""
+        try:
+            loss = float(report.get("loss_pct") or 0.0)
+            expected = int(report.get("received") or 0) + int(report.get("lost") or 0)
+        except (TypeError, ValueError):
+            return False
+        if expected <= 0:
+            # Nothing arrived at the far end (muted or DTX); no evidence either way.
+            return False
+        with self._lock:
+            before = (self.packet_loss, self.fec, self.bitrate_scale)
+            self.reports += 1
+            if self.loss_pct is None:
+                self.loss_pct = loss
+            else:
+                self.loss_pct += self.smoothing * (loss - self.loss_pct)
+            hint = min(self.max_hint_pct, int(math.ceil(self.loss_pct - 1e-9)))
+            if self.packet_loss is None or hint > self.packet_loss:
+                self.packet_loss = hint
+                self._calm = 0
+            elif hint < self.packet_loss:
+                self._calm += 1
+                if self._calm >= self.hold:
+                    self.packet_loss = hint
+                    self._calm = 0
+            else:
+                self._calm = 0
+            if self.loss_pct >= self.fec_on_pct:
+                self.fec = True
+            elif self.loss_pct < self.fec_off_pct:
+                self.fec = False
+            if self.loss_pct >= self.congested_pct:
+                self.bitrate_scale = max(0.2, self.bitrate_scale * 0.8)
+                self._clean = 0
+            elif self.loss_pct < self.fec_off_pct and self.bitrate_scale < 1.0:
+                self._clean += 1
+                if self._clean >= self.hold:
+                    self.bitrate_scale = min(1.0, self.bitrate_scale * 1.1)
+                    self._clean = 0
+            return (self.packet_loss, self.fec, self.bitrate_scale) != before
+
+    def settings(self, bitrate, fec, packet_loss):
+        """Effective (bitrate, fec, packet_loss) given the configured values; configured until a report lands."""
+        with self._lock:
+            floor = min(int(bitrate), self.min_bitrate)
+            return (
+                max(floor, int(bitrate * self.bitrate_scale)),
+                bool(fec) if self.fec is None else self.fec,
+                int(packet_loss) if self.packet_loss is None else self.packet_loss,
+            )
@@ -0,0 +1,212 @@
+import json
+import logging
+import signal
+import time
+
+from gi.repository import GLib
+
+
+class HeadlessController:
+    """Drives MediaEngine/Signaling from a GLib main loop; the call flow mirrors MainWindow."""
+
+    def __init__(self, media, signaling, metrics, local_port, input_device=None, output_device=None):
+        self.logger = logging.getLogger("Headless")
+        self.media = media
+        self.signaling = signaling
+        self.metrics = metrics
+        self.local_port = local_port
+        self.input_device = input_device
+        self.output_device = output_device
+        self.loop = GLib.MainLoop()
+        self.exit_code = 0
+        self.is_listening = False
+        self.is_calling = False
+        self.remote_rtp_port = None
+        self.metrics_out = None
+        self.signaling.on_connected = lambda info: GLib.idle_add(self._on_connected, info or ())
+        self.signaling.on_disconnected = lambda: GLib.idle_add(self._on_disconnected)
+        self.signaling.on_early_media = lambda info: GLib.idle_add(self._on_early_media, info or ())
+        self.signaling.on_early_media_cancel = lambda call_id: GLib.idle_add(self._on_early_media_cancel, call_id)
+        self.signaling.on_session = lambda event, info: GLib.idle_add(self._on_session, event, info)
+        self.media.on_error = lambda message: GLib.idle_add(self._on_media_error, message or "unknown")
+        self.media.on_warning = lambda message: GLib.idle_add(self._on_media_warning, message or "")
+
+    def listen(self):
+        self.signaling.set_local_rtp_port(self.local_port)
+        self.signaling.start_listen(self.local_port + 1, rtp_port=self.local_port)
+        if not self.media.pipeline:
+            self.media.start(self.local_port, None, None, self.input_device, self.output_device)
+        self.is_listening = True
+        self.logger.info("Listening on RTP %d / signaling %d", self.local_port, self.local_port + 1)
+
+    def call(self, remote_ip, remote_port):
+        self.remote_rtp_port = remote_port
+        if not self.media.pipeline:
+            self.media.start(self.local_port, remote_ip, remote_port, self.input_device, self.output_device)
+        self.media.set_remote(remote_ip, remote_port)
+        self.media.set_send_enabled(True)
+        self.signaling.set_local_rtp_port(self.local_port)
+        self.signaling.start_listen(self.local_port + 1, rtp_port=self.local_port)
+        self.signaling.call(remote_ip, remote_port + 1)
+        self.is_calling = True
+        self.logger.info("Calling %s:%d", remote_ip, remote_port)
+
+    def add_call(self, remote_ip, remote_port):
+        """Conference: dial one more peer into the call started by call()."""
+        if self.signaling.add_call(remote_ip, remote_port + 1):
+            self.logger.info("Adding %s:%d to the call", remote_ip, remote_port)
+        else:
+            self.logger.warning("Could not add %s:%d (conference full or already in the call)", remote_ip, remote_port)
+
+    def start_metrics(self, poll_interval=0.5, log_interval=5.0, out_path=None):
+        if out_path:
+            self.metrics_out = open(out_path, "a", encoding="utf-8")
+        GLib.timeout_add(max(10, int(poll_interval * 1000)), self._poll_metrics)
+        if log_interval > 0:
+            GLib.timeout_add(max(100, int(log_interval * 1000)), self._log_metrics)
+
+    def run(self, exit_after=None):
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signum, self.quit)
+        if exit_after is not None:
+            GLib.timeout_add(max(0, int(exit_after * 1000)), self.quit)
+        try:
+            self.loop.run()
+        finally:
+            self.shutdown()
+        return self.exit_code
+
+    def quit(self, *_args):
+        self.loop.quit()
+        return GLib.SOURCE_REMOVE
+
+    def shutdown(self):
+        try:
+            self.signaling.stop()
+            self.media.stop(refill=False)
+            self.media.release_standby()
+        except Exception as exc:
+            self.logger.error("Error during cleanup: %s", exc)
+        if self.metrics_out:
+            self._write_metrics()
+            self.metrics_out.close()
+            self.metrics_out = None
+
+    def _poll_metrics(self):
+        if self.media.pipeline and not self.media.sampling:
+            self.media.poll_metrics()
+        return GLib.SOURCE_CONTINUE
+
+    def _log_metrics(self):
+        data = self.metrics.snapshot()
+        self.logger.info(
+            "vad=%.2f speaking=%s jitter=%s rtt=%s mic->send=%s up=%s down=%s loss=%s/%s first_rtp=%s queues=%s",
+            data.get("vad_prob") or 0.0,
+            data.get("vad_speaking"),
+            data.get("jitter_depth"),
+            data.get("signal_rtt_ms"),
+            data.get("mic_send_latency_ms"),
+            (data.get("latency_breakdown") or {}).get("uplink", {}).get("total_ms"),
+            (data.get("latency_breakdown") or {}).get("downlink", {}).get("total_ms"),
+            (data.get("loss_feedback") or {}).get("local", {}).get("loss_pct"),
+            (data.get("loss_feedback") or {}).get("remote", {}).get("loss_pct"),
+            data.get("first_audio_ms"),
+            data.get("queue_depths"),
+        )
+        if self.metrics_out:
+            self._write_metrics(data)
+        return GLib.SOURCE_CONTINUE
+
+    def _write_metrics(self, data=None):
+        data = self.metrics.snapshot() if data is None else data
+        self.metrics_out.write(json.dumps({"ts": time.time(), **data}, default=str) + "\n")
+        self.metrics_out.flush()
+
+    def _on_connected(self, remote_addr):
+        remote_ip = remote_addr[0] if len(remote_addr) > 0 else None
+        signaling_port = remote_addr[1] if len(remote_addr) > 1 else None
+        rtp_port = remote_addr[2] if len(remote_addr) > 2 else None
+        if rtp_port is None:
+            rtp_port = self.remote_rtp_port
+        if rtp_port is None and signaling_port is not None:
+            rtp_port = max(1, signaling_port - 1)
+        self.is_calling = True
+        if remote_ip is None or rtp_port is None:
+            self.logger.info("Connected")
+            return GLib.SOURCE_REMOVE
+        if self.media.pipeline and self.media.is_listen_only:
+            self.media.restart_with_remote(remote_ip, rtp_port)
+        else:
+            self.media.set_remote(remote_ip, rtp_port)
+        self.media.confirm_media(remote_addr[3] if len(remote_addr) > 3 else None)
+        self.media.set_send_enabled(True)
+        self.logger.info("Connected %s:%d", remote_ip, rtp_port)
+        return GLib.SOURCE_REMOVE
+
+    def _on_disconnected(self):
+        self.media.set_send_enabled(False)
+        self.is_calling = False
+        self.logger.info("Disconnected")
+        if not self.is_listening:
+            # A call-only run has nothing left to do.
+            self.media.stop()
+            self.quit()
+        return GLib.SOURCE_REMOVE
+
+    def _on_early_media(self, remote_info):
+        if len(remote_info) < 4 or not self.media.pipeline:
+            return GLib.SOURCE_REMOVE
+        remote_ip, signaling_port, rtp_port, call_id = remote_info[:4]
+        if rtp_port is None:
+            rtp_port = self.remote_rtp_port or max(1, signaling_port - 1)
+        self.media.start_early_media(call_id, remote_ip, rtp_port)
+        return GLib.SOURCE_REMOVE
+
+    def _on_early_media_cancel(self, call_id):
+        self.media.cancel_early_media(call_id)
+        return GLib.SOURCE_REMOVE
+
+    def _on_session(self, event, info):
+        remote_ip, signaling_port, rtp_port, call_id, local_rtp_port = info
+        if event == "removed":
+            self.media.remove_peer(call_id)
+            return GLib.SOURCE_REMOVE
+        if rtp_port is None:
+            rtp_port = max(1, signaling_port - 1)
+        self.media.add_peer(call_id, remote_ip, rtp_port, local_rtp_port)
+        return GLib.SOURCE_REMOVE
+
+    def _on_media_error(self, message):
+        self.logger.error("Media error: %s", message)
+        self.media.stop(refill=False)
+        self.exit_code = 1
+        self.quit()
+        return GLib.SOURCE_REMOVE
+
+    def _on_media_warning(self, message):
+        if message:
+            self.logger.warning("Media warning: %s", message)
+        return GLib.SOURCE_REMOVE
+
+
+def run(args, media, signaling, metrics):
+    controller = HeadlessController(
+        media, signaling, metrics, args.port,
+        input_device=args.input_device, output_device=args.output_device,
+    )
+    controller.start_metrics(args.metrics_interval, args.metrics_log, args.metrics_out)
+    try:
+        if args.auto_call:
+            # Several addresses (conference): the first is the call, the rest are dialed into it.
+            remotes = [entry.strip().rsplit(":", 1) for entry in args.auto_call.split(",") if entry.strip()]
+            ip, port = remotes[0]
+            controller.call(ip, int(port))
+            for ip, port in remotes[1:]:
+                controller.add_call(ip, int(port))
+        elif args.auto_listen:
+            controller.listen()
+    except Exception as exc:
+        logging.getLogger("Headless").error("Start failed: %s", exc)
+        controller.shutdown()
+        return 1
+    return controller.run(args.exit_after)
@@ -0,0 +1,90 @@
+import threading
+from collections import deque
+
+
+class PlayoutDelayEstimator:
+    """Jitter buffer target from a forgetting histogram of per-packet relative delay.
+
+    Each packet's transit (arrival time minus RTP media time) is compared with the minimum
+    transit over the last `window_s` seconds; that excess is the delay the buffer must absorb.
+    The target is the `percentile` of those delays, raised immediately (fast attack) and
+    lowered by at most `decay_ms_per_s` (slow decay).
+    """
+
+    def __init__(self, percentile=0.97, forget=0.998, decay_ms_per_s=20.0, min_ms=10, max_ms=500,
+                 clock_rate=48000, window_s=10.0):
+        self.percentile = min(0.999, max(0.5, float(percentile)))
+        self.forget = min(0.99999, max(0.9, float(forget)))
+        self.decay_ms_per_s = max(0.0, float(decay_ms_per_s))
+        self.min_ms = int(min_ms)
+        self.max_ms = int(max_ms)
+        self.clock_rate = int(clock_rate)
+        self.window_s = float(window_s)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0.0] * (self.max_ms + 1)
+            self._total = 0.0
+            self._weight = 1.0
+            self._transits = deque()
+            self._last_rtp = None
+            self._rtp_ext = 0
+            self.packets = 0
+            self.current_ms = None
+            self._last_update = None
+
+    def add(self, arrival_s, rtp_ts):
+        """Record one packet: arrival on a monotonic clock (s) and its 32-bit RTP timestamp."""
+        with self._lock:
+            if self._last_rtp is not None:
+                step = (rtp_ts - self._last_rtp) & 0xFFFFFFFF
+                if step >= 0x80000000:
+                    step -= 0x100000000
+                self._rtp_ext += step
+            self._last_rtp = rtp_ts
+            transit = arrival_s - self._rtp_ext / self.clock_rate
+            # Monotonic deque keeps the sliding-window minimum transit at the front.
+            while self._transits and self._transits[-1][1] >= transit:
+                self._transits.pop()
+            self._transits.append((arrival_s, transit))
+            while self._transits[0][0] < arrival_s - self.window_s:
+                self._transits.popleft()
+            delay_ms = (transit - self._transits[0][1]) * 1000.0
+            bucket = min(self.max_ms, max(0, int(delay_ms + 0.5)))
+            # Growing the per-packet weight is equivalent to decaying every older count.
+            self._weight /= self.forget
+            self._counts[bucket] += self._weight
+            self._total += self._weight
+            if self._weight > 1e9:
+                self._counts = [count / self._weight for count in self._counts]
+                self._total /= self._weight
+                self._weight = 1.0
+            self.packets += 1
+
+    def target_ms(self):
+        """Delay percentile of the histogram, clamped to [min_ms, max_ms]; None before any packet."""
+        with self._lock:
+            if not self._total:
+                return None
+            needed = self.percentile * self._total
+            seen = 0.0
+            for delay_ms, count in enumerate(self._counts):
+                seen += count
+                if seen >= needed:
+                    break
+        return min(self.max_ms, max(self.min_ms, delay_ms))
+
+    def update(self, now_s):
+        """Advance the attack/decay follower and return the current target in ms (or None)."""
+        target = self.target_ms()
+        if target is None:
+            return self.current_ms
+        if self.current_ms is None or target >= self.current_ms:
+            self.current_ms = float(target)
+        else:
+            elapsed = now_s - self._last_update if self._last_update is not None else 0.0
+            self.current_ms = max(float(target), self.current_ms - self.decay_ms_per_s * elapsed)
+        self._last_update = now_s
+        return self.current_ms
@@ -0,0 +1,76 @@
+import threading
+from collections import deque
+
+
+def _median(values):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2.0
+
+
+def _sum(*parts):
+    known = [part for part in parts if part is not None]
+    return sum(known) if known else None
+
+
+class LatencyModel:
+    """Mouth-to-wire and wire-to-ear budget per direction.
+
+    Measured terms (capture→send, jitter hold, receive→playout) come from pad probes on the
+    streaming threads and are kept as short windows; the published value is the window median.
+    Static terms (device latencies, pipeline LATENCY, one-way network) are passed in at
+    snapshot time. Unknown terms stay None and are left out of the totals.
+    """
+
+    WINDOW = 50
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def add(self, term, value_ms):
+        if value_ms is None or value_ms < 0:
+            return
+        with self._lock:
+            window = self._samples.get(term)
+            if window is None:
+                window = self._samples[term] = deque(maxlen=self.WINDOW)
+            window.append(float(value_ms))
+
+    def reset(self):
+        with self._lock:
+            self._samples = {}
+
+    def measured(self, term):
+        with self._lock:
+            window = self._samples.get(term)
+            return _median(window) if window else None
+
+    def breakdown(self, capture_device_ms=None, playout_device_ms=None, pipeline_ms=None, network_ms=None):
+        capture_to_send = self.measured("capture_to_send")
+        jitter_hold = self.measured("jitter_hold")
+        receive_to_sink = self.measured("receive_to_sink")
+        processing = None
+        if capture_to_send is not None:
+            # Live sources stamp the first captured sample, so the device period is already inside.
+            processing = max(0.0, capture_to_send - (capture_device_ms or 0.0))
+        decode_playout = None
+        if receive_to_sink is not None:
+            decode_playout = max(0.0, receive_to_sink - (jitter_hold or 0.0))
+        uplink = {
+            "capture_device_ms": capture_device_ms,
+            "processing_ms": processing,
+            "network_ms": network_ms,
+        }
+        uplink["total_ms"] = _sum(*uplink.values())
+        downlink = {
+            "network_ms": network_ms,
+            "jitter_buffer_ms": jitter_hold,
+            "decode_playout_ms": decode_playout,
+            "playout_device_ms": playout_device_ms,
+        }
+        downlink["total_ms"] = _sum(*downlink.values())
+        downlink["receive_to_playout_ms"] = _sum(receive_to_sink, playout_device_ms)
+        return {"uplink": uplink, "downlink": downlink, "pipeline_ms": pipeline_ms}
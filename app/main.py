@@ -1,8 +1,15 @@
+import time
+
+_T0 = time.perf_counter()
+
 import argparse
+import logging
 import os
 import sys
 import signal
 
+from .profiles import PROFILES
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description="TChat P2P Voice Client")
@@ -11,7 +18,30 @@ def parse_args():
     parser.add_argument("--auto-listen", action="store_true",
                         help="Automatically start listening after launch")
     parser.add_argument("--auto-call", type=str, metavar="IP:PORT",
-                        help="Automatically call remote after launch (e.g., 127.0.0.1:5004)")
+                        help="Automatically call remote after launch (e.g., 127.0.0.1:5004); "
+                             "headless conferences take a comma-separated list")
+    parser.add_argument("--conference", type=int, metavar="N",
+                        help="Allow up to N peers in one call (sets TCHAT_MAX_SESSIONS)")
+    parser.add_argument("--record", metavar="DIR",
+                        help="Record each call's Opus streams to Ogg files in DIR (sets TCHAT_RECORD_DIR)")
+    parser.add_argument("--relay", action="store_true",
+                        help="Run as an RTP relay hub: forward between peers without decoding (no audio devices)")
+    parser.add_argument("--profile", choices=sorted(PROFILES),
+                        help="Tuning profile (overrides TCHAT_PROFILE; default balanced)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run without the Qt UI on a GLib main loop (bots, gateways)")
+    parser.add_argument("--input-device", metavar="ID",
+                        help="Headless capture device id (default: system default)")
+    parser.add_argument("--output-device", metavar="ID",
+                        help="Headless playout device id (default: system default)")
+    parser.add_argument("--metrics-interval", type=float, default=0.5,
+                        help="Headless metrics poll interval in seconds (default: 0.5)")
+    parser.add_argument("--metrics-log", type=float, default=5.0,
+                        help="Headless metrics log interval in seconds, 0 disables (default: 5)")
+    parser.add_argument("--metrics-out", metavar="PATH",
+                        help="Headless: append metrics snapshots as JSON lines to PATH")
+    parser.add_argument("--exit-after", type=float, metavar="SECONDS",
+                        help="Quit after SECONDS (startup measurements, scripted runs)")
     return parser.parse_args()
 
 
@@ -44,15 +74,23 @@ from gi.repository import Gst
 
 Gst.init(['--gst-disable-registry-fork'])
 
-from PySide6 import QtWidgets, QtCore
-
 from .logging_config import setup_logging
 from .metrics import Metrics
 from .media import MediaEngine
-from .ui import MainWindow
+from .utils import peak_rss_mb
 from .vad import VADManager
 
 
+def report_ready(mode):
+    rss = peak_rss_mb()
+    logging.getLogger("Main").info(
+        "Ready (%s) in %.0f ms, peak RSS %s",
+        mode,
+        (time.perf_counter() - _T0) * 1000.0,
+        "n/a" if rss is None else f"{rss:.1f} MB",
+    )
+
+
 def main():
     args = parse_args()
     env_local_port = os.getenv("TCHAT_DEFAULT_LOCAL_PORT")
@@ -63,21 +101,48 @@ def main():
             env_port = None
         if env_port and args.port == 5004:
             args.port = env_port
+    if args.conference:
+        os.environ["TCHAT_MAX_SESSIONS"] = str(max(1, args.conference))
+    if args.record:
+        os.environ["TCHAT_RECORD_DIR"] = args.record
     setup_logging()
+    if args.relay:
+        from .relay import run as run_relay
+
+        sys.exit(run_relay(args))
+
+    if not args.headless:
+        from PySide6 import QtWidgets, QtCore
+        from .ui import MainWindow
 
-    app = QtWidgets.QApplication(sys.argv)
+        app = QtWidgets.QApplication(sys.argv)
 
     metrics = Metrics()
     model_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models", "silero_vad.onnx"))
     vad = VADManager(metrics, model_path)
     media = MediaEngine(metrics, vad)
+    if args.profile:
+        media.apply_profile(args.profile)
     vad.preload()
     media.prewarm()
+    if not args.auto_listen:
+        # Only with TCHAT_STANDBY_POOL=1: the standby keeps the microphone open and the RTP port bound.
+        media.fill_standby(args.port)
 
     from .signaling import Signaling
 
-    signaling = Signaling()
-    
+    signaling = Signaling(metrics=metrics, on_report=media.apply_receiver_report, on_ptime=media.set_ptime)
+    media.on_receiver_report = signaling.send_report
+    media.on_ptime_preference = signaling.set_ptime
+    signaling.set_ptime(media.preferred_ptime_ms())
+
+    if args.headless:
+        from gi.repository import GLib
+        from .headless import run
+
+        GLib.idle_add(report_ready, "headless")
+        sys.exit(run(args, media, signaling, metrics))
+
     window = MainWindow(
         media, signaling, metrics,
         initial_port=args.port,
@@ -96,6 +161,9 @@ def main():
     timer = QtCore.QTimer()
     timer.start(500)
     timer.timeout.connect(lambda: None)
+    QtCore.QTimer.singleShot(0, lambda: report_ready("gui"))
+    if args.exit_after is not None:
+        QtCore.QTimer.singleShot(int(args.exit_after * 1000), window.close)
 
     try:
         sys.exit(app.exec())
@@ -3,11 +3,40 @@ import os
 import sys
 import threading
 import time
+from collections import deque
+from queue import SimpleQueue
 
+import numpy as np
 from gi.repository import Gst, GObject
 
+from . import backends, profiles, rtcp
+from .feedback import LossCounter, OpusLossAdapter
+from .jitter import PlayoutDelayEstimator
+from .latency import LatencyModel
+from .profiler import PipelineProfiler
+from .recording import OggWriter
+from .tsm import StretchController, Wsola
+
 
 class MediaEngine:
+    # Element messages handled on the posting thread by the bus sync handler.
+    _STATS_MESSAGES = ("dfn-stats", "aec3-stats")
+    # TCHAT_DFN_MIX_SMOOTHING is the share of the gap closed per step of this length: the UI
+    # timer period it was tuned on, before the VAD update moved to the faster metrics sampler.
+    _DFN_MIX_STEP_S = 0.5
+    # Attributes that describe one built pipeline; moved wholesale between the engine and the standby slot.
+    # User settings (cng_enabled, send_enabled, the processing toggles) stay on the engine and are
+    # re-applied when a call adopts the standby.
+    _PIPELINE_STATE = (
+        "queues", "queue_overruns", "vad_sink", "aec", "dfn", "limiter", "eq", "hpf",
+        "cng_mixer", "cng_src", "cng_volume", "cng_valve", "cng_conv", "cng_res", "cng_caps",
+        "cng_current_level", "opusenc", "send_valve", "recv_valve",
+        "aec_active", "dfn_active", "limiter_active", "hpf_active", "eq_active", "cng_active",
+        "udpsink", "udpsrc", "rtp_session", "rtcp_src", "rtcp_sink", "jitter", "_stages", "_caps_plan", "jitter_latency_ms", "_last_jitter_adjust_ts",
+        "audio_src", "audio_sink", "tsm", "tsm_src", "_tsm_pts", "_tsm_ring", "is_listen_only",
+        "conf_mixer", "peers", "_primary_client", "record_sinks", "last_local_port", "last_input_device", "last_output_device",
+    )
+
     def __init__(self, metrics, vad_manager):
         self.logger = logging.getLogger("Media")
         self.metrics = metrics
@@ -16,21 +45,41 @@ class MediaEngine:
         self.bus = None
         self.udpsink = None
         self.udpsrc = None
+        # RTCP: an rtpsession between the RTP elements, reports on local/remote port + offset
+        # (port + 1 is signaling).
+        self.rtcp_enabled = self._env_flag_default("TCHAT_RTCP", True)
+        self.rtcp_port_offset = max(1, self._env_int("TCHAT_RTCP_PORT_OFFSET", 2))
+        self.rtcp_interval_ms = max(100, self._env_int("TCHAT_RTCP_INTERVAL_MS", 1000))
+        self.rtp_session = None
+        self.rtcp_src = None
+        self.rtcp_sink = None
+        self._rtcp_stats_ts = 0.0
         self.aec = None
         self.dfn = None
         self.limiter = None
         self.opusenc = None
         self.send_valve = None
+        self.recv_valve = None
+        self.media_call_id = None
+        self._media_epoch_ts = None
         self.jitter = None
-        self.jitter_latency_ms_default = self._env_int("TCHAT_JITTER_LATENCY_MS", 30)
-        self.jitter_latency_ms = self.jitter_latency_ms_default
         self._last_jitter_adjust_ts = 0.0
-        self.jitter_min_ms = self._env_int("TCHAT_JITTER_MIN_MS", 10)
-        self.jitter_max_ms = self._env_int("TCHAT_JITTER_MAX_MS", 120)
-        if self.jitter_min_ms > self.jitter_max_ms:
-            self.jitter_min_ms, self.jitter_max_ms = self.jitter_max_ms, self.jitter_min_ms
+        self.apply_profile(os.getenv("TCHAT_PROFILE"))
         self.jitter_smoothing = self._clamp(self._env_float("TCHAT_JITTER_SMOOTHING", 0.9), 0.5, 0.98)
         self.jitter_adjust_interval = max(0.2, self._env_float("TCHAT_JITTER_ADJUST_INTERVAL", 2.0))
+        # "percentile" follows per-packet arrival timing; "ewma" follows rtpjitterbuffer's avg-jitter.
+        self.jitter_estimator = os.getenv("TCHAT_JITTER_ESTIMATOR", "percentile").strip().lower()
+        self.jitter_percentile = self._clamp(self._env_float("TCHAT_JITTER_PERCENTILE", 0.97), 0.5, 0.999)
+        self.jitter_decay_ms_per_s = max(0.0, self._env_float("TCHAT_JITTER_DECAY_MS_PER_S", 20.0))
+        self.jitter_attack_wait_ms = max(0, self._env_int("TCHAT_JITTER_ATTACK_WAIT_MS", 200))
+        self.jitter_min_step_ms = max(1, self._env_int("TCHAT_JITTER_MIN_STEP_MS", 5))
+        self.remote_silence_db = self._env_float("TCHAT_REMOTE_SILENCE_DB", -50.0)
+        self.jitter_trace_path = os.getenv("TCHAT_JITTER_TRACE") or None
+        self._jitter_trace = None
+        self._jitter_pending_since = None
+        self._remote_voice_ts = None
+        self.network_rtt_ms = None
+        self.network_rtt_var_ms = None
         self.queues = {}
         self.queue_overruns = {}
         self.clock = None
@@ -39,12 +88,61 @@ class MediaEngine:
         self.vad_sink = None
         self.lock = threading.Lock()
         self.is_listen_only = False
+        self.hot_duplex = self._env_flag_default("TCHAT_HOT_DUPLEX", True)
+        # Opt-in: a standby pipeline holds the capture device open and the RTP port bound while idle.
+        self.standby_pool = self._env_flag_default("TCHAT_STANDBY_POOL", False)
+        standby_state = os.getenv("TCHAT_STANDBY_STATE", "paused").strip().lower()
+        self.standby_state = Gst.State.READY if standby_state == "ready" else Gst.State.PAUSED
+        self._standby = None
+        self._standby_lock = threading.Lock()
+        self.prune_stages = self._env_flag_default("TCHAT_PRUNE_STAGES", True)
+        self._stages = {}
+        self._stage_lock = threading.Lock()
+        self.caps_planner = self._env_flag_default("TCHAT_CAPS_PLANNER", True)
+        self._caps_plan = {}
+        self.profiling = self._env_flag("TCHAT_PROFILER")
+        self.profiler = PipelineProfiler(max(1, self._env_int("TCHAT_PROFILER_SAMPLE", 1)))
+        self.latency = LatencyModel()
+        self._latency_update_ts = 0.0
+        # Background metrics sampling; 0 leaves polling to the caller (UI/headless timer).
+        self.metrics_interval_ms = max(0, self._env_int("TCHAT_METRICS_INTERVAL_MS", 50))
+        self.metrics_listen_interval_ms = max(0, self._env_int("TCHAT_METRICS_LISTEN_INTERVAL_MS", 500))
+        self._sampler = None
+        self._sampler_stop = threading.Event()
+        self._poll_lock = threading.Lock()
         self.last_local_port = None
         self.last_input_device = None
         self.last_output_device = None
         self.audio_src = None
         self.audio_sink = None
         self.target_sample_rate = self._env_int("TCHAT_TARGET_SAMPLE_RATE", 48000)
+        self.delay_estimator = self._make_delay_estimator()
+        # Playout time stretching: decoded audio goes appsink → WSOLA → appsrc before playout_q.
+        self.tsm_enabled = self._env_flag("TCHAT_TSM")
+        self.tsm_frame_ms = max(4, self._env_int("TCHAT_TSM_FRAME_MS", 10))
+        self.tsm_control = StretchController(
+            setpoint_ms=max(0.0, self._env_float("TCHAT_TSM_RESERVE_MS", 40.0)),
+            max_stretch=self._env_float("TCHAT_TSM_MAX_STRETCH", 0.05),
+        )
+        self.tsm = None
+        self.tsm_src = None
+        self._tsm_pts = None
+        self._tsm_ring = None
+        # Conference: one encoder fans out to every peer through a multiudpsink; each added
+        # peer is decoded on its own branch into conf_mixer, ahead of playout and the AEC render.
+        self.conference = self._env_int("TCHAT_MAX_SESSIONS", 1) > 1
+        self.conf_mixer = None
+        self.peers = {}
+        self._primary_client = None
+        self._peer_seq = 0
+        # Recording: Opus packets are teed off after opusenc and rtpopusdepay through leaky queues
+        # into appsinks, and OggWriter threads mux them to files; nothing is decoded or encoded again.
+        self.record_dir = (os.getenv("TCHAT_RECORD_DIR") or "").strip() or None
+        self.record_queue_buffers = max(10, self._env_int("TCHAT_RECORD_QUEUE", 500))
+        self.record_nice = max(0, self._env_int("TCHAT_RECORD_NICE", 10))
+        self.record_sinks = {}
+        self.recorders = {}
+        self._record_stamp = None
         self.input_sample_rate = None
         self.hpf = None
         self.hpf_enabled = self._env_flag_default("TCHAT_HPF_ENABLED", True)
@@ -70,6 +168,7 @@ class MediaEngine:
         self.cng_current_level = 0.0
         self.cng_target_level = 0.0
         self.cng_last_update = 0.0
+        self.dfn_mix_last_update = 0.0
         self.disable_aec_env = self._env_flag("TCHAT_DISABLE_AEC")
         self.disable_dfn_env = self._env_flag("TCHAT_DISABLE_DFN")
         self.disable_agc_env = self._env_flag("TCHAT_DISABLE_AGC")
@@ -85,7 +184,6 @@ class MediaEngine:
         self.aec_delay_ms = self._env_int("TCHAT_AEC_DELAY_MS", 0)
         self.dfn_mix = self._env_float("TCHAT_DFN_MIX", 0.85)
         self.dfn_post_filter = self._env_float("TCHAT_DFN_POST_FILTER", 0.1)
-        self.dfn_vad_link = self._env_flag_default("TCHAT_DFN_VAD_LINK", False)
         self.dfn_mix_speech = self._env_float("TCHAT_DFN_MIX_SPEECH", 0.8)
         self.dfn_mix_silence = self._env_float("TCHAT_DFN_MIX_SILENCE", 1.0)
         self.dfn_mix_smoothing = self._env_float("TCHAT_DFN_MIX_SMOOTHING", 0.15)
@@ -100,6 +198,17 @@ class MediaEngine:
         self._vad_effective = False
         self._vad_pending = None
         self._vad_pending_since = None
+        # Send-side DTX on our VAD: "thin" lowers the bitrate and lets Opus DTX run, "drop" also
+        # holds frames back from the encoder apart from one keepalive per interval.
+        self.vad_dtx = os.getenv("TCHAT_VAD_DTX", "off").strip().lower() or "off"
+        if self.vad_dtx not in ("off", "thin", "drop"):
+            self.logger.warning("Unknown TCHAT_VAD_DTX %r, using off", self.vad_dtx)
+            self.vad_dtx = "off"
+        self.vad_dtx_hangover_ms = max(0, self._env_int("TCHAT_VAD_DTX_HANGOVER_MS", 300))
+        self.vad_dtx_keepalive_ms = max(20, self._env_int("TCHAT_VAD_DTX_KEEPALIVE_MS", 400))
+        self.vad_dtx_bitrate = max(6000, self._env_int("TCHAT_VAD_DTX_BITRATE", 8000))
+        self.vad_dtx_preroll_ms = max(0, self._env_int("TCHAT_VAD_DTX_PREROLL_MS", 40))
+        self._reset_dtx()
         self.limiter_threshold_db = self._env_float("TCHAT_LIMITER_THRESHOLD_DB", -1.0)
         self.limiter_attack_ms = self._env_float("TCHAT_LIMITER_ATTACK_MS", 5.0)
         self.limiter_release_ms = self._env_float("TCHAT_LIMITER_RELEASE_MS", 80.0)
@@ -107,7 +216,6 @@ class MediaEngine:
         self.opus_packet_loss = self._env_int("TCHAT_OPUS_PACKET_LOSS", 5)
         self.opus_fec = self._env_flag_default("TCHAT_OPUS_FEC", True)
         self.opus_dtx = self._env_flag("TCHAT_OPUS_DTX")
-        self.opus_complexity = self._env_int("TCHAT_OPUS_COMPLEXITY", 10)
         self.aec_active = None
         self.dfn_active = None
         self.limiter_active = None
@@ -119,11 +227,68 @@ class MediaEngine:
         self.aec_delay_min_change_ms = self._env_int("TCHAT_AEC_DELAY_MIN_CHANGE_MS", 5)
         self._dfn_io_cache = {}
         self.send_enabled = True
+        # on_error owners must call stop() themselves, on the thread that drives the engine.
         self.on_error = None
         self.on_warning = None
+        # Receiver reports: ours go out through on_receiver_report, the peer's come in via apply_receiver_report.
+        self.on_receiver_report = None
+        self.loss_adaptive = self._env_flag_default("TCHAT_LOSS_ADAPT", True)
+        self.loss_report_interval_ms = max(100, self._env_int("TCHAT_LOSS_REPORT_MS", 1000))
+        self.loss_counter = LossCounter()
+        self.loss_adapter = OpusLossAdapter(min_bitrate=max(6000, self._env_int("TCHAT_OPUS_MIN_BITRATE", 16000)))
+        self._loss_report_ts = 0.0
+        # Packet time: opus_frame_ms is what the encoder sends now. Our preference goes out
+        # through on_ptime_preference; the negotiated value comes back via set_ptime.
+        self.on_ptime_preference = None
+        self.ptime_auto = self._env_flag_default("TCHAT_PTIME_AUTO", True)
+        self.ptime_congested_ms = self._env_int("TCHAT_PTIME_CONGESTED_MS", 40)
+        if self.ptime_congested_ms not in profiles.NEGOTIABLE_PTIMES:
+            self.ptime_congested_ms = 40
+        self._ptime_preference = None
+        self._tx_packets = 0
+        self._tx_bytes = 0
+        self._tx_window = None
         self.last_error = None
         self.last_warning = None
         self._handling_error = False
+        self._bus_queue = None
+        self._bus_latency = {"stats": deque(maxlen=200), "control": deque(maxlen=200)}
+
+    def apply_profile(self, name):
+        """Load a named profile's defaults; individual TCHAT_* knobs still override them."""
+        self.profile, profile = profiles.resolve(name)
+        if name and self.profile != name.strip().lower().replace("_", "-"):
+            self.logger.warning("Unknown profile %r, using %s", name, self.profile)
+        self.resample_quality = int(self._clamp(self._env_int("TCHAT_RESAMPLE_QUALITY", profile["resample_quality"]), 0, 10))
+        self.opus_complexity = self._env_int("TCHAT_OPUS_COMPLEXITY", profile["opus_complexity"])
+        self.opus_frame_ms = self._env_int("TCHAT_OPUS_FRAME_MS", profile["opus_frame_ms"])
+        if self.opus_frame_ms not in profiles.OPUS_FRAME_SIZES:
+            self.logger.warning("Unsupported Opus frame size %s ms, using %s", self.opus_frame_ms, profile["opus_frame_ms"])
+            self.opus_frame_ms = profile["opus_frame_ms"]
+        self.opus_frame_ms_default = self.opus_frame_ms
+        self.queue_max_buffers = max(1, self._env_int("TCHAT_QUEUE_MAX_BUFFERS", profile["queue_max_buffers"]))
+        self.jitter_latency_ms_default = self._env_int("TCHAT_JITTER_LATENCY_MS", profile["jitter_latency_ms"])
+        self.jitter_latency_ms = self.jitter_latency_ms_default
+        self.jitter_min_ms = self._env_int("TCHAT_JITTER_MIN_MS", profile["jitter_min_ms"])
+        self.jitter_max_ms = self._env_int("TCHAT_JITTER_MAX_MS", profile["jitter_max_ms"])
+        if self.jitter_min_ms > self.jitter_max_ms:
+            self.jitter_min_ms, self.jitter_max_ms = self.jitter_max_ms, self.jitter_min_ms
+        self.vad_stride = max(1, self._env_int("TCHAT_VAD_STRIDE", profile["vad_stride"]))
+        if self.vad:
+            self.vad.set_stride(self.vad_stride)
+        self.dfn_vad_link = self._env_flag_default("TCHAT_DFN_VAD_LINK", profile["dfn_vad_link"])
+        self.logger.info(
+            "Profile %s: resample q%d, opus c%d/%d ms, queues %d, jitter %d ms [%d..%d], VAD stride %d",
+            self.profile,
+            self.resample_quality,
+            self.opus_complexity,
+            self.opus_frame_ms,
+            self.queue_max_buffers,
+            self.jitter_latency_ms_default,
+            self.jitter_min_ms,
+            self.jitter_max_ms,
+            self.vad_stride,
+        )
 
     def list_devices(self):
         sources = []
@@ -268,489 +433,452 @@ class MediaEngine:
                 raise RuntimeError("DFN 单模型 I/O 名称应为 input/output")
 
     def start(self, local_port, remote_ip, remote_port, input_device=None, output_device=None):
+        with self._standby_lock:
+            start_ts = time.monotonic()
+            standby = None
+            with self.lock:
+                if self.pipeline:
+                    return
+                if self._standby:
+                    standby = self._take_standby(remote_ip, input_device, output_device)
+                if standby is None:
+                    self.pipeline = Gst.Pipeline.new("tchat")
+                    if self.pipeline is None:
+                        raise RuntimeError("Failed to create GStreamer pipeline")
+
+            try:
+                self.metrics.clear_runtime()
+                self.profiler.reset()
+                self.latency.reset()
+                self.tsm_control.reset()
+                self.loss_counter.reset()
+                self.loss_adapter.reset()
+                self._tx_packets = 0
+                self._tx_bytes = 0
+                self._tx_window = None
+                self._reset_dtx()
+                self._update_ptime_preference()
+                if standby:
+                    self._adopt_standby(standby, local_port, remote_ip, remote_port)
+                else:
+                    self._build(self.pipeline, local_port, remote_ip, remote_port, input_device, output_device)
+                # After the build: the RTP clock rate follows the negotiated target rate.
+                self.delay_estimator = self._make_delay_estimator()
+                self._remote_voice_ts = None
+                if self.opusenc:
+                    # A standby encoder was configured before this call's adapter reset.
+                    self._apply_opus_loss_settings(self.opusenc)
+                    self._set_if_prop(self.opusenc, "frame-size", int(self.opus_frame_ms))
+                    self._set_if_prop(self.opusenc, "dtx", self._opus_dtx_active())
+                self._play(local_port, remote_ip, remote_port)
+            except Exception as exc:
+                self.logger.exception("Failed to start pipeline: %s", exc)
+                self.stop(refill=False)
+                raise
+            elapsed_ms = (time.monotonic() - start_ts) * 1000.0
+            self.logger.info("Start→PLAYING %.1f ms (%s)", elapsed_ms, "standby" if standby else "cold")
+            self.metrics.update_pipeline_start(elapsed_ms, bool(standby))
+            self._start_sampler()
+
+    def _load_build_settings(self, remote_ip, remote_port, local_port):
+        """Re-read the TCHAT_* overrides for a new pipeline; called with self.lock held."""
+        self.last_error = None
+        disable_aec = self._env_flag("TCHAT_DISABLE_AEC")
+        disable_dfn = self._env_flag("TCHAT_DISABLE_DFN")
+        disable_agc = self._env_flag("TCHAT_DISABLE_AGC")
+        self.target_sample_rate = self._env_int("TCHAT_TARGET_SAMPLE_RATE", self.target_sample_rate)
+        self.hpf_enabled = self._env_flag_default("TCHAT_HPF_ENABLED", self.hpf_enabled)
+        self.hpf_cutoff_hz = self._env_int("TCHAT_HPF_CUTOFF_HZ", self.hpf_cutoff_hz)
+        self.eq_enabled = self._env_flag_default("TCHAT_EQ_ENABLED", self.eq_enabled)
+        self.eq_low_gain_db = self._env_float("TCHAT_EQ_LOW_DB", self.eq_low_gain_db)
+        self.eq_mid_gain_db = self._env_float("TCHAT_EQ_MID_DB", self.eq_mid_gain_db)
+        self.eq_high_gain_db = self._env_float("TCHAT_EQ_HIGH_DB", self.eq_high_gain_db)
+        self.cng_enabled = self._env_flag_default("TCHAT_CNG_ENABLED", self.cng_enabled)
+        self.cng_level_db = self._env_float("TCHAT_CNG_LEVEL_DB", self.cng_level_db)
+        self.cng_fade_ms = self._env_int("TCHAT_CNG_FADE_MS", self.cng_fade_ms)
+        self.dfn_vad_link = self._env_flag_default("TCHAT_DFN_VAD_LINK", self.dfn_vad_link)
+        self.dfn_mix_speech = self._env_float("TCHAT_DFN_MIX_SPEECH", self.dfn_mix_speech)
+        self.dfn_mix_silence = self._env_float("TCHAT_DFN_MIX_SILENCE", self.dfn_mix_silence)
+        self.dfn_mix_smoothing = self._env_float("TCHAT_DFN_MIX_SMOOTHING", self.dfn_mix_smoothing)
+        self.dfn_strict_io_check = self._env_flag_default("TCHAT_DFN_STRICT_IO_CHECK", self.dfn_strict_io_check)
+        self.dfn_allow_single_model = self._env_flag_default("TCHAT_DFN_ALLOW_SINGLE_MODEL", self.dfn_allow_single_model)
+        self.opus_bitrate = self._env_int("TCHAT_OPUS_BITRATE", self.opus_bitrate)
+        self.opus_packet_loss = self._env_int("TCHAT_OPUS_PACKET_LOSS", self.opus_packet_loss)
+        self.opus_fec = self._env_flag_default("TCHAT_OPUS_FEC", self.opus_fec)
+        self.opus_dtx = self._env_flag("TCHAT_OPUS_DTX")
+        self.agc_input_volume = self._env_flag_default("TCHAT_AGC_INPUT_VOLUME", self.agc_input_volume)
+        self.agc_headroom_db = self._env_float("TCHAT_AGC_HEADROOM_DB", self.agc_headroom_db)
+        self.agc_max_gain_db = self._env_float("TCHAT_AGC_MAX_GAIN_DB", self.agc_max_gain_db)
+        self.agc_initial_gain_db = self._env_float("TCHAT_AGC_INITIAL_GAIN_DB", self.agc_initial_gain_db)
+        self.agc_max_noise_dbfs = self._env_float("TCHAT_AGC_MAX_NOISE_DBFS", self.agc_max_noise_dbfs)
+        if self.target_sample_rate < 8000 or self.target_sample_rate > 96000:
+            self.logger.warning("Invalid target sample rate %s, using 48000", self.target_sample_rate)
+            self.target_sample_rate = 48000
+        self.disable_aec_env = disable_aec
+        self.disable_dfn_env = disable_dfn
+        self.disable_agc_env = disable_agc
+        if disable_aec:
+            self.aec_enabled = False
+            self.agc_enabled = False
+        if disable_dfn:
+            self.dfn_enabled = False
+        if disable_agc:
+            self.agc_enabled = False
+        self.is_listen_only = remote_ip is None or remote_port is None
+        self.last_local_port = local_port
+        return disable_aec, disable_dfn, disable_agc
+
+    def _build(self, pipeline, local_port, remote_ip, remote_port, input_device, output_device, standby=False):
+        """Create, add and link every element; leaves the pipeline in NULL.
+
+        With standby=True the send valve starts closed and send_enabled is left alone.
+        """
         with self.lock:
-            if self.pipeline:
-                return
-            self.pipeline = Gst.Pipeline.new("tchat")
-            if self.pipeline is None:
-                raise RuntimeError("Failed to create GStreamer pipeline")
+            disable_aec, disable_dfn, disable_agc = self._load_build_settings(remote_ip, remote_port, local_port)
+        self.logger.info("Media mode: %s", "listen-only" if self.is_listen_only else "full-duplex")
+        if disable_aec:
+            self.logger.info("AEC disabled via TCHAT_DISABLE_AEC")
+        if disable_dfn:
+            self.logger.info("DFN disabled via TCHAT_DISABLE_DFN")
+        if disable_agc:
+            self.logger.info("AGC disabled via TCHAT_DISABLE_AGC")
+
+        self._check_required_plugins(disable_aec, disable_dfn)
+        if not disable_dfn:
+            self._check_dfn_models()
+
+        input_backend = backends.from_spec(input_device, "input")
+        output_backend = backends.from_spec(output_device, "output")
+        if input_backend is None or output_backend is None:
+            sources, sinks = self.list_devices()
+            input_device = input_backend or self._resolve_device_id(input_device, sources, "输入")
+            output_device = output_backend or self._resolve_device_id(output_device, sinks, "输出")
+        else:
+            input_device, output_device = input_backend, output_backend
+        self.last_input_device = input_device
+        self.last_output_device = output_device
 
-        try:
-            self.metrics.clear_runtime()
-            self.last_error = None
-            disable_aec = self._env_flag("TCHAT_DISABLE_AEC")
-            disable_dfn = self._env_flag("TCHAT_DISABLE_DFN")
-            disable_agc = self._env_flag("TCHAT_DISABLE_AGC")
-            self.target_sample_rate = self._env_int("TCHAT_TARGET_SAMPLE_RATE", self.target_sample_rate)
-            self.hpf_enabled = self._env_flag_default("TCHAT_HPF_ENABLED", self.hpf_enabled)
-            self.hpf_cutoff_hz = self._env_int("TCHAT_HPF_CUTOFF_HZ", self.hpf_cutoff_hz)
-            self.eq_enabled = self._env_flag_default("TCHAT_EQ_ENABLED", self.eq_enabled)
-            self.eq_low_gain_db = self._env_float("TCHAT_EQ_LOW_DB", self.eq_low_gain_db)
-            self.eq_mid_gain_db = self._env_float("TCHAT_EQ_MID_DB", self.eq_mid_gain_db)
-            self.eq_high_gain_db = self._env_float("TCHAT_EQ_HIGH_DB", self.eq_high_gain_db)
-            self.cng_enabled = self._env_flag_default("TCHAT_CNG_ENABLED", self.cng_enabled)
-            self.cng_level_db = self._env_float("TCHAT_CNG_LEVEL_DB", self.cng_level_db)
-            self.cng_fade_ms = self._env_int("TCHAT_CNG_FADE_MS", self.cng_fade_ms)
-            self.dfn_vad_link = self._env_flag_default("TCHAT_DFN_VAD_LINK", self.dfn_vad_link)
-            self.dfn_mix_speech = self._env_float("TCHAT_DFN_MIX_SPEECH", self.dfn_mix_speech)
-            self.dfn_mix_silence = self._env_float("TCHAT_DFN_MIX_SILENCE", self.dfn_mix_silence)
-            self.dfn_mix_smoothing = self._env_float("TCHAT_DFN_MIX_SMOOTHING", self.dfn_mix_smoothing)
-            self.dfn_strict_io_check = self._env_flag_default("TCHAT_DFN_STRICT_IO_CHECK", self.dfn_strict_io_check)
-            self.dfn_allow_single_model = self._env_flag_default("TCHAT_DFN_ALLOW_SINGLE_MODEL", self.dfn_allow_single_model)
-            self.opus_bitrate = self._env_int("TCHAT_OPUS_BITRATE", self.opus_bitrate)
-            self.opus_packet_loss = self._env_int("TCHAT_OPUS_PACKET_LOSS", self.opus_packet_loss)
-            self.opus_fec = self._env_flag_default("TCHAT_OPUS_FEC", self.opus_fec)
-            self.opus_dtx = self._env_flag("TCHAT_OPUS_DTX")
-            self.agc_input_volume = self._env_flag_default("TCHAT_AGC_INPUT_VOLUME", self.agc_input_volume)
-            self.agc_headroom_db = self._env_float("TCHAT_AGC_HEADROOM_DB", self.agc_headroom_db)
-            self.agc_max_gain_db = self._env_float("TCHAT_AGC_MAX_GAIN_DB", self.agc_max_gain_db)
-            self.agc_initial_gain_db = self._env_float("TCHAT_AGC_INITIAL_GAIN_DB", self.agc_initial_gain_db)
-            self.agc_max_noise_dbfs = self._env_float("TCHAT_AGC_MAX_NOISE_DBFS", self.agc_max_noise_dbfs)
-            if self.target_sample_rate < 8000 or self.target_sample_rate > 96000:
-                self.logger.warning("Invalid target sample rate %s, using 48000", self.target_sample_rate)
-                self.target_sample_rate = 48000
-            self.disable_aec_env = disable_aec
-            self.disable_dfn_env = disable_dfn
-            self.disable_agc_env = disable_agc
-            if disable_aec:
-                self.aec_enabled = False
-                self.agc_enabled = False
-            if disable_dfn:
-                self.dfn_enabled = False
-            if disable_agc:
-                self.agc_enabled = False
-            self.is_listen_only = remote_ip is None or remote_port is None
-            self.last_local_port = local_port
-            self.logger.info("Media mode: %s", "listen-only" if self.is_listen_only else "full-duplex")
-            if self.is_listen_only:
-                self.cng_enabled = False
-            if disable_aec:
-                self.logger.info("AEC disabled via TCHAT_DISABLE_AEC")
-            if disable_dfn:
-                self.logger.info("DFN disabled via TCHAT_DISABLE_DFN")
-            if disable_agc:
-                self.logger.info("AGC disabled via TCHAT_DISABLE_AGC")
-
-            self._check_required_plugins(disable_aec, disable_dfn)
-            if not disable_dfn:
-                self._check_dfn_models()
+        src = self._make_audio_src(input_device)
+        self.audio_src = src
 
-            sources, sinks = self.list_devices()
-            input_device = self._resolve_device_id(input_device, sources, "输入")
-            output_device = self._resolve_device_id(output_device, sinks, "输出")
-            self.last_input_device = input_device
-            self.last_output_device = output_device
-
-            src = self._make_audio_src(input_device)
-            self.audio_src = src
-            sink = None
-            if not self.is_listen_only:
-                sink = self._make_audio_sink(output_device)
-                self.audio_sink = sink
-                self._set_if_prop(sink, "sync", False)
-
-            audconv1 = Gst.ElementFactory.make("audioconvert", "audconv1")
-            audres1 = Gst.ElementFactory.make("audioresample", "audres1")
-            self._set_if_prop(audres1, "quality", 10)
-            caps1 = Gst.ElementFactory.make("capsfilter", "caps1")
-            caps1.set_property(
-                "caps",
-                Gst.Caps.from_string(f"audio/x-raw,format=F32LE,rate={self.target_sample_rate},channels=1,layout=interleaved"),
-            )
-            self.hpf = self._make_hpf()
-            self.hpf_active = bool(self.hpf and self.hpf.get_factory().get_name() != "identity")
+        self._caps_plan = {}
+        capture_convs = self._make_converters(
+            "audconv1", "audres1", self._conversions_needed(self._probe_caps(src, "src", open_device=True), "F32LE")
+        )
+        caps1 = Gst.ElementFactory.make("capsfilter", "caps1")
+        caps1.set_property(
+            "caps",
+            Gst.Caps.from_string(f"audio/x-raw,format=F32LE,rate={self.target_sample_rate},channels=1,layout=interleaved"),
+        )
+        self.hpf = self._make_hpf()
+        self.hpf_active = bool(self.hpf and self.hpf.get_factory().get_name() != "identity")
 
-            capture_q = self._make_queue("capture_q", max_buffers=10, leaky=False)
-            
-            if disable_aec:
-                self.aec = None
-            else:
-                self.aec = Gst.ElementFactory.make("webrtcaec3", "aec")
-                if not self.aec:
-                    self.logger.warning("webrtcaec3 plugin not found; AEC disabled")
-            self.aec_active = bool(self.aec) if not disable_aec else False
-            if self.aec and self.aec.find_property("bypass"):
-                self.aec.set_property("bypass", not self.aec_enabled)
-            if self.aec and self.aec.find_property("stream-delay-ms"):
-                self.aec.set_property("stream-delay-ms", int(self.aec_delay_ms))
-            if self.aec and self.aec.find_property("auto-delay"):
-                self.aec.set_property("auto-delay", bool(self.aec_auto_delay))
-            if self.aec and self.aec.find_property("agc"):
-                self.aec.set_property("agc", bool(self.agc_enabled))
-            if self.aec and self.aec.find_property("agc-input-volume"):
-                self.aec.set_property("agc-input-volume", bool(self.agc_input_volume))
-            if self.aec and self.aec.find_property("agc-headroom-db"):
-                self.aec.set_property("agc-headroom-db", float(self.agc_headroom_db))
-            if self.aec and self.aec.find_property("agc-max-gain-db"):
-                self.aec.set_property("agc-max-gain-db", float(self.agc_max_gain_db))
-            if self.aec and self.aec.find_property("agc-initial-gain-db"):
-                self.aec.set_property("agc-initial-gain-db", float(self.agc_initial_gain_db))
-            if self.aec and self.aec.find_property("agc-max-noise-dbfs"):
-                self.aec.set_property("agc-max-noise-dbfs", float(self.agc_max_noise_dbfs))
-            if self.aec and self.aec.find_property("hpf"):
-                self.aec.set_property("hpf", bool(self.hpf_enabled))
-
-            # Tee for branching to VAD and encoder (after AEC when enabled)
-            capture_tee = Gst.ElementFactory.make("tee", "capture_tee")
-            vad_q = self._make_queue("vad_q", max_buffers=10, leaky="downstream")
-            
-            vad_conv = Gst.ElementFactory.make("audioconvert", "vad_conv")
-            vad_res = Gst.ElementFactory.make("audioresample", "vad_res")
-            self._set_if_prop(vad_res, "quality", 10)
-            vad_f32_caps = Gst.ElementFactory.make("capsfilter", "vad_f32_caps")
-            vad_f32_caps.set_property(
-                "caps",
-                Gst.Caps.from_string("audio/x-raw,format=F32LE,rate=16000,channels=1,layout=interleaved"),
-            )
-            vad_lpf = self._make_vad_lpf()
-            vad_post_conv = Gst.ElementFactory.make("audioconvert", "vad_post_conv")
-            vad_caps = Gst.ElementFactory.make("capsfilter", "vad_caps")
-            vad_caps.set_property(
-                "caps",
-                Gst.Caps.from_string("audio/x-raw,format=S16LE,rate=16000,channels=1,layout=interleaved"),
-            )
-            
-            self.vad_sink = Gst.ElementFactory.make("appsink", "vad_sink")
-            self.vad_sink.set_property(
-                "caps",
-                Gst.Caps.from_string("audio/x-raw,format=S16LE,rate=16000,channels=1,layout=interleaved"),
-            )
-            self.vad_sink.set_property("emit-signals", True)
-            self.vad_sink.set_property("sync", False)
-            self.vad_sink.set_property("max-buffers", 10)
-            self.vad_sink.set_property("drop", True)
-            self.vad_sink.connect("new-sample", self._on_vad_sample)
-
-            dfn_q = self._make_queue("dfn_q", max_buffers=10, leaky=False)
-            dfn_in_caps = Gst.ElementFactory.make("capsfilter", "dfn_in_caps")
-            dfn_in_caps.set_property(
-                "caps",
-                Gst.Caps.from_string(f"audio/x-raw,format=F32LE,rate={self.target_sample_rate},channels=1,layout=interleaved"),
-            )
-            self.dfn = Gst.ElementFactory.make("deepfilternet", "dfn")
-            if disable_dfn:
+        capture_q = self._make_queue("capture_q", leaky=False)
+
+        if disable_aec:
+            self.aec = None
+        else:
+            self.aec = Gst.ElementFactory.make("webrtcaec3", "aec")
+            if not self.aec:
+                self.logger.warning("webrtcaec3 plugin not found; AEC disabled")
+        self.aec_active = bool(self.aec) if not disable_aec else False
+        if self.aec and self.aec.find_property("bypass"):
+            self.aec.set_property("bypass", not self.aec_enabled)
+        if self.aec and self.aec.find_property("stream-delay-ms"):
+            self.aec.set_property("stream-delay-ms", int(self.aec_delay_ms))
+        if self.aec and self.aec.find_property("auto-delay"):
+            self.aec.set_property("auto-delay", bool(self.aec_auto_delay))
+        if self.aec and self.aec.find_property("agc"):
+            self.aec.set_property("agc", bool(self.agc_enabled))
+        if self.aec and self.aec.find_property("agc-input-volume"):
+            self.aec.set_property("agc-input-volume", bool(self.agc_input_volume))
+        if self.aec and self.aec.find_property("agc-headroom-db"):
+            self.aec.set_property("agc-headroom-db", float(self.agc_headroom_db))
+        if self.aec and self.aec.find_property("agc-max-gain-db"):
+            self.aec.set_property("agc-max-gain-db", float(self.agc_max_gain_db))
+        if self.aec and self.aec.find_property("agc-initial-gain-db"):
+            self.aec.set_property("agc-initial-gain-db", float(self.agc_initial_gain_db))
+        if self.aec and self.aec.find_property("agc-max-noise-dbfs"):
+            self.aec.set_property("agc-max-noise-dbfs", float(self.agc_max_noise_dbfs))
+        if self.aec and self.aec.find_property("hpf"):
+            self.aec.set_property("hpf", bool(self.hpf_enabled))
+
+        # Tee for branching to VAD and encoder (after AEC when enabled)
+        capture_tee = Gst.ElementFactory.make("tee", "capture_tee")
+        vad_q = self._make_queue("vad_q", leaky="downstream")
+
+        # The tee already carries F32 mono at the target rate; only the rate can differ.
+        vad_convs = self._make_converters("vad_conv", "vad_res", (False, self.target_sample_rate != 16000))
+        vad_f32_caps = Gst.ElementFactory.make("capsfilter", "vad_f32_caps")
+        vad_f32_caps.set_property(
+            "caps",
+            Gst.Caps.from_string("audio/x-raw,format=F32LE,rate=16000,channels=1,layout=interleaved"),
+        )
+        vad_lpf = self._make_vad_lpf()
+        vad_post_conv = Gst.ElementFactory.make("audioconvert", "vad_post_conv")
+        vad_caps = Gst.ElementFactory.make("capsfilter", "vad_caps")
+        vad_caps.set_property(
+            "caps",
+            Gst.Caps.from_string("audio/x-raw,format=S16LE,rate=16000,channels=1,layout=interleaved"),
+        )
+
+        self.vad_sink = Gst.ElementFactory.make("appsink", "vad_sink")
+        self.vad_sink.set_property(
+            "caps",
+            Gst.Caps.from_string("audio/x-raw,format=S16LE,rate=16000,channels=1,layout=interleaved"),
+        )
+        self.vad_sink.set_property("emit-signals", True)
+        self.vad_sink.set_property("sync", False)
+        self.vad_sink.set_property("max-buffers", 10)
+        self.vad_sink.set_property("drop", True)
+        self.vad_sink.connect("new-sample", self._on_vad_sample)
+
+        dfn_q = self._make_queue("dfn_q", leaky=False)
+        dfn_in_caps = Gst.ElementFactory.make("capsfilter", "dfn_in_caps")
+        dfn_in_caps.set_property(
+            "caps",
+            Gst.Caps.from_string(f"audio/x-raw,format=F32LE,rate={self.target_sample_rate},channels=1,layout=interleaved"),
+        )
+        self.dfn = Gst.ElementFactory.make("deepfilternet", "dfn")
+        if disable_dfn:
+            self.dfn = Gst.ElementFactory.make("identity", "dfn")
+            if not self.dfn:
+                raise RuntimeError("Failed to create identity element for DFN bypass")
+        else:
+            if not self.dfn:
+                self.logger.warning("deepfilternet plugin not found; bypassing DFN")
                 self.dfn = Gst.ElementFactory.make("identity", "dfn")
                 if not self.dfn:
                     raise RuntimeError("Failed to create identity element for DFN bypass")
+        self.dfn_active = bool(self.dfn and self.dfn.get_factory().get_name() != "identity") if not disable_dfn else False
+        if self.dfn and self.dfn.find_property("bypass"):
+            self.dfn.set_property("bypass", not self.dfn_enabled)
+        if self.dfn and self.dfn.find_property("mix"):
+            self.dfn.set_property("mix", self._clamp(self.dfn_mix, 0.0, 1.0))
+        if self.dfn and self.dfn.find_property("post-filter"):
+            self.dfn.set_property("post-filter", self._clamp(self.dfn_post_filter, 0.0, 1.0))
+        models_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models"))
+        dfn_dir = os.path.join(models_root, "DeepFilterNet")
+        if not disable_dfn:
+            if os.path.isdir(dfn_dir) and os.path.exists(os.path.join(dfn_dir, "enc.onnx")):
+                self._set_if_prop(self.dfn, "model-dir", dfn_dir)
             else:
-                if not self.dfn:
-                    self.logger.warning("deepfilternet plugin not found; bypassing DFN")
-                    self.dfn = Gst.ElementFactory.make("identity", "dfn")
-                    if not self.dfn:
-                        raise RuntimeError("Failed to create identity element for DFN bypass")
-            self.dfn_active = bool(self.dfn and self.dfn.get_factory().get_name() != "identity") if not disable_dfn else False
-            if self.dfn and self.dfn.find_property("bypass"):
-                self.dfn.set_property("bypass", not self.dfn_enabled)
-            if self.dfn and self.dfn.find_property("mix"):
-                self.dfn.set_property("mix", self._clamp(self.dfn_mix, 0.0, 1.0))
-            if self.dfn and self.dfn.find_property("post-filter"):
-                self.dfn.set_property("post-filter", self._clamp(self.dfn_post_filter, 0.0, 1.0))
-            models_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models"))
-            dfn_dir = os.path.join(models_root, "DeepFilterNet")
-            if not disable_dfn:
-                if os.path.isdir(dfn_dir) and os.path.exists(os.path.join(dfn_dir, "enc.onnx")):
-                    self._set_if_prop(self.dfn, "model-dir", dfn_dir)
-                else:
-                    model_path = os.path.join(models_root, "deepfilternet.onnx")
-                    self._set_if_prop(self.dfn, "model-path", model_path)
-            self.logger.info("AEC active: %s", self.aec_active)
-            self.logger.info("DFN active: %s", self.dfn_active)
-
-            post_dfn_q = self._make_queue("post_dfn_q", max_buffers=10, leaky=False)
-            self.send_enabled = not self.is_listen_only
-            self.send_valve = self._make_valve(drop=not self.send_enabled)
-            self.eq = self._make_eq()
-            self.eq_active = bool(self.eq and self.eq.get_factory().get_name() != "identity")
-            self.cng_mixer, self.cng_src, self.cng_volume, self.cng_valve = self._make_cng()
-            self.cng_active = bool(self.cng_mixer)
-            self.limiter = self._make_limiter()
-            self.limiter_active = bool(self.limiter and self.limiter.get_factory().get_name() != "identity")
-            audconv_enc = Gst.ElementFactory.make("audioconvert", "audconv_enc")
-            audres_enc = Gst.ElementFactory.make("audioresample", "audres_enc")
-            self._set_if_prop(audres_enc, "quality", 10)
-            enc_caps = Gst.ElementFactory.make("capsfilter", "enc_caps")
-            enc_caps.set_property(
-                "caps",
-                Gst.Caps.from_string(f"audio/x-raw,format=S16LE,rate={self.target_sample_rate},channels=1,layout=interleaved"),
+                model_path = os.path.join(models_root, "deepfilternet.onnx")
+                self._set_if_prop(self.dfn, "model-path", model_path)
+        self.logger.info("AEC active: %s", self.aec_active)
+        self.logger.info("DFN active: %s", self.dfn_active)
+
+        post_dfn_q = self._make_queue("post_dfn_q", leaky=False)
+        send_open = not self.is_listen_only and not standby
+        if not standby:
+            self.send_enabled = send_open
+        self.send_valve = self._make_valve(drop=not send_open)
+        self.eq = self._make_eq()
+        self.eq_active = bool(self.eq and self.eq.get_factory().get_name() != "identity")
+        self.cng_mixer, self.cng_src, self.cng_volume, self.cng_valve = self._make_cng()
+        self.cng_active = bool(self.cng_mixer)
+        self.limiter = self._make_limiter()
+        self.limiter_active = bool(self.limiter and self.limiter.get_factory().get_name() != "identity")
+        opusenc = Gst.ElementFactory.make("opusenc", "opusenc")
+        enc_need = self._conversions_needed(self._probe_caps(opusenc, "sink"), "F32LE")
+        enc_convs = self._make_converters("audconv_enc", "audres_enc", enc_need)
+        enc_format = "S16LE" if enc_need[0] else "F32LE"
+        enc_caps = Gst.ElementFactory.make("capsfilter", "enc_caps")
+        enc_caps.set_property(
+            "caps",
+            Gst.Caps.from_string(f"audio/x-raw,format={enc_format},rate={self.target_sample_rate},channels=1,layout=interleaved"),
+        )
+        self.opusenc = opusenc
+        self._set_if_prop(opusenc, "frame-size", int(self.opus_frame_ms))
+        self._set_if_prop(opusenc, "audio-type", "voice")
+        self._set_if_prop(opusenc, "complexity", int(self.opus_complexity))
+        self._set_if_prop(opusenc, "dtx", self._opus_dtx_active())
+        self._apply_opus_loss_settings(opusenc)
+        if self.vad_dtx == "drop":
+            opusenc.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, self._on_dtx_probe)
+
+        rtppay = Gst.ElementFactory.make("rtpopuspay", "rtppay")
+        rtppay.set_property("pt", 96)
+        record_up = self._make_record_elements("up")
+        record_tee = [record_up["record_up_tee"]] if record_up else []
+
+        self.udpsink = self._make_rtp_sink(None if self.is_listen_only else remote_ip, remote_port)
+
+        downlink = {}
+        if not self.is_listen_only:
+            downlink = self._make_downlink_elements(local_port, output_device, remote_ip, remote_port)
+
+        # Build elements dict
+        elements = {
+            "src": src,
+            "caps1": caps1,
+            "hpf": self.hpf,
+            "capture_q": capture_q,
+            "capture_tee": capture_tee,
+            "vad_q": vad_q,
+            "vad_f32_caps": vad_f32_caps,
+            "vad_lpf": vad_lpf,
+            "vad_post_conv": vad_post_conv,
+            "vad_caps": vad_caps,
+            "vad_sink": self.vad_sink,
+            "dfn_q": dfn_q,
+            "dfn_in_caps": dfn_in_caps,
+            "dfn": self.dfn,
+            "post_dfn_q": post_dfn_q,
+            "send_valve": self.send_valve,
+            "eq": self.eq,
+            "limiter": self.limiter,
+            "enc_caps": enc_caps,
+            "opusenc": opusenc,
+            "rtppay": rtppay,
+            "udpsink": self.udpsink,
+            **record_up,
+        }
+
+        if self.cng_mixer:
+            elements.update({
+                "cng_mixer": self.cng_mixer,
+                "cng_src": self.cng_src,
+                "cng_conv": self.cng_conv,
+                "cng_res": self.cng_res,
+                "cng_caps": self.cng_caps,
+                "cng_volume": self.cng_volume,
+                "cng_valve": self.cng_valve,
+            })
+
+        if self.aec:
+            elements["aec"] = self.aec
+
+        for element in capture_convs + vad_convs + enc_convs:
+            elements[element.get_name()] = element
+        elements.update(downlink)
+
+        for name, element in elements.items():
+            if element is None:
+                raise RuntimeError(f"Failed to create GStreamer element: {name}")
+            pipeline.add(element)
+
+        # Capture chain: src → [AEC] → tee (VAD taps after AEC when enabled)
+        if self.aec:
+            self._link_many_or_raise("capture", src, *capture_convs, caps1, self.hpf, capture_q, self.aec, capture_tee)
+        else:
+            self._link_many_or_raise("capture", src, *capture_convs, caps1, self.hpf, capture_q, capture_tee)
+
+        # VAD branch: tee → queue → convert → resample → caps → appsink
+        # This works in both modes since it comes from capture path
+        self._link_tee_src_to("capture→vad", capture_tee, vad_q)
+        self._link_many_or_raise("vad", vad_q, *vad_convs, vad_f32_caps, vad_lpf, vad_post_conv, vad_caps, self.vad_sink)
+
+        # Main branch: tee → queue → DFN → Limiter → Opus → RTP
+        self._link_tee_src_to("capture→dfn", capture_tee, dfn_q)
+        encoder_chain = [dfn_q, dfn_in_caps, self.dfn, post_dfn_q, self.send_valve]
+        cng_voice_pad = None
+        cng_noise_pad = None
+
+        if self.cng_mixer:
+            self._link_many_or_raise("encoder_pre", *encoder_chain)
+            cng_voice_pad = self._link_to_mixer("cng_voice", self.send_valve, self.cng_mixer)
+            self._link_many_or_raise("cng_noise", self.cng_src, self.cng_conv, self.cng_res, self.cng_caps, self.cng_volume, self.cng_valve)
+            cng_noise_pad = self._link_to_mixer("cng_mix", self.cng_valve, self.cng_mixer)
+            self._link_many_or_raise(
+                "encoder_post",
+                self.cng_mixer,
+                self.eq,
+                self.limiter,
+                *enc_convs,
+                enc_caps,
+                opusenc,
+                *record_tee,
+                rtppay,
+            )
+        else:
+            self._link_many_or_raise(
+                "encoder",
+                *encoder_chain,
+                self.eq,
+                self.limiter,
+                *enc_convs,
+                enc_caps,
+                opusenc,
+                *record_tee,
+                rtppay,
             )
-            opusenc = Gst.ElementFactory.make("opusenc", "opusenc")
-            self.opusenc = opusenc
-            self._set_if_prop(opusenc, "bitrate", int(self.opus_bitrate))
-            self._set_if_prop(opusenc, "frame-size", 10)
-            self._set_if_prop(opusenc, "audio-type", "voice")
-            self._set_if_prop(opusenc, "complexity", int(self.opus_complexity))
-            self._set_if_prop(opusenc, "inband-fec", bool(self.opus_fec))
-            self._set_if_prop(opusenc, "dtx", bool(self.opus_dtx))
-            self._set_if_prop(opusenc, "packet-loss-percentage", int(self.opus_packet_loss))
-
-            rtppay = Gst.ElementFactory.make("rtpopuspay", "rtppay")
-            rtppay.set_property("pt", 96)
-
-            if self.is_listen_only:
-                self.udpsink = Gst.ElementFactory.make("fakesink", "rtp_sink")
+        self._link_rtp_out(rtppay, self.udpsink)
+        if record_up:
+            self._link_record_branch(record_up, "up")
+
+        if downlink:
+            self._link_downlink(downlink)
+        self._register_stages([dfn_q, dfn_in_caps, self.dfn, post_dfn_q], cng_voice_pad, cng_noise_pad)
+
+        self.logger.info("Verifying VAD sink configuration...")
+        self.logger.info("  VAD sink emit-signals: %s", self.vad_sink.get_property("emit-signals"))
+        self.logger.info("  VAD sink sync: %s", self.vad_sink.get_property("sync"))
+
+        vad_sink_pad = self.vad_sink.get_static_pad("sink")
+        if vad_sink_pad:
+            peer = vad_sink_pad.get_peer()
+            if peer:
+                self.logger.info("  VAD sink is linked to: %s", peer.get_parent().get_name())
             else:
-                self.udpsink = Gst.ElementFactory.make("udpsink", "rtp_sink")
-                self._set_if_prop(self.udpsink, "host", remote_ip or "127.0.0.1")
-                if remote_port is not None:
-                    self._set_if_prop(self.udpsink, "port", int(remote_port))
-            self._set_if_prop(self.udpsink, "async", False)
-            self._set_if_prop(self.udpsink, "sync", False)
-
-            rtpdepay = None
-            opusdec = None
-            audconv2 = None
-            audres2 = None
-            caps2 = None
-            playout_q = None
-            playout_tee = None
-            render_q = None
-            if not self.is_listen_only:
-                self.udpsrc = Gst.ElementFactory.make("udpsrc", "rtp_src")
-                self.udpsrc.set_property("port", int(local_port))
-                # Ensure pipeline stays live even before RTP arrives.
-                self._set_if_prop(self.udpsrc, "is-live", True)
-                self._set_if_prop(self.udpsrc, "do-timestamp", True)
-
-                rtp_caps = Gst.Caps.from_string(
-                    f"application/x-rtp,media=audio,encoding-name=OPUS,clock-rate={self.target_sample_rate},payload=96"
-                )
-                self.udpsrc.set_property("caps", rtp_caps)
-
-                self.jitter = Gst.ElementFactory.make("rtpjitterbuffer", "jitter")
-                self.jitter_latency_ms = int(self._clamp(self.jitter_latency_ms_default, self.jitter_min_ms, self.jitter_max_ms))
-                self._last_jitter_adjust_ts = 0.0
-                self.jitter.set_property("latency", self.jitter_latency_ms)
-                self._set_if_prop(self.jitter, "drop-on-late", True)
-                self.jitter.set_property("do-lost", True)
-
-                rtpdepay = Gst.ElementFactory.make("rtpopusdepay", "rtpdepay")
-                opusdec = Gst.ElementFactory.make("opusdec", "opusdec")
-                audconv2 = Gst.ElementFactory.make("audioconvert", "audconv2")
-                audres2 = Gst.ElementFactory.make("audioresample", "audres2")
-                self._set_if_prop(audres2, "quality", 10)
-                caps2 = Gst.ElementFactory.make("capsfilter", "caps2")
-                caps2.set_property(
-                    "caps",
-                    Gst.Caps.from_string(f"audio/x-raw,format=F32LE,rate={self.target_sample_rate},channels=1,layout=interleaved"),
-                )
+                self.logger.error("  VAD sink has NO PEER - not linked!")
+        else:
+            self.logger.error("  VAD sink has no sink pad!")
 
-                playout_q = self._make_queue("playout_q", max_buffers=10, leaky=False)
-                playout_conv = Gst.ElementFactory.make("audioconvert", "playout_conv")
-                playout_res = Gst.ElementFactory.make("audioresample", "playout_res")
-                self._set_if_prop(playout_res, "quality", 10)
-                playout_caps = Gst.ElementFactory.make("capsfilter", "playout_caps")
-                playout_caps.set_property(
-                    "caps",
-                    Gst.Caps.from_string(f"audio/x-raw,format=S16LE,rate={self.target_sample_rate},channels=1,layout=interleaved"),
-                )
-                if self.aec:
-                    playout_tee = Gst.ElementFactory.make("tee", "playout_tee")
-                    render_q = self._make_queue("render_q", max_buffers=10, leaky=False)
-
-            # Build elements dict
-            elements = {
-                "src": src,
-                "audconv1": audconv1,
-                "audres1": audres1,
-                "caps1": caps1,
-                "hpf": self.hpf,
-                "capture_q": capture_q,
-                "capture_tee": capture_tee,
-                "vad_q": vad_q,
-                "vad_conv": vad_conv,
-                "vad_res": vad_res,
-                "vad_f32_caps": vad_f32_caps,
-                "vad_lpf": vad_lpf,
-                "vad_post_conv": vad_post_conv,
-                "vad_caps": vad_caps,
-                "vad_sink": self.vad_sink,
-                "dfn_q": dfn_q,
-                "dfn_in_caps": dfn_in_caps,
-                "dfn": self.dfn,
-                "post_dfn_q": post_dfn_q,
-                "send_valve": self.send_valve,
-                "eq": self.eq,
-                "limiter": self.limiter,
-                "audconv_enc": audconv_enc,
-                "audres_enc": audres_enc,
-                "enc_caps": enc_caps,
-                "opusenc": opusenc,
-                "rtppay": rtppay,
-                "udpsink": self.udpsink,
-            }
+        udpsink_pad = self.udpsink.get_static_pad("sink")
+        if udpsink_pad:
+            udpsink_pad.add_probe(Gst.PadProbeType.BUFFER, self._on_send_probe)
+        else:
+            self.logger.warning("Could not get udpsink pad for latency probe")
 
-            if self.cng_mixer:
-                elements.update({
-                    "cng_mixer": self.cng_mixer,
-                    "cng_src": self.cng_src,
-                    "cng_conv": self.cng_conv,
-                    "cng_res": self.cng_res,
-                    "cng_caps": self.cng_caps,
-                    "cng_volume": self.cng_volume,
-                    "cng_valve": self.cng_valve,
-                })
-
-            if self.aec:
-                elements["aec"] = self.aec
-                if playout_tee:
-                    elements["playout_tee"] = playout_tee
-                    elements["render_q"] = render_q
-
-            if not self.is_listen_only:
-                elements.update({
-                    "udpsrc": self.udpsrc,
-                    "jitter": self.jitter,
-                    "rtpdepay": rtpdepay,
-                    "opusdec": opusdec,
-                    "audconv2": audconv2,
-                    "audres2": audres2,
-                    "caps2": caps2,
-                    "playout_q": playout_q,
-                    "playout_conv": playout_conv,
-                    "playout_res": playout_res,
-                    "playout_caps": playout_caps,
-                    "sink": sink,
-                })
-
-            for name, element in elements.items():
-                if element is None:
-                    raise RuntimeError(f"Failed to create GStreamer element: {name}")
-                self.pipeline.add(element)
+        if self.udpsrc:
+            self._add_downlink_probes()
 
-            # Capture chain: src → [AEC] → tee (VAD taps after AEC when enabled)
-            if self.aec:
-                self._link_many_or_raise("capture", src, audconv1, audres1, caps1, self.hpf, capture_q, self.aec, capture_tee)
-            else:
-                self._link_many_or_raise("capture", src, audconv1, audres1, caps1, self.hpf, capture_q, capture_tee)
-
-            # VAD branch: tee → queue → convert → resample → caps → appsink
-            # This works in both modes since it comes from capture path
-            self._link_tee_src_to("capture→vad", capture_tee, vad_q)
-            self._link_many_or_raise("vad", vad_q, vad_conv, vad_res, vad_f32_caps, vad_lpf, vad_post_conv, vad_caps, self.vad_sink)
-            
-            # Main branch: tee → queue → DFN → Limiter → Opus → RTP
-            self._link_tee_src_to("capture→dfn", capture_tee, dfn_q)
-            encoder_chain = [dfn_q, dfn_in_caps, self.dfn, post_dfn_q, self.send_valve]
-
-            if self.cng_mixer:
-                self._link_many_or_raise("encoder_pre", *encoder_chain)
-                self._link_to_mixer("cng_voice", self.send_valve, self.cng_mixer)
-                self._link_many_or_raise("cng_noise", self.cng_src, self.cng_conv, self.cng_res, self.cng_caps, self.cng_volume, self.cng_valve)
-                self._link_to_mixer("cng_mix", self.cng_valve, self.cng_mixer)
-                self._link_many_or_raise(
-                    "encoder_post",
-                    self.cng_mixer,
-                    self.eq,
-                    self.limiter,
-                    audconv_enc,
-                    audres_enc,
-                    enc_caps,
-                    opusenc,
-                    rtppay,
-                    self.udpsink,
-                )
-            else:
-                self._link_many_or_raise(
-                    "encoder",
-                    *encoder_chain,
-                    self.eq,
-                    self.limiter,
-                    audconv_enc,
-                    audres_enc,
-                    enc_caps,
-                    opusenc,
-                    rtppay,
-                    self.udpsink,
-                )
-            
-            if not self.is_listen_only:
-                if self.aec:
-                    self._link_many_or_raise("decoder", self.udpsrc, self.jitter, rtpdepay, opusdec, audconv2, audres2, caps2, playout_tee)
-                    self._link_tee_src_to("playout→sink", playout_tee, playout_q)
-                    self._link_tee_src_to("playout→render", playout_tee, render_q)
-                    self._link_many_or_raise("playout", playout_q, playout_conv, playout_res, playout_caps, sink)
-
-                    render_pad = self.aec.get_request_pad("render_sink")
-                    if render_pad:
-                        render_src = render_q.get_static_pad("src")
-                        self._pad_link_or_raise("render→aec", render_src, render_pad)
-                    else:
-                        self.logger.warning("AEC render pad not available")
-                else:
-                    self._link_many_or_raise("decoder", self.udpsrc, self.jitter, rtpdepay, opusdec, audconv2, audres2, caps2, playout_q, playout_conv, playout_res, playout_caps, sink)
-
-            self.bus = self.pipeline.get_bus()
-            self.bus.add_signal_watch()
-            self.bus.connect("message", self._on_bus_message)
-            
-            self.logger.info("Verifying VAD sink configuration...")
-            self.logger.info("  VAD sink emit-signals: %s", self.vad_sink.get_property("emit-signals"))
-            self.logger.info("  VAD sink sync: %s", self.vad_sink.get_property("sync"))
-            
-            vad_sink_pad = self.vad_sink.get_static_pad("sink")
-            if vad_sink_pad:
-                peer = vad_sink_pad.get_peer()
-                if peer:
-                    self.logger.info("  VAD sink is linked to: %s", peer.get_parent().get_name())
-                else:
-                    self.logger.error("  VAD sink has NO PEER - not linked!")
-            else:
-                self.logger.error("  VAD sink has no sink pad!")
+    def _play(self, local_port, remote_ip, remote_port):
+        self._attach_bus()
+        if self.udpsrc and self._media_epoch_ts is None:
+            self._media_epoch_ts = time.monotonic()
 
-            udpsink_pad = self.udpsink.get_static_pad("sink")
-            if udpsink_pad:
-                udpsink_pad.add_probe(Gst.PadProbeType.BUFFER, self._on_send_probe)
-            else:
-                self.logger.warning("Could not get udpsink pad for latency probe")
-
-            self.pipeline.set_state(Gst.State.PLAYING)
-            
-            # Wait for pipeline to reach PLAYING state and collect messages
-            ret = self.pipeline.get_state(timeout=5 * Gst.SECOND)
-            if ret[0] == Gst.StateChangeReturn.SUCCESS:
-                self.logger.info("Pipeline reached PLAYING state successfully")
-            elif ret[0] == Gst.StateChangeReturn.ASYNC:
-                self.logger.info("Pipeline state change is async (live pipeline)")
-            else:
-                self.logger.error("Pipeline failed to reach PLAYING state: %s", ret[0])
-                # Try to get error from bus
-                bus = self.pipeline.get_bus()
-                msg = bus.timed_pop_filtered(1 * Gst.SECOND, Gst.MessageType.ERROR | Gst.MessageType.WARNING)
-                if msg:
-                    if msg.type == Gst.MessageType.ERROR:
-                        err, debug = msg.parse_error()
-                        self.logger.error("Bus ERROR during startup: %s", err)
-                        self.logger.error("Debug: %s", debug)
-                    elif msg.type == Gst.MessageType.WARNING:
-                        warn, debug = msg.parse_warning()
-                        self.logger.warning("Bus WARNING during startup: %s", warn)
-            
-            # Verify VAD sink state
-            vad_sink_state = self.vad_sink.get_state(timeout=1 * Gst.SECOND)
-            self.logger.info("VAD sink state after pipeline start: %s -> %s", 
-                            vad_sink_state[1].value_nick, vad_sink_state[2].value_nick)
-            
-            self.clock = self.pipeline.get_clock()
-            self.base_time = self.pipeline.get_base_time()
+        self.pipeline.set_state(Gst.State.PLAYING)
 
-            if self.aec_auto_delay:
-                self._auto_update_aec_delay()
+        # Wait for pipeline to reach PLAYING state and collect messages
+        ret = self.pipeline.get_state(timeout=5 * Gst.SECOND)
+        if ret[0] == Gst.StateChangeReturn.SUCCESS:
+            self.logger.info("Pipeline reached PLAYING state successfully")
+        elif ret[0] == Gst.StateChangeReturn.ASYNC:
+            self.logger.info("Pipeline state change is async (live pipeline)")
+        else:
+            self.logger.error("Pipeline failed to reach PLAYING state: %s", ret[0])
+            # The bus dispatcher logs the full ERROR; repeat it here if it has already arrived.
+            if self.last_error:
+                self.logger.error("Bus ERROR during startup: %s", self.last_error)
 
-            self._log_sample_rate()
-            
-            # Export pipeline graph for debugging
-            Gst.debug_bin_to_dot_file(self.pipeline, Gst.DebugGraphDetails.ALL, "tchat_pipeline")
-            self.logger.info("Pipeline graph exported to GST_DEBUG_DUMP_DOT_DIR (if set)")
-            
-            self.vad.start()
-            self.logger.info("Pipeline started (local_port=%d, remote=%s:%s)", 
-                            local_port, remote_ip or "none", remote_port or "none")
-            self.logger.info("Audio devices: input=%s, output=%s", 
-                            input_device or "default", output_device or "default")
-        except Exception as exc:
-            self.logger.exception("Failed to start pipeline: %s", exc)
-            self.stop()
-            raise
+        # Verify VAD sink state
+        vad_sink_state = self.vad_sink.get_state(timeout=1 * Gst.SECOND)
+        self.logger.info("VAD sink state after pipeline start: %s -> %s", 
+                        vad_sink_state[1].value_nick, vad_sink_state[2].value_nick)
+
+        self.clock = self.pipeline.get_clock()
+        self.base_time = self.pipeline.get_base_time()
+
+        if self.aec_auto_delay:
+            self._auto_update_aec_delay()
+        self._sync_stages()
+        self._report_caps_plan()
+        self._attach_profiler()
+
+        self._log_sample_rate()
+
+        # Export pipeline graph for debugging
+        Gst.debug_bin_to_dot_file(self.pipeline, Gst.DebugGraphDetails.ALL, "tchat_pipeline")
+        self.logger.info("Pipeline graph exported to GST_DEBUG_DUMP_DOT_DIR (if set)")
+
+        self.vad.start()
+        self._start_recorders()
+        self.logger.info("Pipeline started (local_port=%d, remote=%s:%s)", 
+                        local_port, remote_ip or "none", remote_port or "none")
+        self.logger.info("Audio devices: input=%s, output=%s", 
+                        self.last_input_device or "default", self.last_output_device or "default")
 
     def prewarm(self):
         if self.disable_dfn_env:
@@ -808,65 +936,310 @@ class MediaEngine:
         except Exception as exc:
             self.logger.warning("DFN prewarm failed: %s", exc)
 
-    def stop(self):
+    def stop(self, refill=True):
         if not self.pipeline:
             return
+        self._stop_sampler()
         self.vad.stop()
-        
-        if self.bus:
-            self.bus.remove_signal_watch()
-            self.bus = None
-
-        self.pipeline.set_state(Gst.State.NULL)
-        with self.lock:
-            self.pipeline = None
-            self.queues = {}
-            self.queue_overruns = {}
-            self.vad_sink = None
-            self.vad_sample_count = 0
-            self.aec = None
-            self.dfn = None
-            self.limiter = None
-            self.eq = None
-            self.hpf = None
-            self.cng_mixer = None
-            self.cng_src = None
-            self.cng_volume = None
-            self.cng_valve = None
-            self.cng_conv = None
-            self.cng_res = None
-            self.cng_caps = None
-            self.opusenc = None
-            self.send_valve = None
-            self.aec_active = None
-            self.dfn_active = None
-            self.limiter_active = None
-            self.hpf_active = None
-            self.aec_erle_db = None
-            self.aec_erl_db = None
-            self.aec_delay_estimate_ms = None
-            self._vad_effective = False
-            self._vad_pending = None
-            self._vad_pending_since = None
-            self.eq_active = None
-            self.cng_active = None
-            self.udpsink = None
-            self.udpsrc = None
-            self.jitter = None
-            self.audio_src = None
-            self.audio_sink = None
+        self._detach_bus()
+        if self._jitter_trace:
+            self._jitter_trace.close()
+            self._jitter_trace = None
+
+        self.profiler.detach()
+        # Before NULL: the writers take what is queued and close their files while packets still flow.
+        self._stop_recorders()
+        # A stage job in flight finishes its splice first; the next one sees no pipeline.
+        with self._stage_lock:
+            self.pipeline.set_state(Gst.State.NULL)
+            with self.lock:
+                self._reset_pipeline_state()
+        self._handling_error = False
         self.metrics.clear_runtime()
+        if isinstance(self.last_output_device, backends.AudioBackend):
+            self.last_output_device.close()
         self.logger.info("Pipeline stopped")
+        if refill:
+            self.fill_standby(self.last_local_port, self.last_input_device, self.last_output_device)
+
+    def _reset_pipeline_state(self):
+        self.pipeline = None
+        self.queues = {}
+        self.queue_overruns = {}
+        self.vad_sink = None
+        self.vad_sample_count = 0
+        self.aec = None
+        self.dfn = None
+        self.limiter = None
+        self.eq = None
+        self.hpf = None
+        self.cng_mixer = None
+        self.cng_src = None
+        self.cng_volume = None
+        self.cng_valve = None
+        self.cng_conv = None
+        self.cng_res = None
+        self.cng_caps = None
+        self.opusenc = None
+        self.send_valve = None
+        self.recv_valve = None
+        self.aec_active = None
+        self.dfn_active = None
+        self.limiter_active = None
+        self.hpf_active = None
+        self.aec_erle_db = None
+        self.aec_erl_db = None
+        self.aec_delay_estimate_ms = None
+        self._vad_effective = False
+        self._vad_pending = None
+        self._vad_pending_since = None
+        self.eq_active = None
+        self.cng_active = None
+        self.udpsink = None
+        self.udpsrc = None
+        self.rtp_session = None
+        self.rtcp_src = None
+        self.rtcp_sink = None
+        self.jitter = None
+        self._media_epoch_ts = None
+        self.audio_src = None
+        self.audio_sink = None
+        self.tsm = None
+        self.tsm_src = None
+        self._tsm_pts = None
+        self._tsm_ring = None
+        self.conf_mixer = None
+        self.peers = {}
+        self._primary_client = None
+        self.record_sinks = {}
+        self.recorders = {}
+        self._record_stamp = None
+        self._stages = {}
+
+    def fill_standby(self, local_port, input_device=None, output_device=None):
+        """Pre-build a full-duplex pipeline in the background so the next call only has to go PLAYING."""
+        if not self.standby_pool or local_port is None or self._standby:
+            return
+        if backends.from_spec(input_device, "input") or backends.from_spec(output_device, "output"):
+            # Prerolling would consume file/NumPy input before the call starts.
+            return
+        thread = threading.Thread(
+            target=self._fill_standby_worker, args=(local_port, input_device, output_device), daemon=True
+        )
+        thread.start()
+
+    def release_standby(self):
+        with self._standby_lock:
+            with self.lock:
+                standby, self._standby = self._standby, None
+        if standby:
+            standby["pipeline"].set_state(Gst.State.NULL)
+            self.logger.info("Standby pipeline released")
+
+    def _fill_standby_worker(self, local_port, input_device, output_device):
+        with self._standby_lock:
+            if self.pipeline or self._standby:
+                return
+            start_ts = time.monotonic()
+            pipeline = Gst.Pipeline.new("tchat_standby")
+            try:
+                # Placeholder remote; the send valve stays closed until a call adopts it.
+                self._build(pipeline, local_port, "127.0.0.1", int(local_port), input_device, output_device, standby=True)
+                pipeline.set_state(self.standby_state)
+                ret = pipeline.get_state(timeout=5 * Gst.SECOND)
+                if ret[0] == Gst.StateChangeReturn.FAILURE:
+                    raise RuntimeError(f"standby pipeline failed to reach {self.standby_state.value_nick}")
+                # Move the built elements out in one step: setters see either none or all of them.
+                with self.lock:
+                    state = {name: getattr(self, name) for name in self._PIPELINE_STATE}
+                    self._reset_pipeline_state()
+                    self._standby = {
+                        "pipeline": pipeline,
+                        "devices": (input_device, output_device),
+                        "state": state,
+                    }
+                self.logger.info(
+                    "Standby pipeline ready in %.1f ms (%s, port %s)",
+                    (time.monotonic() - start_ts) * 1000.0,
+                    self.standby_state.value_nick,
+                    local_port,
+                )
+            except Exception as exc:
+                self.logger.warning("Standby pipeline build failed: %s", exc)
+                pipeline.set_state(Gst.State.NULL)
+                with self.lock:
+                    self._reset_pipeline_state()
+
+    def _take_standby(self, remote_ip, input_device, output_device):
+        """Hand over the standby pipeline if it fits this start; called with self.lock held."""
+        standby, self._standby = self._standby, None
+        if remote_ip is not None and standby["devices"] == (input_device, output_device):
+            return standby
+        # Listen-only or different devices: drop it so its udpsrc releases the port.
+        standby["pipeline"].set_state(Gst.State.NULL)
+        self.logger.info("Standby pipeline does not match this start; building from scratch")
+        return None
+
+    def _adopt_standby(self, standby, local_port, remote_ip, remote_port):
+        with self.lock:
+            for name, value in standby["state"].items():
+                setattr(self, name, value)
+            self.pipeline = standby["pipeline"]
+        # Settings changed since the standby was built; _play re-syncs the pruned stages.
+        self._apply_processing_options()
+        self.set_remote(remote_ip, remote_port)
+        if self.udpsrc and self.udpsrc.get_property("port") != int(local_port):
+            # udpsrc binds on NULL→READY; cycle only this element and let the pipeline bring it back up.
+            self.udpsrc.set_state(Gst.State.NULL)
+            self.udpsrc.set_property("port", int(local_port))
+            self.last_local_port = local_port
+        if self.rtcp_src and self.rtcp_src.get_property("port") != int(local_port) + self.rtcp_port_offset:
+            self.rtcp_src.set_state(Gst.State.NULL)
+            self.rtcp_src.set_property("port", int(local_port) + self.rtcp_port_offset)
+        self.set_send_enabled(True)
 
     def set_remote(self, ip, port):
-        if self.udpsink:
+        if self.udpsink and self._is_fanout(self.udpsink):
+            self._set_primary_client(ip, port)
+        elif self.udpsink:
             self._set_if_prop(self.udpsink, "host", ip)
             self._set_if_prop(self.udpsink, "port", int(port))
+        if self.rtcp_sink and ip is not None and port is not None:
+            self._set_if_prop(self.rtcp_sink, "host", ip)
+            self._set_if_prop(self.rtcp_sink, "port", int(port) + self.rtcp_port_offset)
+
+    def _is_fanout(self, sink):
+        factory = sink.get_factory()
+        return factory is not None and factory.get_name() == "multiudpsink"
+
+    def _set_primary_client(self, ip, port):
+        if ip is None or port is None:
+            return
+        client = (ip, int(port))
+        if client == self._primary_client:
+            return
+        if self._primary_client:
+            self.udpsink.emit("remove", *self._primary_client)
+        self.udpsink.emit("add", *client)
+        self._primary_client = client
+
+    def add_peer(self, peer_id, ip, port, local_port):
+        """Conference: send our RTP to one more peer too and mix its stream, received on local_port."""
+        if not self.pipeline or self.conf_mixer is None or not self.udpsink or not self._is_fanout(self.udpsink):
+            self.logger.warning("Cannot add conference peer %s: no conference pipeline running", peer_id)
+            return False
+        if peer_id in self.peers:
+            return True
+        start_ts = time.monotonic()
+        self._peer_seq += 1
+        elements = self._make_peer_elements(self._peer_seq, local_port)
+        try:
+            for element in elements:
+                self.pipeline.add(element)
+            self._link_many_or_raise(f"peer{self._peer_seq}", *elements)
+            mixer_pad = self._link_to_mixer(f"peer{self._peer_seq}→mix", elements[-1], self.conf_mixer)
+            for element in reversed(elements):
+                if not element.sync_state_with_parent():
+                    raise RuntimeError(f"Failed to sync state: {element.get_name()}")
+        except Exception as exc:
+            self.logger.warning("Adding conference peer %s failed: %s", peer_id, exc)
+            for element in elements:
+                element.set_state(Gst.State.NULL)
+                if element.get_parent():
+                    self.pipeline.remove(element)
+            return False
+        self.udpsink.emit("add", ip, int(port))
+        self.peers[peer_id] = {
+            "elements": elements,
+            "mixer_pad": mixer_pad,
+            "client": (ip, int(port)),
+            "local_port": int(local_port),
+        }
+        self.pipeline.recalculate_latency()
+        self.logger.info("Conference peer %s added in %.1f ms (send %s:%s, receive %s)",
+                         peer_id, (time.monotonic() - start_ts) * 1000.0, ip, port, local_port)
+        self._publish_conference()
+        return True
+
+    def remove_peer(self, peer_id):
+        peer = self.peers.pop(peer_id, None)
+        if not peer or not self.pipeline:
+            return
+        if self.udpsink and peer["client"] != self._primary_client:
+            self.udpsink.emit("remove", *peer["client"])
+        # Stop the branch from the socket down, then hand the mixer pad back: nothing is pushing any more.
+        for element in peer["elements"]:
+            element.set_state(Gst.State.NULL)
+        peer["elements"][-1].get_static_pad("src").unlink(peer["mixer_pad"])
+        self.conf_mixer.release_request_pad(peer["mixer_pad"])
+        for element in peer["elements"]:
+            self.pipeline.remove(element)
+        self.logger.info("Conference peer %s removed", peer_id)
+        self._publish_conference()
+
+    def _publish_conference(self):
+        self.metrics.update_conference({
+            "primary": f"{self._primary_client[0]}:{self._primary_client[1]}" if self._primary_client else None,
+            "peers": [
+                {"id": peer_id, "send": f"{peer['client'][0]}:{peer['client'][1]}", "local_port": peer["local_port"]}
+                for peer_id, peer in self.peers.items()
+            ],
+        })
+
+    def set_network_rtt(self, rtt_ms, rtt_var_ms=None):
+        """Record the signaling RTT estimate and reseed the jitter buffer before adaptation kicks in."""
+        self.network_rtt_ms = float(rtt_ms) if rtt_ms is not None else None
+        self.network_rtt_var_ms = float(rtt_var_ms) if rtt_var_ms is not None else None
+        if not self.jitter or self._last_jitter_adjust_ts:
+            return
+        seed = self._seed_jitter_latency_ms()
+        if seed == self.jitter_latency_ms:
+            return
+        self.logger.info("Seeding jitter latency %d ms from RTT %.1f ms (var %.1f ms)",
+                         seed, self.network_rtt_ms or 0.0, self.network_rtt_var_ms or 0.0)
+        self.jitter_latency_ms = seed
+        self.jitter.set_property("latency", self.jitter_latency_ms)
+        if self.aec_auto_delay:
+            self._auto_update_aec_delay()
+
+    def start_early_media(self, call_id, ip, port):
+        """Start sending/receiving for a call that signaling has not confirmed yet."""
+        if not self.pipeline:
+            return
+        self.logger.info("Early media for call %s -> %s:%s", call_id, ip, port)
+        self._media_epoch_ts = time.monotonic()
+        if self.is_listen_only:
+            self.restart_with_remote(ip, port)
+        else:
+            self.set_remote(ip, port)
+        self.media_call_id = call_id
+        self.set_recv_enabled(True)
+        self.set_send_enabled(True)
+
+    def confirm_media(self, call_id):
+        if call_id:
+            self.media_call_id = call_id
+        self.set_recv_enabled(True)
+
+    def cancel_early_media(self, call_id):
+        if not call_id or call_id != self.media_call_id:
+            return
+        self.logger.info("Cancelling early media for call %s", call_id)
+        self.media_call_id = None
+        self.set_send_enabled(False)
+        self.set_recv_enabled(False)
+
+    def set_recv_enabled(self, enabled):
+        if self.recv_valve and self.recv_valve.find_property("drop"):
+            self.recv_valve.set_property("drop", not bool(enabled))
 
     def set_send_enabled(self, enabled):
-        self.send_enabled = bool(enabled)
-        if self.send_valve and self.send_valve.find_property("drop"):
-            self.send_valve.set_property("drop", not self.send_enabled)
+        with self.lock:
+            self.send_enabled = bool(enabled)
+            # While idle, send_valve may belong to a standby being built; it stays closed.
+            valve = self.send_valve if self.pipeline else None
+        if valve and valve.find_property("drop"):
+            valve.set_property("drop", not self.send_enabled)
 
     def restart_with_remote(self, ip, port):
         if not self.pipeline:
@@ -874,14 +1247,328 @@ class MediaEngine:
         if not self.is_listen_only:
             self.set_remote(ip, port)
             return
+        if self.hot_duplex:
+            try:
+                self._attach_downlink(ip, port)
+                return
+            except Exception as exc:
+                self.logger.warning("Hot duplex transition failed (%s); rebuilding pipeline", exc)
         self.logger.info("Restarting pipeline with remote %s:%s", ip, port)
         local_port = self.last_local_port
         input_id = self.last_input_device
         output_id = self.last_output_device
-        self.stop()
+        media_epoch = self._media_epoch_ts
+        start_ts = time.monotonic()
+        self.stop(refill=False)
+        self._media_epoch_ts = media_epoch
         if local_port is None:
             return
         self.start(local_port, ip, port, input_id, output_id)
+        elapsed_ms = (time.monotonic() - start_ts) * 1000.0
+        self.logger.info("Listen-only → full-duplex in %.1f ms (rebuild)", elapsed_ms)
+        self.metrics.update_duplex_transition(elapsed_ms, "rebuild")
+
+    def _attach_downlink(self, ip, port):
+        """Grow a running listen-only pipeline into full duplex; capture, AEC and DFN keep running."""
+        if self.last_local_port is None:
+            raise RuntimeError("no local RTP port")
+        start_ts = time.monotonic()
+        self.logger.info("Attaching downlink for remote %s:%s", ip, port)
+        downlink = self._make_downlink_elements(self.last_local_port, self.last_output_device, ip, port)
+        for name, element in downlink.items():
+            if element is None:
+                raise RuntimeError(f"Failed to create GStreamer element: {name}")
+            self.pipeline.add(element)
+        self._link_downlink(downlink)
+        # Bring sinks up before sources so nothing pushes into a NULL peer.
+        for element in reversed(list(downlink.values())):
+            if not element.sync_state_with_parent():
+                raise RuntimeError(f"Failed to sync state: {element.get_name()}")
+        self._swap_rtp_sink(ip, port)
+
+        self.is_listen_only = False
+        self._start_recorders()
+        self._sync_stages()
+        self._report_caps_plan()
+        self._attach_profiler()
+        if self._media_epoch_ts is None:
+            self._media_epoch_ts = time.monotonic()
+        self._add_downlink_probes()
+        self.pipeline.recalculate_latency()
+        if self.aec_auto_delay:
+            self._auto_update_aec_delay()
+        elapsed_ms = (time.monotonic() - start_ts) * 1000.0
+        self.logger.info("Listen-only → full-duplex in %.1f ms (no rebuild)", elapsed_ms)
+        self.metrics.update_duplex_transition(elapsed_ms, "hot")
+
+    def _swap_rtp_sink(self, ip, port):
+        """Replace the listen-only fakesink with a udpsink while rtppay is idle."""
+        rtppay = self.pipeline.get_by_name("rtppay")
+        src_pad = rtppay.get_static_pad("src") if rtppay else None
+        if src_pad is None:
+            raise RuntimeError("rtppay src pad not found")
+        old_sink = self.udpsink
+        done = threading.Event()
+        errors = []
+
+        def _on_idle(pad, _info):
+            try:
+                peer = pad.get_peer()
+                if peer:
+                    pad.unlink(peer)
+                old_sink.set_state(Gst.State.NULL)
+                self.pipeline.remove(old_sink)
+                new_sink = self._make_rtp_sink(ip, port)
+                self.pipeline.add(new_sink)
+                self._link_rtp_out(pad.get_parent_element(), new_sink)
+                new_sink.sync_state_with_parent()
+                new_sink.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, self._on_send_probe)
+                self.udpsink = new_sink
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                done.set()
+            return Gst.PadProbeReturn.REMOVE
+
+        # IDLE fires immediately when no buffer is in flight, otherwise between two buffers.
+        src_pad.add_probe(Gst.PadProbeType.IDLE, _on_idle)
+        if not done.wait(2.0):
+            raise RuntimeError("timed out waiting for rtppay to go idle")
+        if errors:
+            raise errors[0]
+
+    def set_profiling(self, enabled):
+        """Start or stop per-element timing on the running pipeline; off means no probes at all."""
+        self.profiling = bool(enabled)
+        if self.profiling:
+            self.profiler.reset()
+            self._attach_profiler()
+        else:
+            self.profiler.detach()
+            self.metrics.update_element_timing({})
+
+    def _attach_profiler(self):
+        if not self.profiling or not self.pipeline:
+            return
+        elements = {"hpf": self.hpf, "aec": self.aec, "dfn": self.dfn, "eq": self.eq, "limiter": self.limiter, "opusenc": self.opusenc}
+        for name in ("rtppay", "rtpdepay", "opusdec"):
+            elements[name] = self.pipeline.get_by_name(name)
+        queues = dict(self.queues)
+        # Parked stages keep their queues out of self.queues; probe them too so re-insertion is covered.
+        for stage in self._stages.values():
+            for element in stage["elements"]:
+                if element.get_factory().get_name() == "queue":
+                    queues.setdefault(element.get_name(), element)
+        self.profiler.attach(elements, "element")
+        self.profiler.attach(queues, "queue")
+
+    def _register_stages(self, dfn_chain, cng_voice_pad, cng_noise_pad):
+        """Record the optional uplink stages so they can be spliced out of the running graph."""
+        self._stages = {}
+
+        def add(name, elements, entry_pad, exit_pad, sources=()):
+            self._stages[name] = {
+                "elements": elements,
+                "entry": entry_pad,
+                "exit": exit_pad,
+                "sources": sources,
+                "parked": None,
+            }
+
+        add("hpf", [self.hpf], self.hpf.get_static_pad("sink"), self.hpf.get_static_pad("src"))
+        add("dfn", dfn_chain, dfn_chain[0].get_static_pad("sink"), dfn_chain[-1].get_static_pad("src"))
+        add("eq", [self.eq], self.eq.get_static_pad("sink"), self.eq.get_static_pad("src"))
+        if self.cng_mixer and cng_voice_pad and cng_noise_pad:
+            noise = [self.cng_src, self.cng_conv, self.cng_res, self.cng_caps, self.cng_volume, self.cng_valve]
+            add("cng", [self.cng_mixer, *noise], cng_voice_pad, self.cng_mixer.get_static_pad("src"), sources=(self.cng_src,))
+
+    def _stage_wanted(self, name):
+        if name == "hpf":
+            return bool(self.hpf_enabled and self.hpf_active)
+        if name == "dfn":
+            return bool(self.dfn_enabled and self.dfn_active)
+        if name == "eq":
+            return bool(self.eq_enabled and self.eq_active)
+        if name == "cng":
+            return bool(self.cng_enabled and not self.is_listen_only)
+        return True
+
+    def _sync_stages(self):
+        """Splice disabled stages out of the running graph and put re-enabled ones back.
+
+        The work runs on its own thread so the caller (usually the UI) never waits for the graph.
+        """
+        if not self.pipeline or not self.prune_stages or not self._stages:
+            return
+        threading.Thread(target=self._sync_stages_job, args=(self.pipeline,), name="tchat-stages", daemon=True).start()
+
+    def _sync_stages_job(self, pipeline):
+        # Each job re-reads the wanted state, so back-to-back toggles settle on the last one.
+        with self._stage_lock:
+            if self.pipeline is not pipeline:
+                return
+            for name, stage in self._stages.items():
+                wanted = self._stage_wanted(name)
+                try:
+                    if not wanted and stage["parked"] is None:
+                        self._splice_out(pipeline, name, stage)
+                    elif wanted and stage["parked"] is not None:
+                        self._splice_in(pipeline, name, stage)
+                except Exception as exc:
+                    self.logger.warning("Stage %s %s failed: %s", name, "removal" if not wanted else "insertion", exc)
+
+    def _run_when_idle(self, pad, callback, timeout=1.0):
+        """Run callback() from an IDLE probe on pad, between two buffers, and wait for it to finish."""
+        done = threading.Event()
+        guard = threading.Lock()
+        state = {"cancelled": False, "error": None}
+
+        def _on_idle(_pad, _info):
+            with guard:
+                if not state["cancelled"]:
+                    try:
+                        callback()
+                    except Exception as exc:
+                        state["error"] = exc
+                    done.set()
+            return Gst.PadProbeReturn.REMOVE
+
+        probe_id = pad.add_probe(Gst.PadProbeType.IDLE, _on_idle)
+        if not done.wait(timeout):
+            with guard:
+                state["cancelled"] = not done.is_set()
+            if state["cancelled"]:
+                if probe_id:
+                    pad.remove_probe(probe_id)
+                raise RuntimeError(f"pad {pad.get_parent_element().get_name()}:{pad.get_name()} never went idle")
+        if state["error"] is not None:
+            raise state["error"]
+
+    def _drain_queues(self, queues, timeout=0.5):
+        """Wait until each queue, in stream order, is empty and done pushing; False on timeout."""
+        deadline = time.monotonic() + timeout
+        for queue in queues:
+            while queue.get_property("current-level-buffers") > 0:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.002)
+            # Idle after empty: its last buffer has left the elements between it and the next queue.
+            try:
+                self._run_when_idle(queue.get_static_pad("src"), lambda: None, timeout=max(0.01, deadline - time.monotonic()))
+            except RuntimeError:
+                return False
+        return True
+
+    def _splice_out(self, pipeline, name, stage):
+        entry, exit_pad = stage["entry"], stage["exit"]
+        up_pad = entry.get_peer()
+        down_pad = exit_pad.get_peer()
+        if up_pad is None or down_pad is None:
+            raise RuntimeError("stage is not linked")
+        members = set(stage["elements"])
+        links = []
+        for element in stage["elements"]:
+            for pad in element.srcpads:
+                peer = pad.get_peer()
+                if peer is not None and peer.get_parent_element() in members:
+                    links.append((pad, peer))
+
+        def _drop(_pad, _info):
+            return Gst.PadProbeReturn.DROP
+
+        drop_probe = []
+
+        def _bypass():
+            # Anything the stage still emits goes into a drop probe, not an unlinked pad, until it is shut down.
+            drop_probe.append(exit_pad.add_probe(Gst.PadProbeType.BUFFER | Gst.PadProbeType.BUFFER_LIST, _drop))
+            up_pad.unlink(entry)
+            exit_pad.unlink(down_pad)
+            self._pad_link_or_raise(f"bypass {name}", up_pad, down_pad)
+
+        start_ts = time.monotonic()
+        queues = [element for element in stage["elements"] if element.get_factory().get_name() == "queue"]
+        if not queues:
+            # Nothing queued: the stage runs on the upstream thread, so an idle upstream pad means it is empty.
+            self._run_when_idle(up_pad, _bypass)
+        else:
+            held = threading.Event()
+
+            def _on_blocked(_pad, _info):
+                held.set()
+                return Gst.PadProbeReturn.OK
+
+            # Hold new audio at the entry while the queues empty into the next element; the held
+            # buffer follows the bypass once the probe goes.
+            block_probe = up_pad.add_probe(Gst.PadProbeType.BLOCK_DOWNSTREAM, _on_blocked)
+            try:
+                if not held.wait(0.5) or not self._drain_queues(queues, timeout=0.5):
+                    self.logger.warning("Stage %s did not drain in time; queued audio dropped", name)
+                self._run_when_idle(exit_pad, _bypass)
+            finally:
+                up_pad.remove_probe(block_probe)
+        for element in stage["elements"]:
+            element.set_state(Gst.State.NULL)
+            pipeline.remove(element)
+            with self.lock:
+                self.queues.pop(element.get_name(), None)
+        for probe_id in drop_probe:
+            exit_pad.remove_probe(probe_id)
+        stage["parked"] = {"up": up_pad, "links": links}
+        self.logger.info("Stage %s removed from graph in %.1f ms", name, (time.monotonic() - start_ts) * 1000.0)
+
+    def _live_up_pad(self, pipeline, pad):
+        """Follow parked neighbours back to an upstream pad that is still in the graph."""
+        for _ in range(len(self._stages) + 1):
+            element = pad.get_parent_element()
+            if element is not None and element.get_parent() == pipeline:
+                return pad
+            owner = next(
+                (s for s in self._stages.values() if s["parked"] is not None and element in s["elements"]),
+                None,
+            )
+            if owner is None:
+                break
+            pad = owner["parked"]["up"]
+        raise RuntimeError("no upstream pad left in the graph")
+
+    def _splice_in(self, pipeline, name, stage):
+        parked = stage["parked"]
+        up_pad = self._live_up_pad(pipeline, parked["up"])
+        start_ts = time.monotonic()
+        for element in stage["elements"]:
+            pipeline.add(element)
+        for src_pad, sink_pad in parked["links"]:
+            self._pad_link_or_raise(f"{name} internal", src_pad, sink_pad)
+        sources = set(stage["sources"])
+        # Bring processing elements up (model load etc.) before touching the live path.
+        for element in reversed(stage["elements"]):
+            if element not in sources:
+                element.sync_state_with_parent()
+
+        def _insert():
+            # Right after the upstream pad, whatever it feeds now (neighbouring stages may be parked).
+            down_pad = up_pad.get_peer()
+            if down_pad is None:
+                raise RuntimeError("upstream pad is not linked")
+            up_pad.unlink(down_pad)
+            self._pad_link_or_raise(f"{name} exit", stage["exit"], down_pad)
+            self._pad_link_or_raise(f"{name} entry", up_pad, stage["entry"])
+
+        try:
+            self._run_when_idle(up_pad, _insert)
+        except Exception:
+            for element in stage["elements"]:
+                element.set_state(Gst.State.NULL)
+                pipeline.remove(element)
+            raise
+        for src in sources:
+            src.sync_state_with_parent()
+        with self.lock:
+            for element in stage["elements"]:
+                if element.get_factory().get_name() == "queue":
+                    self.queues[element.get_name()] = element
+        stage["parked"] = None
+        self.logger.info("Stage %s re-inserted in %.1f ms", name, (time.monotonic() - start_ts) * 1000.0)
 
     def set_processing_options(
         self,
@@ -915,105 +1602,118 @@ class MediaEngine:
         opus_fec=None,
         opus_dtx=None,
         opus_packet_loss=None,
+        loss_adaptive=None,
     ):
-        if aec_enabled is not None and not self.disable_aec_env:
-            self.aec_enabled = bool(aec_enabled)
-        if agc_enabled is not None and not self.disable_agc_env:
-            self.agc_enabled = bool(agc_enabled)
-        if agc_input_volume is not None:
-            self.agc_input_volume = bool(agc_input_volume)
-        if agc_headroom_db is not None:
-            self.agc_headroom_db = float(agc_headroom_db)
-        if agc_max_gain_db is not None:
-            self.agc_max_gain_db = float(agc_max_gain_db)
-        if agc_initial_gain_db is not None:
-            self.agc_initial_gain_db = float(agc_initial_gain_db)
-        if agc_max_noise_dbfs is not None:
-            self.agc_max_noise_dbfs = float(agc_max_noise_dbfs)
-        if hpf_enabled is not None:
-            self.hpf_enabled = bool(hpf_enabled)
-        if hpf_cutoff_hz is not None:
-            try:
-                self.hpf_cutoff_hz = int(hpf_cutoff_hz)
-            except (TypeError, ValueError):
-                pass
-        if dfn_enabled is not None and not self.disable_dfn_env:
-            self.dfn_enabled = bool(dfn_enabled)
-        if dfn_vad_link is not None:
-            self.dfn_vad_link = bool(dfn_vad_link)
-        if dfn_mix_speech is not None:
-            try:
-                self.dfn_mix_speech = float(dfn_mix_speech)
-            except (TypeError, ValueError):
-                pass
-        if dfn_mix_silence is not None:
-            try:
-                self.dfn_mix_silence = float(dfn_mix_silence)
-            except (TypeError, ValueError):
-                pass
-        if aec_auto_delay is not None:
-            self.aec_auto_delay = bool(aec_auto_delay)
-        if aec_delay_ms is not None:
-            if not self.aec_auto_delay:
+        # Under the lock: a pipeline build re-reads these (with the TCHAT_* overrides) at the same time.
+        with self.lock:
+            if aec_enabled is not None and not self.disable_aec_env:
+                self.aec_enabled = bool(aec_enabled)
+            if agc_enabled is not None and not self.disable_agc_env:
+                self.agc_enabled = bool(agc_enabled)
+            if agc_input_volume is not None:
+                self.agc_input_volume = bool(agc_input_volume)
+            if agc_headroom_db is not None:
+                self.agc_headroom_db = float(agc_headroom_db)
+            if agc_max_gain_db is not None:
+                self.agc_max_gain_db = float(agc_max_gain_db)
+            if agc_initial_gain_db is not None:
+                self.agc_initial_gain_db = float(agc_initial_gain_db)
+            if agc_max_noise_dbfs is not None:
+                self.agc_max_noise_dbfs = float(agc_max_noise_dbfs)
+            if hpf_enabled is not None:
+                self.hpf_enabled = bool(hpf_enabled)
+            if hpf_cutoff_hz is not None:
                 try:
-                    self.aec_delay_ms = int(aec_delay_ms)
+                    self.hpf_cutoff_hz = int(hpf_cutoff_hz)
                 except (TypeError, ValueError):
                     pass
-        if dfn_mix is not None:
-            try:
-                self.dfn_mix = float(dfn_mix)
-            except (TypeError, ValueError):
-                pass
-        if dfn_post_filter is not None:
-            try:
-                self.dfn_post_filter = float(dfn_post_filter)
-            except (TypeError, ValueError):
-                pass
-        if eq_enabled is not None:
-            self.eq_enabled = bool(eq_enabled)
-        if eq_low_gain_db is not None:
-            self.eq_low_gain_db = float(eq_low_gain_db)
-        if eq_mid_gain_db is not None:
-            self.eq_mid_gain_db = float(eq_mid_gain_db)
-        if eq_high_gain_db is not None:
-            self.eq_high_gain_db = float(eq_high_gain_db)
-        if cng_enabled is not None:
-            self.cng_enabled = bool(cng_enabled)
-        if cng_level_db is not None:
-            try:
-                self.cng_level_db = float(cng_level_db)
-            except (TypeError, ValueError):
-                pass
-        if limiter_threshold_db is not None:
-            try:
-                self.limiter_threshold_db = float(limiter_threshold_db)
-            except (TypeError, ValueError):
-                pass
-        if limiter_attack_ms is not None:
-            try:
-                self.limiter_attack_ms = float(limiter_attack_ms)
-            except (TypeError, ValueError):
-                pass
-        if limiter_release_ms is not None:
-            try:
-                self.limiter_release_ms = float(limiter_release_ms)
-            except (TypeError, ValueError):
-                pass
-        if opus_bitrate is not None:
-            try:
-                self.opus_bitrate = int(opus_bitrate)
-            except (TypeError, ValueError):
-                pass
-        if opus_fec is not None:
-            self.opus_fec = bool(opus_fec)
-        if opus_dtx is not None:
-            self.opus_dtx = bool(opus_dtx)
-        if opus_packet_loss is not None:
-            try:
-                self.opus_packet_loss = int(opus_packet_loss)
-            except (TypeError, ValueError):
-                pass
+            if dfn_enabled is not None and not self.disable_dfn_env:
+                self.dfn_enabled = bool(dfn_enabled)
+            if dfn_vad_link is not None:
+                self.dfn_vad_link = bool(dfn_vad_link)
+            if dfn_mix_speech is not None:
+                try:
+                    self.dfn_mix_speech = float(dfn_mix_speech)
+                except (TypeError, ValueError):
+                    pass
+            if dfn_mix_silence is not None:
+                try:
+                    self.dfn_mix_silence = float(dfn_mix_silence)
+                except (TypeError, ValueError):
+                    pass
+            if aec_auto_delay is not None:
+                self.aec_auto_delay = bool(aec_auto_delay)
+            if aec_delay_ms is not None:
+                if not self.aec_auto_delay:
+                    try:
+                        self.aec_delay_ms = int(aec_delay_ms)
+                    except (TypeError, ValueError):
+                        pass
+            if dfn_mix is not None:
+                try:
+                    self.dfn_mix = float(dfn_mix)
+                except (TypeError, ValueError):
+                    pass
+            if dfn_post_filter is not None:
+                try:
+                    self.dfn_post_filter = float(dfn_post_filter)
+                except (TypeError, ValueError):
+                    pass
+            if eq_enabled is not None:
+                self.eq_enabled = bool(eq_enabled)
+            if eq_low_gain_db is not None:
+                self.eq_low_gain_db = float(eq_low_gain_db)
+            if eq_mid_gain_db is not None:
+                self.eq_mid_gain_db = float(eq_mid_gain_db)
+            if eq_high_gain_db is not None:
+                self.eq_high_gain_db = float(eq_high_gain_db)
+            if cng_enabled is not None:
+                self.cng_enabled = bool(cng_enabled)
+            if cng_level_db is not None:
+                try:
+                    self.cng_level_db = float(cng_level_db)
+                except (TypeError, ValueError):
+                    pass
+            if limiter_threshold_db is not None:
+                try:
+                    self.limiter_threshold_db = float(limiter_threshold_db)
+                except (TypeError, ValueError):
+                    pass
+            if limiter_attack_ms is not None:
+                try:
+                    self.limiter_attack_ms = float(limiter_attack_ms)
+                except (TypeError, ValueError):
+                    pass
+            if limiter_release_ms is not None:
+                try:
+                    self.limiter_release_ms = float(limiter_release_ms)
+                except (TypeError, ValueError):
+                    pass
+            if opus_bitrate is not None:
+                try:
+                    self.opus_bitrate = int(opus_bitrate)
+                except (TypeError, ValueError):
+                    pass
+            if opus_fec is not None:
+                self.opus_fec = bool(opus_fec)
+            if opus_dtx is not None:
+                self.opus_dtx = bool(opus_dtx)
+            if opus_packet_loss is not None:
+                try:
+                    self.opus_packet_loss = int(opus_packet_loss)
+                except (TypeError, ValueError):
+                    pass
+            if loss_adaptive is not None:
+                self.loss_adaptive = bool(loss_adaptive)
+            live = self.pipeline is not None
+        if not live:
+            # Nothing live to update; a standby pipeline gets these when a call adopts it.
+            return
+        self._apply_processing_options()
+        self._sync_stages()
 
+    def _apply_processing_options(self):
+        """Push the current processing settings to the live elements."""
         if self.aec and self.aec.find_property("bypass"):
             self.aec.set_property("bypass", not self.aec_enabled)
         if self.aec and self.aec.find_property("agc"):
@@ -1052,10 +1752,8 @@ class MediaEngine:
             gain = self.eq_high_gain_db if self.eq_enabled else 0.0
             self.eq.set_property("band2", float(gain))
         if self.opusenc:
-            self._set_if_prop(self.opusenc, "bitrate", int(self.opus_bitrate))
-            self._set_if_prop(self.opusenc, "inband-fec", bool(self.opus_fec))
-            self._set_if_prop(self.opusenc, "dtx", bool(self.opus_dtx))
-            self._set_if_prop(self.opusenc, "packet-loss-percentage", int(self.opus_packet_loss))
+            self._set_if_prop(self.opusenc, "dtx", self._opus_dtx_active())
+            self._apply_opus_loss_settings(self.opusenc)
         if self.hpf and self.hpf.find_property("cutoff"):
             cutoff = float(self.hpf_cutoff_hz if self.hpf_enabled else 20.0)
             self._set_if_prop(self.hpf, "cutoff", cutoff)
@@ -1064,8 +1762,49 @@ class MediaEngine:
             self._set_if_prop(self.limiter, "attack", float(self.limiter_attack_ms))
             self._set_if_prop(self.limiter, "release", float(self.limiter_release_ms))
 
+    @property
+    def sampling(self):
+        """True while the sampler thread owns metrics polling."""
+        return self._sampler is not None
+
+    def _start_sampler(self):
+        if self._sampler or not self.metrics_interval_ms:
+            return
+        self._sampler_stop.clear()
+        self._sampler = threading.Thread(target=self._sampler_worker, name="tchat-metrics", daemon=True)
+        self._sampler.start()
+
+    def _stop_sampler(self):
+        sampler, self._sampler = self._sampler, None
+        if not sampler:
+            return
+        self._sampler_stop.set()
+        # An owner callback fired from poll_metrics (on_receiver_report) could stop us from here.
+        if sampler is not threading.current_thread():
+            sampler.join(timeout=2.0)
+
+    def _sampler_worker(self):
+        while True:
+            interval_ms = self.metrics_listen_interval_ms if self.is_listen_only else self.metrics_interval_ms
+            if self._sampler_stop.wait(max(1, interval_ms or self.metrics_interval_ms) / 1000.0):
+                return
+            try:
+                self.poll_metrics()
+            except Exception as exc:
+                self.logger.warning("Metrics sampling failed: %s", exc)
+
     def poll_metrics(self):
-        self._drain_bus_messages()
+        if not self.pipeline:
+            return
+        # The sampler and a caller's timer may overlap; one pass at a time is enough.
+        if not self._poll_lock.acquire(blocking=False):
+            return
+        try:
+            self._poll_metrics()
+        finally:
+            self._poll_lock.release()
+
+    def _poll_metrics(self):
         with self.lock:
             queues = list(self.queues.items())
             jitter = self.jitter
@@ -1076,6 +1815,8 @@ class MediaEngine:
             except Exception:
                 continue
         self._update_mic_send_fallback()
+        self._update_network_seed()
+        self._update_rtp_tx()
         if jitter:
             try:
                 stats = jitter.get_property("stats")
@@ -1083,20 +1824,235 @@ class MediaEngine:
                 if metric is not None:
                     value, kind = metric
                     self.metrics.update_jitter_depth(value, kind)
-                    self._adapt_jitter(value, kind)
+                    if self.jitter_estimator == "ewma":
+                        self._adapt_jitter(value, kind)
+                if stats:
+                    self._report_loss(stats)
             except Exception:
                 pass
+        if jitter and self.jitter_estimator == "percentile":
+            self._adapt_jitter_percentile()
         self._update_vad_driven_processing()
+        self._update_latency_breakdown()
+        self.metrics.update_bus_latency(self._bus_latency_summary())
+        if self.tsm:
+            self.metrics.update_tsm(self._tsm_summary())
+        if self.rtp_session:
+            self._update_rtcp_stats()
+        if self.recorders:
+            self._publish_recording()
+        if self.profiling:
+            self.metrics.update_element_timing(self.profiler.snapshot())
+
+    def opus_settings(self):
+        """Bitrate, FEC and expected loss the encoder runs with: configured values, adapted to
+        the peer's loss reports when loss_adaptive is on."""
+        if not self.loss_adaptive:
+            return int(self.opus_bitrate), bool(self.opus_fec), int(self.opus_packet_loss)
+        return self.loss_adapter.settings(self.opus_bitrate, self.opus_fec, self.opus_packet_loss)
+
+    def _apply_opus_loss_settings(self, opusenc):
+        bitrate, fec, packet_loss = self.opus_settings()
+        if self._dtx_silent:
+            bitrate = min(bitrate, self.vad_dtx_bitrate)
+        self._set_if_prop(opusenc, "bitrate", bitrate)
+        self._set_if_prop(opusenc, "inband-fec", fec)
+        self._set_if_prop(opusenc, "packet-loss-percentage", packet_loss)
+        self.metrics.update_loss_feedback("opus", {"bitrate": bitrate, "fec": fec, "packet_loss": packet_loss})
+
+    def apply_receiver_report(self, report):
+        """Loss report from the far end about our stream; called from the signaling thread."""
+        self.metrics.update_loss_feedback("remote", report)
+        if not self.loss_adaptive or not self.loss_adapter.update(report):
+            return
+        bitrate, fec, packet_loss = self.opus_settings()
+        self.logger.info(
+            "Peer loss %.1f%%: Opus bitrate %d, FEC %s, expected loss %d%%",
+            self.loss_adapter.loss_pct, bitrate, "on" if fec else "off", packet_loss,
+        )
+        with self.lock:
+            opusenc = self.opusenc
+        if opusenc:
+            self._apply_opus_loss_settings(opusenc)
+        self._update_ptime_preference()
+
+    def preferred_ptime_ms(self):
+        """Packet time to offer: the profile's, raised while the peer reports congestion."""
+        ptime = self.opus_frame_ms_default
+        if self.ptime_auto and self.loss_adaptive and self.loss_adapter.bitrate_scale < 1.0:
+            # Fewer, larger packets: a 40 ms frame halves the header overhead of 20 ms.
+            ptime = max(ptime, self.ptime_congested_ms)
+        return ptime
+
+    def _update_ptime_preference(self):
+        ptime = self.preferred_ptime_ms()
+        if ptime == self._ptime_preference:
+            return
+        self._ptime_preference = ptime
+        if self.on_ptime_preference:
+            self.on_ptime_preference(ptime)
+        else:
+            self.set_ptime(ptime)
 
-    def _drain_bus_messages(self):
-        if not self.bus:
+    def set_ptime(self, ptime_ms):
+        """Apply the packet time agreed with the peer; None falls back to our own preference.
+
+        rtpopuspay sends one encoder frame per packet, so the Opus frame size is the packet time.
+        """
+        ptime = ptime_ms if ptime_ms in profiles.OPUS_FRAME_SIZES else self.preferred_ptime_ms()
+        with self.lock:
+            changed = ptime != self.opus_frame_ms
+            self.opus_frame_ms = ptime
+            opusenc = self.opusenc
+            jitter = self.jitter
+        self.metrics.update_ptime({"ptime_ms": ptime, "preferred_ms": self._ptime_preference, "negotiated": ptime_ms is not None})
+        if not changed:
+            return
+        self.logger.info("Packet time %d ms", ptime)
+        if opusenc:
+            self._set_if_prop(opusenc, "frame-size", ptime)
+        floor = self._jitter_floor_ms()
+        self.delay_estimator.min_ms = floor
+        if jitter and self.jitter_latency_ms < floor:
+            self.jitter_latency_ms = floor
+            jitter.set_property("latency", floor)
+
+    def _update_rtp_tx(self):
+        """Packets and wire bitrate (IPv4 + UDP headers included) sent over the last second or so."""
+        now = time.monotonic()
+        packets, size = self._tx_packets, self._tx_bytes
+        if self._tx_window is None:
+            self._tx_window = (now, packets, size)
+            return
+        start, start_packets, start_size = self._tx_window
+        elapsed = now - start
+        if elapsed < 1.0:
+            return
+        self._tx_window = (now, packets, size)
+        sent = packets - start_packets
+        self.metrics.update_rtp_tx({
+            "packets": packets,
+            "bytes": size,
+            "pps": round(sent / elapsed, 1),
+            "kbps": round((size - start_size + 28 * sent) * 8.0 / elapsed / 1000.0, 1),
+        })
+
+    def _jitter_floor_ms(self):
+        """jitter_min_ms, but never below one packet: the next packet cannot arrive any sooner."""
+        return min(self.jitter_max_ms, max(self.jitter_min_ms, self.opus_frame_ms))
+
+    def _report_loss(self, stats):
+        now = time.monotonic()
+        if (now - self._loss_report_ts) * 1000.0 < self.loss_report_interval_ms:
+            return
+        self._loss_report_ts = now
+        counters = {stat: stats.get_value(stat) for stat, _key in LossCounter.FIELDS if stats.has_field(stat)}
+        report = self.loss_counter.update(counters, now)
+        if report is None:
+            return
+        self.metrics.update_loss_feedback("local", report)
+        if self.on_receiver_report:
+            self.on_receiver_report(report)
+
+    def _update_rtcp_stats(self):
+        now = time.monotonic()
+        if now - self._rtcp_stats_ts < 0.5:
+            return
+        self._rtcp_stats_ts = now
+        session = self.rtp_session
+        stats = session.get_property("stats") if session else None
+        if not stats or not stats.has_field("source-stats"):
+            return
+        entries = stats.get_value("source-stats")
+        # A GValueArray comes back as a list, or as GObject.ValueArray on older PyGObject.
+        entries = getattr(entries, "values", entries) or []
+        sources = [
+            {field: entry.get_value(field) for field in rtcp.SOURCE_FIELDS if entry.has_field(field)}
+            for entry in entries
+        ]
+        self.metrics.update_rtcp(rtcp.summarize(sources, self.target_sample_rate))
+
+    def _update_network_seed(self):
+        data = self.metrics.snapshot()
+        rtt = data.get("signal_rtt_ms")
+        rtt_var = data.get("signal_rtt_var_ms")
+        if rtt == self.network_rtt_ms and rtt_var == self.network_rtt_var_ms:
             return
-        mask = Gst.MessageType.ELEMENT | Gst.MessageType.ERROR | Gst.MessageType.WARNING
+        self.set_network_rtt(rtt, rtt_var)
+
+    def _attach_bus(self):
+        """Send every bus message through one sync handler instead of the default main context.
+
+        Stats are handled right on the posting streaming thread; everything else goes to a
+        dedicated dispatcher thread. An ERROR goes to on_error; only without an owner does the
+        dispatcher stop the pipeline itself.
+        """
+        self.bus = self.pipeline.get_bus()
+        messages = self._bus_queue = SimpleQueue()
+        threading.Thread(target=self._bus_worker, args=(messages,), name="tchat-bus", daemon=True).start()
+        self.bus.set_sync_handler(self._on_bus_sync)
+        # A standby pipeline prerolled without a handler; whatever it posted is still queued.
         while True:
-            msg = self.bus.timed_pop_filtered(0, mask)
+            msg = self.bus.pop()
             if not msg:
                 break
-            self._on_bus_message(self.bus, msg)
+            self._on_bus_sync(self.bus, msg)
+
+    def _detach_bus(self):
+        if not self.bus:
+            return
+        self.bus.set_sync_handler(None)
+        self.bus = None
+        messages, self._bus_queue = self._bus_queue, None
+        if messages:
+            # Not joined: stop() may be running on the dispatcher itself.
+            messages.put(None)
+
+    def _on_bus_sync(self, bus, message):
+        posted = time.perf_counter()
+        if message.type == Gst.MessageType.ELEMENT:
+            struct = message.get_structure()
+            if struct and struct.get_name() in self._STATS_MESSAGES:
+                self._on_bus_message(bus, message)
+                self._bus_latency["stats"].append((time.perf_counter() - posted) * 1000.0)
+                return Gst.BusSyncReply.DROP
+        messages = self._bus_queue
+        if messages is not None:
+            messages.put((message, posted))
+        return Gst.BusSyncReply.DROP
+
+    def _bus_worker(self, messages):
+        while True:
+            item = messages.get()
+            if item is None:
+                return
+            message, posted = item
+            try:
+                if message.type == Gst.MessageType.ERROR:
+                    # Serialise with start(): an ERROR posted while PLAYING is being reached
+                    # stops the pipeline only after start() has finished with it.
+                    with self._standby_lock:
+                        if self._bus_queue is messages:
+                            self._on_bus_message(self.bus, message)
+                else:
+                    self._on_bus_message(self.bus, message)
+            except Exception as exc:
+                self.logger.warning("Bus message handling failed: %s", exc)
+            self._bus_latency["control"].append((time.perf_counter() - posted) * 1000.0)
+
+    def _bus_latency_summary(self):
+        summary = {}
+        for kind, samples in self._bus_latency.items():
+            values = sorted(samples)
+            if not values:
+                continue
+            summary[kind] = {
+                "count": len(values),
+                "p50_ms": values[len(values) // 2],
+                "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max_ms": values[-1],
+            }
+        return summary
 
     def _on_vad_sample(self, sink):
         sample = sink.emit("pull-sample")
@@ -1133,19 +2089,25 @@ class MediaEngine:
             if src:
                 self.logger.error("Error source: %s", src.get_name())
             self.last_error = f"{err}"
-            if not self._handling_error:
-                self._handling_error = True
-                try:
-                    if self.on_error:
-                        self.on_error(self.last_error)
-                finally:
-                    self.stop()
-                    self._handling_error = False
+            if self._handling_error:
+                return
+            self._handling_error = True
+            if self.on_error:
+                # The owner stops us from its own thread, where every other mutation runs.
+                self.on_error(self.last_error)
+                return
+            try:
+                self.stop()
+            finally:
+                self._handling_error = False
         elif t == Gst.MessageType.WARNING:
             err, debug = message.parse_warning()
             self.logger.warning("Pipeline WARNING: %s", err)
         elif t == Gst.MessageType.EOS:
             self.logger.info("Pipeline EOS")
+        elif t == Gst.MessageType.LATENCY:
+            if self.pipeline:
+                self.pipeline.recalculate_latency()
         elif t == Gst.MessageType.STATE_CHANGED and message.src == self.pipeline:
             old, new, pending = message.parse_state_changed()
             self.logger.debug("Pipeline state: %s -> %s (pending %s)", old.value_nick, new.value_nick, pending.value_nick)
@@ -1179,30 +2141,247 @@ class MediaEngine:
                         self.aec.set_property("stream-delay-ms", int(self.aec_delay_ms))
                         self._aec_delay_last_update_ts = now
 
-    def _on_send_probe(self, pad, info):
-        buf = info.get_buffer()
+    def _buffer_age_ms(self, buf):
+        """Running time elapsed since the buffer's timestamp, or None without a clock/timestamp."""
         if not buf:
-            return Gst.PadProbeReturn.OK
+            return None
         if not self.clock or self.base_time is None:
             if self.pipeline:
                 self.clock = self.pipeline.get_clock()
                 self.base_time = self.pipeline.get_base_time()
             if not self.clock or self.base_time is None:
-                return Gst.PadProbeReturn.OK
+                return None
         ts = buf.pts
         if ts == Gst.CLOCK_TIME_NONE:
             ts = buf.dts
         if ts == Gst.CLOCK_TIME_NONE:
-            return Gst.PadProbeReturn.OK
+            return None
         now = self.clock.get_time() - self.base_time
-        latency_ns = now - ts
-        latency_ms = latency_ns / Gst.MSECOND
-        self.metrics.update_mic_send_latency(latency_ms)
+        return (now - ts) / Gst.MSECOND
+
+    def _on_send_probe(self, pad, info):
+        buf = info.get_buffer()
+        self._tx_packets += 1
+        self._tx_bytes += buf.get_size()
+        latency_ms = self._buffer_age_ms(buf)
+        if latency_ms is not None:
+            self.metrics.update_mic_send_latency(latency_ms)
+            self.latency.add("capture_to_send", latency_ms)
+        return Gst.PadProbeReturn.OK
+
+    def _add_downlink_probes(self):
+        udpsrc_pad = self.udpsrc.get_static_pad("src")
+        if not udpsrc_pad:
+            return
+        udpsrc_pad.add_probe(Gst.PadProbeType.BUFFER, self._on_first_rtp_probe)
+        if self.jitter_estimator == "percentile" or self.jitter_trace_path:
+            udpsrc_pad.add_probe(Gst.PadProbeType.BUFFER, self._on_rtp_arrival_probe)
+            # The standby build runs before self.pipeline is set; look up through udpsrc's bin.
+            parent = self.udpsrc.get_parent()
+            decoded = parent.get_by_name("caps2") if parent else None
+            if decoded:
+                decoded.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, self._on_remote_level_probe)
+        # rtpjitterbuffer stamps packets with their (skew-corrected) arrival time and decode keeps
+        # that PTS, so buffer age at these pads is time since the packet came off the socket.
+        jitter_pad = self.jitter.get_static_pad("src") if self.jitter else None
+        if jitter_pad:
+            jitter_pad.add_probe(Gst.PadProbeType.BUFFER, self._on_jitter_out_probe)
+        sink_pad = self.audio_sink.get_static_pad("sink") if self.audio_sink else None
+        if sink_pad:
+            sink_pad.add_probe(Gst.PadProbeType.BUFFER, self._on_playout_probe)
+
+    def _on_rtp_arrival_probe(self, pad, info):
+        buf = info.get_buffer()
+        if not buf or buf.get_size() < 12:
+            return Gst.PadProbeReturn.OK
+        header = buf.extract_dup(0, 12)
+        if header[0] >> 6 != 2:
+            return Gst.PadProbeReturn.OK
+        now = time.monotonic()
+        rtp_ts = int.from_bytes(header[4:8], "big")
+        self.delay_estimator.add(now, rtp_ts)
+        if self.jitter_trace_path:
+            if self._jitter_trace is None:
+                self._jitter_trace = open(self.jitter_trace_path, "a", encoding="utf-8")
+            seq = int.from_bytes(header[2:4], "big")
+            self._jitter_trace.write(f"{now:.6f} {rtp_ts} {seq} {int(self._remote_silent())}\n")
+        return Gst.PadProbeReturn.OK
+
+    def _on_remote_level_probe(self, pad, info):
+        buf = info.get_buffer()
+        if not buf:
+            return Gst.PadProbeReturn.OK
+        ok, mapped = buf.map(Gst.MapFlags.READ)
+        if not ok:
+            return Gst.PadProbeReturn.OK
+        try:
+            samples = np.frombuffer(mapped.data, dtype=np.float32)
+            power = float(np.dot(samples, samples)) / samples.size if samples.size else 0.0
+        finally:
+            buf.unmap(mapped)
+        if 10.0 * np.log10(power + 1e-12) > self.remote_silence_db:
+            self._remote_voice_ts = time.monotonic()
         return Gst.PadProbeReturn.OK
 
-    def _make_queue(self, name, max_buffers=10, leaky="downstream"):
+    def _remote_silent(self, hold_s=0.1):
+        """Energy VAD on the decoded far-end stream: quiet for at least hold_s."""
+        return self._remote_voice_ts is None or time.monotonic() - self._remote_voice_ts >= hold_s
+
+    def _on_jitter_out_probe(self, pad, info):
+        self.latency.add("jitter_hold", self._buffer_age_ms(info.get_buffer()))
+        return Gst.PadProbeReturn.OK
+
+    def _on_playout_probe(self, pad, info):
+        age_ms = self._buffer_age_ms(info.get_buffer())
+        if age_ms is not None and self._sink_syncs(pad.get_parent_element()):
+            # A syncing sink holds the buffer until PTS + pipeline latency.
+            age_ms = max(age_ms, self.pipeline.get_latency() / Gst.MSECOND) if self.pipeline else age_ms
+        self.latency.add("receive_to_sink", age_ms)
+        return Gst.PadProbeReturn.OK
+
+    def _sink_syncs(self, sink):
+        return bool(sink and sink.find_property("sync") and sink.get_property("sync"))
+
+    def _device_latency_ms(self, element, direction):
+        """Capture: the source's answer to a LATENCY query. Playout: the sink's ring buffer depth."""
+        if not element:
+            return None
+        if direction == "output" and isinstance(self.last_output_device, backends.AudioBackend):
+            return 0.0
+        if direction == "input":
+            pad = element.get_static_pad("src")
+            query = Gst.Query.new_latency()
+            if pad and pad.query(query):
+                _live, min_lat, _max_lat = query.parse_latency()
+                return min_lat / Gst.MSECOND
+        candidates = [element]
+        if isinstance(element, Gst.Bin):
+            # autoaudiosink and friends wrap the real device element.
+            candidates.extend(element.iterate_recurse())
+        prop = "buffer-time" if direction == "output" else "latency-time"
+        for candidate in candidates:
+            if candidate.find_property(prop):
+                # GstAudioBaseSrc/Sink report microseconds for latency/buffer time.
+                return float(candidate.get_property(prop)) / 1000.0
+        return None
+
+    def _update_latency_breakdown(self):
+        now = time.monotonic()
+        if now - self._latency_update_ts < 0.5:
+            return
+        self._latency_update_ts = now
+        with self.lock:
+            pipeline = self.pipeline
+            src = self.audio_src
+            sink = self.audio_sink
+        if not pipeline:
+            return
+        pipeline_ms = None
+        try:
+            ok, _live, min_lat, _max_lat = pipeline.query_latency()
+            if ok:
+                pipeline_ms = min_lat / Gst.MSECOND
+        except Exception:
+            pass
+        data = self.metrics.snapshot()
+        # RTCP measures the media path itself; signaling RTT is the fallback.
+        rtt = (data.get("rtcp") or {}).get("rtt_ms")
+        if rtt is None:
+            rtt = data.get("signal_rtt_ms")
+        breakdown = self.latency.breakdown(
+            capture_device_ms=self._device_latency_ms(src, "input"),
+            playout_device_ms=self._device_latency_ms(sink, "output") if sink else None,
+            pipeline_ms=pipeline_ms,
+            network_ms=rtt / 2.0 if rtt is not None else None,
+        )
+        if self.is_listen_only:
+            breakdown["downlink"] = {}
+        self.metrics.update_latency_breakdown(breakdown)
+
+    def _make_tsm_elements(self):
+        """appsink → WSOLA → appsrc bridge between decode and playout_q."""
+        tsm_sink = Gst.ElementFactory.make("appsink", "tsm_sink")
+        tsm_src = Gst.ElementFactory.make("appsrc", "tsm_src")
+        if not tsm_sink or not tsm_src:
+            self.logger.warning("appsink/appsrc not available; playout time stretching disabled")
+            return {}
+        caps = Gst.Caps.from_string(f"audio/x-raw,format=F32LE,rate={self.target_sample_rate},channels=1,layout=interleaved")
+        tsm_sink.set_property("caps", caps)
+        tsm_sink.set_property("emit-signals", True)
+        tsm_sink.set_property("sync", False)
+        self._set_if_prop(tsm_sink, "async", False)
+        tsm_sink.connect("new-sample", self._on_tsm_sample)
+        tsm_src.set_property("caps", caps)
+        tsm_src.set_property("format", Gst.Format.TIME)
+        tsm_src.set_property("is-live", True)
+        self.tsm = Wsola(self.target_sample_rate, frame_ms=self.tsm_frame_ms)
+        self.tsm_src = tsm_src
+        self._tsm_pts = None
+        self._tsm_ring = None
+        return {"tsm_sink": tsm_sink, "tsm_src": tsm_src}
+
+    def _on_tsm_sample(self, sink):
+        tsm, tsm_src = self.tsm, self.tsm_src
+        sample = sink.emit("pull-sample")
+        buf = sample.get_buffer() if sample else None
+        if not buf or not tsm:
+            return Gst.FlowReturn.OK
+        ok, mapped = buf.map(Gst.MapFlags.READ)
+        if not ok:
+            return Gst.FlowReturn.OK
+        try:
+            speed = self.tsm_control.speed(self._playout_reserve_ms(tsm_src))
+            out = tsm.process(np.frombuffer(mapped.data, dtype=np.float32), speed)
+        finally:
+            buf.unmap(mapped)
+        if not out.size:
+            return Gst.FlowReturn.OK
+        if self._tsm_pts is None:
+            self._tsm_pts = buf.pts if buf.pts != Gst.CLOCK_TIME_NONE else 0
+        # Output time runs continuously from the first input timestamp; its rate is what changes.
+        out_buf = Gst.Buffer.new_wrapped(out.tobytes())
+        out_buf.pts = self._tsm_pts
+        out_buf.duration = out.size * Gst.SECOND // self.target_sample_rate
+        self._tsm_pts += out_buf.duration
+        return tsm_src.emit("push-buffer", out_buf)
+
+    def _playout_reserve_ms(self, tsm_src):
+        """Stretched audio not yet played: appsrc and playout_q contents plus the device ring buffer."""
+        reserve_ms = tsm_src.get_property("current-level-bytes") / 4 * 1000.0 / self.target_sample_rate
+        queue = self.queues.get("playout_q")
+        if queue:
+            reserve_ms += queue.get_property("current-level-time") / Gst.MSECOND
+        if self._tsm_ring is None and self.audio_sink:
+            candidates = [self.audio_sink]
+            if isinstance(self.audio_sink, Gst.Bin):
+                candidates.extend(self.audio_sink.iterate_recurse())
+            # GstAudioBaseSink exposes its ring buffer; the device element appears once the bin is READY.
+            self._tsm_ring = next((c.ringbuffer for c in candidates if getattr(c, "ringbuffer", None)), None)
+        if self._tsm_ring:
+            reserve_ms += self._tsm_ring.delay() * 1000.0 / self.target_sample_rate
+        return reserve_ms
+
+    def _tsm_summary(self):
+        summary = self.tsm_control.snapshot()
+        summary["lookahead_ms"] = self.tsm.latency_samples * 1000.0 / self.target_sample_rate
+        reserve_ms = summary["reserve_ms"]
+        # Downlink buffering actually in effect: jitter buffer + stretcher lookahead + reserve.
+        summary["achieved_ms"] = (
+            self.jitter_latency_ms + summary["lookahead_ms"] + reserve_ms if reserve_ms is not None else None
+        )
+        return summary
+
+    def _on_first_rtp_probe(self, pad, info):
+        if self._media_epoch_ts is not None:
+            elapsed_ms = (time.monotonic() - self._media_epoch_ts) * 1000.0
+            self._media_epoch_ts = None
+            self.logger.info("First RTP packet %.1f ms after media start", elapsed_ms)
+            self.metrics.update_first_audio(elapsed_ms)
+        return Gst.PadProbeReturn.REMOVE
+
+    def _make_queue(self, name, max_buffers=None, leaky="downstream"):
         queue = Gst.ElementFactory.make("queue", name)
-        queue.set_property("max-size-buffers", max_buffers)
+        queue.set_property("max-size-buffers", self.queue_max_buffers if max_buffers is None else max_buffers)
         queue.set_property("max-size-time", 0)
         queue.set_property("max-size-bytes", 0)
         if leaky is True or leaky == "downstream":
@@ -1226,6 +2405,9 @@ class MediaEngine:
         self.metrics.update_queue_overrun(name, count)
 
     def _make_audio_src(self, device_info):
+        if isinstance(device_info, backends.AudioBackend):
+            self.logger.info("Created audio source: %r", device_info)
+            return device_info.make(self.target_sample_rate, "audiosrc")
         device_id = device_info.get("id") if isinstance(device_info, dict) else device_info
         device_api = device_info.get("api") if isinstance(device_info, dict) else None
         if sys.platform.startswith("win"):
@@ -1257,6 +2439,9 @@ class MediaEngine:
         return src
 
     def _make_audio_sink(self, device_info):
+        if isinstance(device_info, backends.AudioBackend):
+            self.logger.info("Created audio sink: %r", device_info)
+            return device_info.make(self.target_sample_rate, "audiosink")
         device_id = device_info.get("id") if isinstance(device_info, dict) else device_info
         device_api = device_info.get("api") if isinstance(device_info, dict) else None
         if sys.platform.startswith("win"):
@@ -1298,7 +2483,7 @@ class MediaEngine:
             target = float(value) * 10.0 + 20.0
         else:
             return
-        target = max(float(self.jitter_min_ms), min(float(self.jitter_max_ms), target))
+        target = max(float(self._jitter_floor_ms()), min(float(self.jitter_max_ms), target))
         new_latency = int(round(self.jitter_latency_ms * self.jitter_smoothing + target * (1.0 - self.jitter_smoothing)))
         if abs(new_latency - self.jitter_latency_ms) >= 5:
             self.jitter_latency_ms = new_latency
@@ -1307,6 +2492,56 @@ class MediaEngine:
             if self.aec_auto_delay:
                 self._auto_update_aec_delay()
 
+    def _make_delay_estimator(self):
+        return PlayoutDelayEstimator(
+            percentile=self.jitter_percentile,
+            decay_ms_per_s=self.jitter_decay_ms_per_s,
+            min_ms=self._jitter_floor_ms(),
+            max_ms=self.jitter_max_ms,
+            clock_rate=self.target_sample_rate,
+        )
+
+    def _adapt_jitter_percentile(self):
+        """Follow the delay estimator; changes land while the far end is silent."""
+        if not self.delay_estimator.packets:
+            return
+        now = time.monotonic()
+        target = self.delay_estimator.update(now)
+        new_latency = int(self._clamp(round(target), self._jitter_floor_ms(), self.jitter_max_ms))
+        self.metrics.update_jitter_target(new_latency, self.jitter_latency_ms)
+        if self.tsm:
+            # The stretcher absorbs small steps at any time; limit each to what it can make up
+            # at full stretch since the last one.
+            elapsed_ms = (now - self._last_jitter_adjust_ts) * 1000.0
+            step = max(1, min(self.jitter_min_step_ms, int(self.tsm_control.max_stretch * elapsed_ms)))
+            new_latency = self.jitter_latency_ms + int(self._clamp(new_latency - self.jitter_latency_ms, -step, step))
+            if new_latency == self.jitter_latency_ms:
+                return
+        else:
+            if abs(new_latency - self.jitter_latency_ms) < self.jitter_min_step_ms:
+                self._jitter_pending_since = None
+                return
+            if self._jitter_pending_since is None:
+                self._jitter_pending_since = now
+            # Growth cannot wait long for a pause: late packets are lost outright.
+            overdue = new_latency > self.jitter_latency_ms and (now - self._jitter_pending_since) * 1000.0 >= self.jitter_attack_wait_ms
+            if not self._remote_silent() and not overdue:
+                return
+        self.jitter_latency_ms = new_latency
+        self.jitter.set_property("latency", self.jitter_latency_ms)
+        self._last_jitter_adjust_ts = now
+        self._jitter_pending_since = None
+        self.metrics.update_jitter_target(new_latency, self.jitter_latency_ms)
+        if self.aec_auto_delay:
+            self._auto_update_aec_delay()
+
+    def _seed_jitter_latency_ms(self):
+        target = float(self.jitter_latency_ms_default)
+        if self.network_rtt_var_ms is not None:
+            # One-way jitter is about half the RTT deviation; mirror _adapt_jitter's 2x + 5 ms target.
+            target = float(self.network_rtt_var_ms) + 5.0
+        return int(self._clamp(round(target), self._jitter_floor_ms(), self.jitter_max_ms))
+
     def _set_if_prop(self, element, prop, value):
         if not element:
             return
@@ -1361,16 +2596,119 @@ class MediaEngine:
         if self.dfn_vad_link and self.dfn and self.dfn.find_property("mix"):
             target = self.dfn_mix_speech if effective else self.dfn_mix_silence
             target = self._clamp(target, 0.0, 1.0)
+            dt = now - self.dfn_mix_last_update if self.dfn_mix_last_update else self._DFN_MIX_STEP_S
+            self.dfn_mix_last_update = now
             if abs(target - self.dfn_mix) > 0.005:
                 smoothing = self._clamp(self.dfn_mix_smoothing, 0.05, 0.5)
-                self.dfn_mix = (self.dfn_mix * (1.0 - smoothing)) + (target * smoothing)
+                # Scaled by elapsed time, like the CNG fade: the glide speed does not follow the caller's cadence.
+                alpha = 1.0 - (1.0 - smoothing) ** (dt / self._DFN_MIX_STEP_S)
+                self.dfn_mix = (self.dfn_mix * (1.0 - alpha)) + (target * alpha)
                 self.dfn.set_property("mix", self.dfn_mix)
         self._update_cng_state(effective)
+        self._update_dtx_state(effective or speaking, now)
+
+    def _reset_dtx(self):
+        self._dtx_silent = False
+        self._dtx_silence_since = None
+        self._dtx_last_ts = None
+        self._dtx_next_keepalive = 0
+        self._dtx_pass_until = 0
+        self._dtx_preroll = deque()
+        self._dtx_stats = {"silent_ms": 0.0, "total_ms": 0.0, "dropped_ms": 0.0, "keepalives": 0, "spurts": 0}
+
+    def _opus_dtx_active(self):
+        return bool(self.opus_dtx) or (self.vad_dtx == "thin" and self._dtx_silent)
+
+    def _update_dtx_state(self, speaking, now):
+        """Enter DTX after vad_dtx_hangover_ms of effective silence; any speech evidence leaves at once."""
+        if self.vad_dtx == "off":
+            return
+        stats = self._dtx_stats
+        if self._dtx_last_ts is not None:
+            elapsed_ms = (now - self._dtx_last_ts) * 1000.0
+            stats["total_ms"] += elapsed_ms
+            if self._dtx_silent:
+                stats["silent_ms"] += elapsed_ms
+        self._dtx_last_ts = now
+        silent = False
+        if not speaking and self.send_enabled:
+            if self._dtx_silence_since is None:
+                self._dtx_silence_since = now
+            silent = (now - self._dtx_silence_since) * 1000.0 >= self.vad_dtx_hangover_ms
+        else:
+            self._dtx_silence_since = None
+        if silent != self._dtx_silent:
+            self._dtx_silent = silent
+            if silent:
+                # The first keepalive goes out straight away.
+                self._dtx_next_keepalive = 0
+            else:
+                stats["spurts"] += 1
+            with self.lock:
+                opusenc = self.opusenc
+            if opusenc:
+                self._set_if_prop(opusenc, "dtx", self._opus_dtx_active())
+                self._apply_opus_loss_settings(opusenc)
+        self.metrics.update_vad_dtx({
+            "mode": self.vad_dtx,
+            "silent": self._dtx_silent,
+            "silent_pct": round(100.0 * stats["silent_ms"] / stats["total_ms"], 1) if stats["total_ms"] else None,
+            "dropped_ms": round(stats["dropped_ms"]),
+            "keepalives": stats["keepalives"],
+            "spurts": stats["spurts"],
+        })
+
+    def _on_dtx_probe(self, pad, info):
+        """Encoder input during DTX: one packet time passes per keepalive interval, the rest is dropped.
+
+        Dropping before opusenc saves the encoding as well as the packets. RTP sequence numbers
+        stay contiguous and the timestamps jump, as with Opus DTX, so the far end sees no loss.
+        The last vad_dtx_preroll_ms of dropped audio is held and encoded ahead of the first frame
+        after DTX, so the VAD's reaction time does not clip the start of the talkspurt.
+        """
+        preroll = self._dtx_preroll
+        if not self._dtx_silent:
+            if preroll:
+                self._flush_dtx_preroll(pad, preroll)
+            return Gst.PadProbeReturn.OK
+        buf = info.get_buffer()
+        pts = buf.pts
+        if pts == Gst.CLOCK_TIME_NONE or pts < self._dtx_pass_until:
+            preroll.clear()
+            return Gst.PadProbeReturn.OK
+        if pts >= self._dtx_next_keepalive:
+            # The keepalive carries whatever the uplink has in silence: comfort noise when CNG is on.
+            self._dtx_pass_until = pts + int(self.opus_frame_ms) * Gst.MSECOND
+            self._dtx_next_keepalive = pts + self.vad_dtx_keepalive_ms * Gst.MSECOND
+            self._dtx_stats["keepalives"] += 1
+            preroll.clear()
+            return Gst.PadProbeReturn.OK
+        if buf.duration != Gst.CLOCK_TIME_NONE:
+            self._dtx_stats["dropped_ms"] += buf.duration / Gst.MSECOND
+        if self.vad_dtx_preroll_ms:
+            preroll.append(buf)
+            held_ms = sum(held.duration for held in preroll if held.duration != Gst.CLOCK_TIME_NONE) / Gst.MSECOND
+            while len(preroll) > 1 and held_ms > self.vad_dtx_preroll_ms:
+                oldest = preroll.popleft()
+                if oldest.duration != Gst.CLOCK_TIME_NONE:
+                    held_ms -= oldest.duration / Gst.MSECOND
+        return Gst.PadProbeReturn.DROP
+
+    def _flush_dtx_preroll(self, pad, preroll):
+        # Chained from inside the probe, on the streaming thread, ahead of the buffer that ended DTX.
+        while preroll:
+            buf = preroll.popleft()
+            if buf.duration != Gst.CLOCK_TIME_NONE:
+                self._dtx_stats["dropped_ms"] -= buf.duration / Gst.MSECOND
+            ret = pad.chain(buf)
+            if ret != Gst.FlowReturn.OK:
+                self.logger.debug("DTX pre-roll push returned %s", ret.value_nick)
+                preroll.clear()
 
     def _update_cng_state(self, speaking):
         if not self.cng_mixer or not self.cng_volume or not self.cng_valve:
             return
-        target_level = 0.0 if speaking or not self.cng_enabled else 10 ** (float(self.cng_level_db) / 20.0)
+        target_level = 0.0 if speaking or not self.cng_enabled or self.is_listen_only else 10 ** (float(self.cng_level_db) / 20.0)
         now = time.monotonic()
         dt = now - self.cng_last_update if self.cng_last_update else 0.0
         self.cng_last_update = now
@@ -1474,7 +2812,7 @@ class MediaEngine:
         if not src or not conv or not res or not caps or not volume or not valve:
             self.logger.warning("CNG elements missing; disabled")
             return None, None, None, None
-        self._set_if_prop(res, "quality", 10)
+        self._set_if_prop(res, "quality", int(self.resample_quality))
         self._set_if_prop(src, "is-live", True)
         self._set_if_prop(src, "wave", "white-noise")
         caps.set_property(
@@ -1491,14 +2829,382 @@ class MediaEngine:
         self.cng_caps = caps
         return mixer, src, volume, valve
 
-    def _make_valve(self, drop=False):
-        valve = Gst.ElementFactory.make("valve", "send_valve")
+    def _make_valve(self, drop=False, name="send_valve"):
+        valve = Gst.ElementFactory.make("valve", name)
         if not valve:
-            self.logger.warning("valve plugin not found; send gating disabled")
-            valve = Gst.ElementFactory.make("identity", "send_valve")
+            self.logger.warning("valve plugin not found; %s gating disabled", name)
+            valve = Gst.ElementFactory.make("identity", name)
         self._set_if_prop(valve, "drop", bool(drop))
         return valve
 
+    def _probe_caps(self, element, pad_name, open_device=False):
+        """Caps an element can produce/accept; device elements are briefly opened to report real formats."""
+        if element is None:
+            return None
+        try:
+            if open_device:
+                element.set_state(Gst.State.READY)
+            pad = element.get_static_pad(pad_name)
+            return pad.query_caps(None) if pad else None
+        except Exception as exc:
+            self.logger.debug("Caps query on %s failed: %s", element.get_name(), exc)
+            return None
+        finally:
+            if open_device:
+                element.set_state(Gst.State.NULL)
+
+    def _conversions_needed(self, caps, fmt):
+        """(need_convert, need_resample) to get between `caps` and <fmt> mono at the target rate."""
+        if not self.caps_planner or caps is None or caps.is_any() or caps.is_empty():
+            return True, True
+        rate = self.target_sample_rate
+
+        def fits(fields):
+            return caps.can_intersect(Gst.Caps.from_string(f"audio/x-raw,{fields}"))
+
+        if fits(f"format={fmt},rate={rate},channels=1,layout=interleaved"):
+            return False, False
+        need_resample = not fits(f"rate={rate}")
+        need_convert = not fits(f"format={fmt},channels=1,layout=interleaved")
+        if not need_convert and not need_resample:
+            # Each part fits on its own but not together; keep both to be safe.
+            return True, True
+        return need_convert, need_resample
+
+    def _report_caps_plan(self):
+        skipped = sorted(name for name, built in self._caps_plan.items() if not built)
+        self.logger.info(
+            "Caps plan: %d of %d convert/resample elements skipped%s",
+            len(skipped),
+            len(self._caps_plan),
+            f" ({', '.join(skipped)})" if skipped else "",
+        )
+        self.metrics.update_caps_plan(self._caps_plan)
+
+    def _make_converters(self, conv_name, res_name, need):
+        """Build only the audioconvert/audioresample elements the caps plan asks for."""
+        need_convert, need_resample = need
+        elements = []
+        if need_convert:
+            elements.append(Gst.ElementFactory.make("audioconvert", conv_name))
+        if need_resample:
+            res = Gst.ElementFactory.make("audioresample", res_name)
+            self._set_if_prop(res, "quality", int(self.resample_quality))
+            elements.append(res)
+        if any(element is None for element in elements):
+            raise RuntimeError(f"Failed to create GStreamer element: {conv_name}/{res_name}")
+        self._caps_plan[conv_name] = bool(need_convert)
+        self._caps_plan[res_name] = bool(need_resample)
+        return elements
+
+    def _link_rtp_out(self, rtppay, sink):
+        """rtppay → [RTCP session send path] → RTP sink."""
+        src_pad = rtppay.get_static_pad("src")
+        if not self.rtp_session:
+            self._pad_link_or_raise("rtppay→udpsink", src_pad, sink.get_static_pad("sink"))
+            return
+        self._pad_link_or_raise("rtppay→session", src_pad, self.rtp_session.get_request_pad("send_rtp_sink"))
+        self._pad_link_or_raise("session→udpsink", self.rtp_session.get_static_pad("send_rtp_src"), sink.get_static_pad("sink"))
+
+    def _make_rtcp_elements(self, local_port, remote_ip, remote_port):
+        """rtpsession plus its RTCP socket pair; empty when RTCP is off or rtpmanager is missing."""
+        if not self.rtcp_enabled:
+            return {}
+        session = Gst.ElementFactory.make("rtpsession", "rtp_session")
+        if not session:
+            self.logger.warning("rtpsession not available; RTCP disabled")
+            return {}
+        self._set_if_prop(session, "rtcp-min-interval", self.rtcp_interval_ms * Gst.MSECOND)
+        rtcp_src = Gst.ElementFactory.make("udpsrc", "rtcp_src")
+        rtcp_src.set_property("port", int(local_port) + self.rtcp_port_offset)
+        rtcp_src.set_property("caps", Gst.Caps.from_string("application/x-rtcp"))
+        rtcp_sink = Gst.ElementFactory.make("udpsink", "rtcp_sink")
+        if remote_ip is not None and remote_port is not None:
+            self._set_if_prop(rtcp_sink, "host", remote_ip)
+            self._set_if_prop(rtcp_sink, "port", int(remote_port) + self.rtcp_port_offset)
+        self._set_if_prop(rtcp_sink, "async", False)
+        self._set_if_prop(rtcp_sink, "sync", False)
+        # Incoming sender reports are forwarded for lip-sync; nothing here needs them.
+        sync_sink = Gst.ElementFactory.make("fakesink", "rtcp_sync_sink")
+        self._set_if_prop(sync_sink, "async", False)
+        self._set_if_prop(sync_sink, "sync", False)
+        self.rtp_session = session
+        self.rtcp_src = rtcp_src
+        self.rtcp_sink = rtcp_sink
+        return {"rtp_session": session, "rtcp_src": rtcp_src, "rtcp_sink": rtcp_sink, "rtcp_sync_sink": sync_sink}
+
+    def _link_rtcp(self, elements):
+        """Receive RTP through the session, then wire the RTCP socket pair and the sync pad."""
+        session = elements["rtp_session"]
+        self._pad_link_or_raise(
+            "recv_valve→session", elements["recv_valve"].get_static_pad("src"), session.get_request_pad("recv_rtp_sink"))
+        self._pad_link_or_raise(
+            "session→jitter", session.get_static_pad("recv_rtp_src"), elements["jitter"].get_static_pad("sink"))
+        self._pad_link_or_raise(
+            "rtcp_src→session", elements["rtcp_src"].get_static_pad("src"), session.get_request_pad("recv_rtcp_sink"))
+        self._pad_link_or_raise(
+            "session→rtcp_sync", session.get_static_pad("sync_src"), elements["rtcp_sync_sink"].get_static_pad("sink"))
+        self._pad_link_or_raise(
+            "session→rtcp_sink", session.get_request_pad("send_rtcp_src"), elements["rtcp_sink"].get_static_pad("sink"))
+
+    def _make_rtp_sink(self, remote_ip, remote_port):
+        if remote_ip is None:
+            sink = Gst.ElementFactory.make("fakesink", "rtp_sink")
+        elif self.conference:
+            # One encoded packet, one send per peer; peers come and go as clients.
+            sink = Gst.ElementFactory.make("multiudpsink", "rtp_sink")
+            self._primary_client = None
+            if remote_port is not None:
+                sink.emit("add", remote_ip, int(remote_port))
+                self._primary_client = (remote_ip, int(remote_port))
+        else:
+            sink = Gst.ElementFactory.make("udpsink", "rtp_sink")
+            self._set_if_prop(sink, "host", remote_ip)
+            if remote_port is not None:
+                self._set_if_prop(sink, "port", int(remote_port))
+        self._set_if_prop(sink, "async", False)
+        self._set_if_prop(sink, "sync", False)
+        return sink
+
+    def _rtp_caps(self):
+        return Gst.Caps.from_string(
+            f"application/x-rtp,media=audio,encoding-name=OPUS,clock-rate={self.target_sample_rate},payload=96"
+        )
+
+    def _make_peer_elements(self, index, local_port):
+        """udpsrc → jitter → depay → opusdec → F32 mono: one added conference peer, ready for conf_mixer."""
+        prefix = f"peer{index}_"
+        src = Gst.ElementFactory.make("udpsrc", prefix + "src")
+        jitter = Gst.ElementFactory.make("rtpjitterbuffer", prefix + "jitter")
+        depay = Gst.ElementFactory.make("rtpopusdepay", prefix + "depay")
+        opusdec = Gst.ElementFactory.make("opusdec", prefix + "dec")
+        caps = Gst.ElementFactory.make("capsfilter", prefix + "caps")
+        if not src or not jitter or not depay or not opusdec or not caps:
+            raise RuntimeError(f"Failed to create conference peer elements ({prefix})")
+        src.set_property("port", int(local_port))
+        self._set_if_prop(src, "is-live", True)
+        self._set_if_prop(src, "do-timestamp", True)
+        src.set_property("caps", self._rtp_caps())
+        # Fixed at the first call's current depth; only the first call's buffer adapts.
+        jitter.set_property("latency", self.jitter_latency_ms)
+        self._set_if_prop(jitter, "drop-on-late", True)
+        jitter.set_property("do-lost", True)
+        convs = self._make_converters(
+            prefix + "conv", prefix + "res", self._conversions_needed(self._probe_caps(opusdec, "src"), "F32LE"))
+        caps.set_property(
+            "caps",
+            Gst.Caps.from_string(f"audio/x-raw,format=F32LE,rate={self.target_sample_rate},channels=1,layout=interleaved"),
+        )
+        return [src, jitter, depay, opusdec, *convs, caps]
+
+    def _make_conf_mixer(self):
+        mixer = Gst.ElementFactory.make("audiomixer", "conf_mixer")
+        caps = Gst.ElementFactory.make("capsfilter", "conf_caps")
+        if not mixer or not caps:
+            self.logger.warning("audiomixer plugin not found; conference peers cannot be mixed")
+            return {}
+        caps.set_property(
+            "caps",
+            Gst.Caps.from_string(f"audio/x-raw,format=F32LE,rate={self.target_sample_rate},channels=1,layout=interleaved"),
+        )
+        self.conf_mixer = mixer
+        return {"conf_mixer": mixer, "conf_caps": caps}
+
+    def _make_record_elements(self, direction):
+        """tee → leaky queue → appsink for one direction's Opus packets; empty when recording is off."""
+        if not self.record_dir:
+            return {}
+        tee = Gst.ElementFactory.make("tee", f"record_{direction}_tee")
+        sink = Gst.ElementFactory.make("appsink", f"record_{direction}_sink")
+        if not tee or not sink:
+            self.logger.warning("tee/appsink not available; %s recording disabled", direction)
+            return {}
+        self._set_if_prop(tee, "allow-not-linked", True)
+        queue = self._make_queue(f"record_{direction}_q", max_buffers=self.record_queue_buffers, leaky="downstream")
+        # The appsink holds one packet. While the writer is behind, the queue drops its oldest
+        # packet (counted as an overrun) instead of blocking the tee.
+        sink.set_property("max-buffers", 1)
+        sink.set_property("drop", False)
+        sink.set_property("sync", False)
+        self._set_if_prop(sink, "async", False)
+        self._set_if_prop(sink, "enable-last-sample", False)
+        self.record_sinks[direction] = sink
+        return {f"record_{direction}_tee": tee, f"record_{direction}_q": queue, f"record_{direction}_sink": sink}
+
+    def _link_record_branch(self, elements, direction):
+        queue = elements[f"record_{direction}_q"]
+        self._link_tee_src_to(f"record_{direction}", elements[f"record_{direction}_tee"], queue)
+        self._link_many_or_raise(f"record_{direction}", queue, elements[f"record_{direction}_sink"])
+
+    def _record_path(self, direction):
+        if self._record_stamp is None:
+            self._record_stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.record_dir, f"tchat-{self._record_stamp}-{direction}.ogg")
+
+    def _start_recorders(self):
+        """Start a writer for every teed direction of a call; listen-only is never recorded."""
+        if not self.record_sinks or self.is_listen_only:
+            return
+        try:
+            os.makedirs(self.record_dir, exist_ok=True)
+        except OSError as exc:
+            self.logger.warning("Recording disabled: cannot create %s: %s", self.record_dir, exc)
+            return
+        for direction, sink in self.record_sinks.items():
+            if direction in self.recorders:
+                continue
+            writer = OggWriter(
+                sink,
+                self._record_path(direction),
+                parse=direction == "down",
+                nice=self.record_nice,
+                max_drain=self.record_queue_buffers + 1,
+            )
+            writer.start()
+            self.recorders[direction] = writer
+        self._publish_recording()
+
+    def _stop_recorders(self):
+        recorders, self.recorders = self.recorders, {}
+        if not recorders:
+            return
+        for writer in recorders.values():
+            writer.request_stop()
+        for writer in recorders.values():
+            writer.close()
+        summary = self._recording_summary(recorders)
+        for direction in recorders:
+            stats = summary[direction]
+            self.logger.info("Recorded %s: %d packets written, %d dropped -> %s",
+                             direction, stats["written"], stats["dropped"], stats["path"])
+
+    def _recording_summary(self, recorders):
+        with self.lock:
+            overruns = dict(self.queue_overruns)
+        summary = {"dir": self.record_dir}
+        for direction, writer in recorders.items():
+            # The record queue is leaky: each overrun is one packet dropped because the writer fell behind.
+            summary[direction] = {**writer.stats(), "dropped": overruns.get(f"record_{direction}_q", 0)}
+        return summary
+
+    def _publish_recording(self):
+        self.metrics.update_recording(self._recording_summary(self.recorders))
+
+    def _make_downlink_elements(self, local_port, output_device, remote_ip=None, remote_port=None):
+        """Create the receive/playout branch; returned in upstream→downstream order."""
+        sink = self._make_audio_sink(output_device)
+        self.audio_sink = sink
+        if not isinstance(output_device, backends.AudioBackend):
+            self._set_if_prop(sink, "sync", False)
+
+        self.udpsrc = Gst.ElementFactory.make("udpsrc", "rtp_src")
+        self.udpsrc.set_property("port", int(local_port))
+        # Ensure pipeline stays live even before RTP arrives.
+        self._set_if_prop(self.udpsrc, "is-live", True)
+        self._set_if_prop(self.udpsrc, "do-timestamp", True)
+
+        self.udpsrc.set_property("caps", self._rtp_caps())
+        self.recv_valve = self._make_valve(drop=False, name="recv_valve")
+
+        self.jitter = Gst.ElementFactory.make("rtpjitterbuffer", "jitter")
+        self.jitter_latency_ms = self._seed_jitter_latency_ms()
+        self._last_jitter_adjust_ts = 0.0
+        self.jitter.set_property("latency", self.jitter_latency_ms)
+        self._set_if_prop(self.jitter, "drop-on-late", True)
+        self.jitter.set_property("do-lost", True)
+
+        rtpdepay = Gst.ElementFactory.make("rtpopusdepay", "rtpdepay")
+        opusdec = Gst.ElementFactory.make("opusdec", "opusdec")
+        dec_convs = self._make_converters("audconv2", "audres2", self._conversions_needed(self._probe_caps(opusdec, "src"), "F32LE"))
+        caps2 = Gst.ElementFactory.make("capsfilter", "caps2")
+        caps2.set_property(
+            "caps",
+            Gst.Caps.from_string(f"audio/x-raw,format=F32LE,rate={self.target_sample_rate},channels=1,layout=interleaved"),
+        )
+
+        playout_q = self._make_queue("playout_q", leaky=False)
+        playout_need = self._conversions_needed(self._probe_caps(sink, "sink", open_device=True), "F32LE")
+        playout_convs = self._make_converters("playout_conv", "playout_res", playout_need)
+        playout_format = "S16LE" if playout_need[0] else "F32LE"
+        playout_caps = Gst.ElementFactory.make("capsfilter", "playout_caps")
+        playout_caps.set_property(
+            "caps",
+            Gst.Caps.from_string(f"audio/x-raw,format={playout_format},rate={self.target_sample_rate},channels=1,layout=interleaved"),
+        )
+
+        elements = {
+            "udpsrc": self.udpsrc,
+            "recv_valve": self.recv_valve,
+            **self._make_rtcp_elements(local_port, remote_ip, remote_port),
+            "jitter": self.jitter,
+            "rtpdepay": rtpdepay,
+            **self._make_record_elements("down"),
+            "opusdec": opusdec,
+        }
+        for element in dec_convs:
+            elements[element.get_name()] = element
+        elements["caps2"] = caps2
+        if self.conference:
+            # The stretcher follows one stream's reserve; with several decoders feeding playout it stays off.
+            elements.update(self._make_conf_mixer())
+        elif self.tsm_enabled:
+            elements.update(self._make_tsm_elements())
+        if self.aec:
+            elements["playout_tee"] = Gst.ElementFactory.make("tee", "playout_tee")
+            elements["render_q"] = self._make_queue("render_q", leaky=False)
+        elements.update({
+            "playout_q": playout_q,
+            **{element.get_name(): element for element in playout_convs},
+            "playout_caps": playout_caps,
+            "sink": sink,
+        })
+        return elements
+
+    def _link_downlink(self, elements):
+        if "rtp_session" in elements:
+            self._link_many_or_raise("rtp_in", elements["udpsrc"], elements["recv_valve"])
+            self._link_rtcp(elements)
+            receive = ("jitter", "rtpdepay")
+        else:
+            receive = ("udpsrc", "recv_valve", "jitter", "rtpdepay")
+        decoder = [
+            elements[name]
+            for name in (*receive, "record_down_tee", "opusdec", "audconv2", "audres2", "caps2", "tsm_sink")
+            if name in elements
+        ]
+        if "record_down_tee" in elements:
+            self._link_record_branch(elements, "down")
+        if "tsm_src" in elements:
+            # The stretcher bridges two streaming threads; playout continues from its appsrc.
+            self._link_many_or_raise("decoder", *decoder)
+            decoder = [elements["tsm_src"]]
+        if "conf_mixer" in elements:
+            # Everything after the mixer (playout and the AEC render reference) hears all peers.
+            self._link_many_or_raise("decoder", *decoder)
+            self._link_to_mixer("decoder→conf_mixer", decoder[-1], elements["conf_mixer"])
+            decoder = [elements["conf_mixer"], elements["conf_caps"]]
+        playout = [
+            elements[name]
+            for name in ("playout_q", "playout_conv", "playout_res", "playout_caps", "sink")
+            if name in elements
+        ]
+        playout_tee = elements.get("playout_tee")
+        if not playout_tee:
+            self._link_many_or_raise("decoder", *decoder, *playout)
+            return
+        render_q = elements["render_q"]
+        self._link_many_or_raise("decoder", *decoder, playout_tee)
+        self._link_tee_src_to("playout→sink", playout_tee, playout[0])
+        self._link_tee_src_to("playout→render", playout_tee, render_q)
+        self._link_many_or_raise("playout", *playout)
+
+        render_pad = self.aec.get_request_pad("render_sink")
+        if render_pad:
+            render_src = render_q.get_static_pad("src")
+            self._pad_link_or_raise("render→aec", render_src, render_pad)
+        else:
+            self.logger.warning("AEC render pad not available")
+
     def _env_flag(self, name):
         value = os.getenv(name)
         if value is None:
@@ -1594,7 +3300,7 @@ class MediaEngine:
             except Exception:
                 pass
         base_ms += float(self.jitter_latency_ms)
-        base_ms += 10.0
+        base_ms += float(self.opus_frame_ms)
         return int(self._clamp(round(base_ms), 0, 500))
 
     def _link_many_or_raise(self, label, *elems):
@@ -18,12 +18,39 @@ class Metrics:
             "queue_overruns": {},
             "jitter_depth": None,
             "jitter_kind": None,
+            "jitter_target_ms": None,
+            "jitter_latency_ms": None,
             "mic_send_latency_ms": None,
+            "first_audio_ms": None,
+            "duplex_transition_ms": None,
+            "duplex_transition_mode": None,
+            "pipeline_start_ms": None,
+            "pipeline_start_pooled": None,
+            "caps_plan": {},
+            "element_timing": {},
+            "latency_breakdown": {},
+            "bus_latency": {},
+            "tsm": {},
+            "loss_feedback": {},
+            "rtcp": {},
+            "ptime": {},
+            "rtp_tx": {},
+            "vad_dtx": {},
+            "conference": {},
+            "recording": {},
             "vad_prob": 0.0,
             "vad_speaking": False,
             "vad_energy_db": None,
             "input_sample_rate": None,
             "target_sample_rate": None,
+            "signal_rtt_ms": None,
+            "signal_rtt_var_ms": None,
+            "clock_offset_ms": None,
+            "signal_rx": {},
+            "dial_winner": None,
+            "dial_candidates": [],
+            "sessions": [],
+            "relay": {},
             "last_update": time.time(),
         }
 
@@ -65,11 +92,92 @@ class Metrics:
                 self._data["jitter_kind"] = kind
             self._data["last_update"] = time.time()
 
+    def update_jitter_target(self, target_ms, latency_ms):
+        with self._lock:
+            self._data["jitter_target_ms"] = target_ms
+            self._data["jitter_latency_ms"] = latency_ms
+            self._data["last_update"] = time.time()
+
     def update_mic_send_latency(self, latency_ms):
         with self._lock:
             self._data["mic_send_latency_ms"] = latency_ms
             self._data["last_update"] = time.time()
 
+    def update_first_audio(self, elapsed_ms):
+        with self._lock:
+            self._data["first_audio_ms"] = elapsed_ms
+            self._data["last_update"] = time.time()
+
+    def update_duplex_transition(self, elapsed_ms, mode):
+        with self._lock:
+            self._data["duplex_transition_ms"] = elapsed_ms
+            self._data["duplex_transition_mode"] = mode
+            self._data["last_update"] = time.time()
+
+    def update_pipeline_start(self, elapsed_ms, pooled):
+        with self._lock:
+            self._data["pipeline_start_ms"] = elapsed_ms
+            self._data["pipeline_start_pooled"] = pooled
+            self._data["last_update"] = time.time()
+
+    def update_caps_plan(self, plan):
+        with self._lock:
+            self._data["caps_plan"] = dict(plan)
+            self._data["last_update"] = time.time()
+
+    def update_latency_breakdown(self, breakdown):
+        with self._lock:
+            self._data["latency_breakdown"] = dict(breakdown)
+            self._data["last_update"] = time.time()
+
+    def update_bus_latency(self, summary):
+        with self._lock:
+            self._data["bus_latency"] = dict(summary)
+            self._data["last_update"] = time.time()
+
+    def update_loss_feedback(self, key, value):
+        """key: "local" (our receiver report), "remote" (the peer's) or "opus" (encoder settings)."""
+        with self._lock:
+            feedback = dict(self._data["loss_feedback"])
+            feedback[key] = dict(value)
+            self._data["loss_feedback"] = feedback
+            self._data["last_update"] = time.time()
+
+    def update_rtcp(self, summary):
+        with self._lock:
+            self._data["rtcp"] = dict(summary)
+            self._data["last_update"] = time.time()
+
+    def update_ptime(self, ptime):
+        with self._lock:
+            self._data["ptime"] = dict(ptime)
+            self._data["last_update"] = time.time()
+
+    def update_rtp_tx(self, summary):
+        with self._lock:
+            self._data["rtp_tx"] = dict(summary)
+            self._data["last_update"] = time.time()
+
+    def update_vad_dtx(self, summary):
+        with self._lock:
+            self._data["vad_dtx"] = dict(summary)
+            self._data["last_update"] = time.time()
+
+    def update_conference(self, summary):
+        with self._lock:
+            self._data["conference"] = dict(summary)
+            self._data["last_update"] = time.time()
+
+    def update_tsm(self, summary):
+        with self._lock:
+            self._data["tsm"] = dict(summary)
+            self._data["last_update"] = time.time()
+
+    def update_element_timing(self, timing):
+        with self._lock:
+            self._data["element_timing"] = dict(timing)
+            self._data["last_update"] = time.time()
+
     def update_vad(self, prob, speaking, energy_db=None):
         with self._lock:
             self._data["vad_prob"] = prob
@@ -86,6 +194,48 @@ class Metrics:
                 self._data["target_sample_rate"] = target_rate
             self._data["last_update"] = time.time()
 
+    def update_network_timing(self, rtt_ms, rtt_var_ms=None, clock_offset_ms=None):
+        with self._lock:
+            self._data["signal_rtt_ms"] = rtt_ms
+            if rtt_var_ms is not None:
+                self._data["signal_rtt_var_ms"] = rtt_var_ms
+            if clock_offset_ms is not None:
+                self._data["clock_offset_ms"] = clock_offset_ms
+            self._data["last_update"] = time.time()
+
+    def clear_network_timing(self):
+        with self._lock:
+            self._data["signal_rtt_ms"] = None
+            self._data["signal_rtt_var_ms"] = None
+            self._data["clock_offset_ms"] = None
+            self._data["last_update"] = time.time()
+
+    def update_signal_rx(self, counters):
+        with self._lock:
+            self._data["signal_rx"] = dict(counters)
+            self._data["last_update"] = time.time()
+
+    def update_dial_results(self, winner, candidates):
+        with self._lock:
+            self._data["dial_winner"] = winner
+            self._data["dial_candidates"] = list(candidates)
+            self._data["last_update"] = time.time()
+
+    def update_recording(self, summary):
+        with self._lock:
+            self._data["recording"] = dict(summary)
+            self._data["last_update"] = time.time()
+
+    def update_sessions(self, sessions):
+        with self._lock:
+            self._data["sessions"] = list(sessions)
+            self._data["last_update"] = time.time()
+
+    def update_relay(self, stats):
+        with self._lock:
+            self._data["relay"] = dict(stats)
+            self._data["last_update"] = time.time()
+
     def snapshot(self):
         with self._lock:
             return dict(self._data)
@@ -94,9 +244,22 @@ class Metrics:
         with self._lock:
             self._data["queue_depths"] = {}
             self._data["queue_overruns"] = {}
+            self._data["element_timing"] = {}
+            self._data["latency_breakdown"] = {}
+            self._data["bus_latency"] = {}
+            self._data["tsm"] = {}
+            self._data["loss_feedback"] = {}
+            self._data["rtcp"] = {}
+            self._data["rtp_tx"] = {}
+            self._data["vad_dtx"] = {}
+            self._data["conference"] = {}
+            self._data["recording"] = {}
             self._data["jitter_depth"] = None
             self._data["jitter_kind"] = None
+            self._data["jitter_target_ms"] = None
+            self._data["jitter_latency_ms"] = None
             self._data["mic_send_latency_ms"] = None
+            self._data["first_audio_ms"] = None
             self._data["vad_prob"] = 0.0
             self._data["vad_speaking"] = False
             self._data["vad_energy_db"] = None
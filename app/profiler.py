@@ -0,0 +1,147 @@
+import threading
+import time
+
+from gi.repository import Gst
+
+# Histogram bucket upper edges in microseconds; the last bucket is open-ended.
+BUCKET_EDGES_US = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_EDGES_US) + 1)
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def add(self, value_us):
+        idx = 0
+        while idx < len(BUCKET_EDGES_US) and value_us > BUCKET_EDGES_US[idx]:
+            idx += 1
+        self.counts[idx] += 1
+        self.count += 1
+        self.total_us += value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the q-th sample (max for the open bucket)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return float(BUCKET_EDGES_US[idx]) if idx < len(BUCKET_EDGES_US) else self.max_us
+        return self.max_us
+
+    def summary(self, kind):
+        return {
+            "kind": kind,
+            "count": self.count,
+            "mean_us": self.total_us / self.count if self.count else None,
+            "p50_us": self.percentile(0.5),
+            "p95_us": self.percentile(0.95),
+            "max_us": self.max_us if self.count else None,
+            "hist": list(self.counts),
+        }
+
+
+class PipelineProfiler:
+    """Per-element processing time and per-queue residency from sampled pad probes.
+
+    A buffer is timed from its sink-pad probe to the src-pad probe that carries the same PTS
+    (the first later output when the element restamps and every buffer is sampled).
+    Detaching removes every probe, so a disabled profiler costs nothing on the streaming threads.
+    """
+
+    PENDING_LIMIT = 64
+
+    def __init__(self, sample_every=1):
+        self.sample_every = max(1, int(sample_every))
+        self._lock = threading.Lock()
+        self._probes = {}
+        self._pending = {}
+        self._counters = {}
+        self._hists = {}
+
+    def attach(self, elements, kind):
+        """Probe each element's static sink/src pads; elements already probed are skipped."""
+        for name, element in elements.items():
+            if element is None or name in self._probes:
+                continue
+            sink = element.get_static_pad("sink")
+            src = element.get_static_pad("src")
+            if not sink or not src:
+                continue
+            with self._lock:
+                self._pending[name] = {}
+                self._counters[name] = 0
+                self._hists.setdefault(name, (kind, _Histogram()))
+            self._probes[name] = (
+                (sink, sink.add_probe(Gst.PadProbeType.BUFFER, self._on_in, name)),
+                (src, src.add_probe(Gst.PadProbeType.BUFFER, self._on_out, name)),
+            )
+
+    def detach(self):
+        for pads in self._probes.values():
+            for pad, probe_id in pads:
+                pad.remove_probe(probe_id)
+        self._probes = {}
+        with self._lock:
+            self._pending = {}
+
+    def reset(self):
+        with self._lock:
+            self._hists = {}
+            for name in self._pending:
+                self._pending[name] = {}
+
+    @property
+    def attached(self):
+        return bool(self._probes)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: hist.summary(kind) for name, (kind, hist) in self._hists.items()}
+
+    def _on_in(self, _pad, info, name):
+        buf = info.get_buffer()
+        if buf is None:
+            return Gst.PadProbeReturn.OK
+        now = time.perf_counter()
+        with self._lock:
+            self._counters[name] += 1
+            if self._counters[name] % self.sample_every:
+                return Gst.PadProbeReturn.OK
+            pending = self._pending.get(name)
+            if pending is None:
+                return Gst.PadProbeReturn.OK
+            pending[buf.pts] = now
+            if len(pending) > self.PENDING_LIMIT:
+                pending.pop(next(iter(pending)))
+        return Gst.PadProbeReturn.OK
+
+    def _on_out(self, _pad, info, name):
+        buf = info.get_buffer()
+        if buf is None:
+            return Gst.PadProbeReturn.OK
+        now = time.perf_counter()
+        with self._lock:
+            pending = self._pending.get(name)
+            if not pending:
+                return Gst.PadProbeReturn.OK
+            started = pending.pop(buf.pts, None)
+            if started is None:
+                if self.sample_every > 1:
+                    return Gst.PadProbeReturn.OK
+                started = pending.pop(next(iter(pending)))
+            else:
+                # Older entries were aggregated into this output (e.g. opusenc frames).
+                for pts in [pts for pts, ts in pending.items() if ts < started]:
+                    pending.pop(pts)
+            self._hists[name][1].add((now - started) * 1e6)
+        return Gst.PadProbeReturn.OK
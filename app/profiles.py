@@ -0,0 +1,68 @@
+"""Named latency/CPU profiles for MediaEngine.
+
+A profile only supplies defaults: every individual `TCHAT_*` knob still wins when set.
+`balanced` matches the historical hard-coded values.
+"""
+
+DEFAULT_PROFILE = "balanced"
+
+PROFILES = {
+    "low-latency": {
+        "resample_quality": 4,
+        "opus_complexity": 8,
+        "opus_frame_ms": 5,
+        "queue_max_buffers": 3,
+        "jitter_latency_ms": 20,
+        "jitter_min_ms": 5,
+        "jitter_max_ms": 60,
+        "vad_stride": 1,
+        "dfn_vad_link": False,
+    },
+    "low-cpu": {
+        "resample_quality": 2,
+        "opus_complexity": 3,
+        "opus_frame_ms": 40,
+        "queue_max_buffers": 10,
+        "jitter_latency_ms": 40,
+        "jitter_min_ms": 20,
+        "jitter_max_ms": 160,
+        "vad_stride": 2,
+        "dfn_vad_link": False,
+    },
+    "balanced": {
+        "resample_quality": 10,
+        "opus_complexity": 10,
+        "opus_frame_ms": 10,
+        "queue_max_buffers": 10,
+        "jitter_latency_ms": 30,
+        "jitter_min_ms": 10,
+        "jitter_max_ms": 120,
+        "vad_stride": 1,
+        "dfn_vad_link": False,
+    },
+    "quality": {
+        "resample_quality": 10,
+        "opus_complexity": 10,
+        "opus_frame_ms": 20,
+        "queue_max_buffers": 20,
+        "jitter_latency_ms": 60,
+        "jitter_min_ms": 20,
+        "jitter_max_ms": 200,
+        "vad_stride": 1,
+        "dfn_vad_link": True,
+    },
+}
+
+# Frame durations (ms) opusenc accepts as integers; 2.5 ms is left out on purpose.
+OPUS_FRAME_SIZES = (5, 10, 20, 40, 60)
+# Packet times offered in HELLO/ACK. 5 ms stays a local encoder setting: at 200 packets/s the
+# RTP/UDP/IP headers outweigh a speech payload.
+NEGOTIABLE_PTIMES = (10, 20, 40, 60)
+
+
+def resolve(name):
+    """Return (name, settings) for a profile name, falling back to the default on typos."""
+    key = (name or DEFAULT_PROFILE).strip().lower().replace("_", "-")
+    if key not in PROFILES:
+        key = DEFAULT_PROFILE
+    return key, dict(PROFILES[key])
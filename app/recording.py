@@ -0,0 +1,170 @@
+import logging
+import os
+import sys
+import threading
+
+from gi.repository import Gst
+
+
+class OggWriter:
+    """Writes the Opus packets an appsink collects into an Ogg file, off the call's threads.
+
+    The call pipeline only tees packets through a leaky queue into the appsink. This writer pulls
+    them on its own thread and pushes them through a separate appsrc → [opusparse] → oggmux →
+    filesink pipeline, so a slow or failing disk stalls or errors here, never in the call. While
+    the writer is behind, the appsink stays full and the queue in front of it drops the oldest
+    packets.
+    """
+
+    def __init__(self, appsink, path, parse=False, nice=0, max_drain=64, close_timeout=1.0):
+        self.logger = logging.getLogger("Recording")
+        self.appsink = appsink
+        self.path = path
+        # rtpopusdepay output carries no OpusHead/OpusTags; opusparse adds them without decoding.
+        self.parse = parse
+        self.nice = int(nice)
+        self.max_drain = int(max_drain)
+        self.close_timeout = float(close_timeout)
+        self.written = 0
+        self.bytes = 0
+        self.error = None
+        self._pipeline = None
+        self._appsrc = None
+        self._base_pts = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tchat-record", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def request_stop(self):
+        self._stop.set()
+
+    def close(self):
+        """Write what is already queued, end the Ogg stream and wait (bounded) for the file to close."""
+        self._stop.set()
+        self._thread.join(timeout=self.close_timeout + 0.5)
+        if self._thread.is_alive():
+            self.logger.warning("Recording %s did not finish in time; the file may be truncated", self.path)
+
+    def stats(self):
+        return {"path": self.path, "written": self.written, "bytes": self.bytes, "error": self.error}
+
+    def _run(self):
+        self._lower_priority()
+        drained = 0
+        try:
+            while True:
+                stopping = self._stop.is_set()
+                # Action signals, as for the TSM bridge: no GstApp typelib needed.
+                sample = self.appsink.emit("try-pull-sample", 0 if stopping else 100 * Gst.MSECOND)
+                if sample is None:
+                    if stopping or self.appsink.get_property("eos"):
+                        break
+                    continue
+                if not self._push(sample):
+                    break
+                if stopping:
+                    # Live packets keep arriving; take what was queued at stop time, not more.
+                    drained += 1
+                    if drained >= self.max_drain:
+                        break
+        except Exception as exc:
+            self._fail(str(exc))
+        finally:
+            self._finish()
+
+    def _push(self, sample):
+        buf = sample.get_buffer()
+        if buf is None:
+            return True
+        if self._pipeline is None:
+            self._open(sample.get_caps())
+        if self._base_pts is None:
+            self._base_pts = buf.pts if buf.pts != Gst.CLOCK_TIME_NONE else 0
+        # Shares the payload memory; only the timestamps are rebased to start the file at zero.
+        out = buf.copy()
+        if buf.pts != Gst.CLOCK_TIME_NONE:
+            out.pts = max(0, buf.pts - self._base_pts)
+        out.dts = Gst.CLOCK_TIME_NONE
+        ret = self._appsrc.emit("push-buffer", out)
+        message = self._pipeline.get_bus().pop_filtered(Gst.MessageType.ERROR)
+        if message is not None:
+            err, _debug = message.parse_error()
+            self._fail(str(err))
+            return False
+        if ret != Gst.FlowReturn.OK:
+            self._fail(f"push returned {ret.value_nick}")
+            return False
+        self.written += 1
+        self.bytes += buf.get_size()
+        return True
+
+    def _open(self, caps):
+        pipeline = Gst.Pipeline.new("tchat_record")
+        src = Gst.ElementFactory.make("appsrc", None)
+        parse = Gst.ElementFactory.make("opusparse", None) if self.parse else None
+        mux = Gst.ElementFactory.make("oggmux", None)
+        sink = Gst.ElementFactory.make("filesink", None)
+        if not pipeline or not src or not mux or not sink or (self.parse and not parse):
+            raise RuntimeError("appsrc/oggmux/filesink" + ("/opusparse" if self.parse else "") + " not available")
+        if caps is not None:
+            src.set_property("caps", caps)
+        src.set_property("format", Gst.Format.TIME)
+        # Bounded and blocking: a stalled disk holds this thread, and the call's queue drops instead.
+        src.set_property("block", True)
+        src.set_property("max-bytes", 64 * 1024)
+        sink.set_property("location", self.path)
+        sink.set_property("sync", False)
+        sink.set_property("async", False)
+        elements = [element for element in (src, parse, mux, sink) if element is not None]
+        for element in elements:
+            pipeline.add(element)
+        for upstream, downstream in zip(elements, elements[1:]):
+            if not upstream.link(downstream):
+                raise RuntimeError(f"link {upstream.get_name()} → {downstream.get_name()} failed")
+        pipeline.get_bus().set_sync_handler(self._on_bus_sync)
+        self._pipeline, self._appsrc = pipeline, src
+        if pipeline.set_state(Gst.State.PLAYING) == Gst.StateChangeReturn.FAILURE:
+            raise RuntimeError(f"cannot open {self.path}")
+        self.logger.info("Recording to %s", self.path)
+
+    def _on_bus_sync(self, _bus, message):
+        if message.type == Gst.MessageType.STREAM_STATUS:
+            status, _owner = message.parse_stream_status()
+            if status == Gst.StreamStatusType.ENTER:
+                # Posted from the new streaming thread itself: the muxer and file writes run there.
+                self._lower_priority()
+            return Gst.BusSyncReply.DROP
+        return Gst.BusSyncReply.PASS
+
+    def _lower_priority(self):
+        if self.nice <= 0 or not sys.platform.startswith("linux"):
+            return
+        try:
+            # Linux keeps a niceness per thread; the call's threads keep theirs.
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+        except OSError as exc:
+            self.logger.debug("Could not lower recording thread priority: %s", exc)
+
+    def _fail(self, reason):
+        if self.error is None:
+            self.error = reason
+            self.logger.warning("Recording %s failed: %s", self.path, reason)
+
+    def _finish(self):
+        pipeline = self._pipeline
+        if pipeline is None:
+            return
+        if self.error is None:
+            # EOS makes oggmux flush its last page and mark the end of the stream.
+            self._appsrc.emit("end-of-stream")
+            message = pipeline.get_bus().timed_pop_filtered(
+                int(self.close_timeout * Gst.SECOND), Gst.MessageType.EOS | Gst.MessageType.ERROR)
+            if message is None:
+                self._fail("timed out closing the file")
+            elif message.type == Gst.MessageType.ERROR:
+                err, _debug = message.parse_error()
+                self._fail(str(err))
+        pipeline.set_state(Gst.State.NULL)
+        self.logger.info("Recording closed: %s (%d packets, %d bytes)", self.path, self.written, self.bytes)
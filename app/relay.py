@@ -0,0 +1,335 @@
+import logging
+import os
+import selectors
+import signal
+import socket
+import struct
+import threading
+import time
+
+# Sequence number, timestamp and SSRC follow the first two bytes of an RTP header.
+RTP_FIELDS = struct.Struct("!HII")
+
+
+class _Peer:
+    __slots__ = ("peer_id", "ip", "addr", "sock", "level", "last_rx", "rx", "tx",
+                 "source", "ssrc", "seq_offset", "ts_offset", "last_seq", "last_ts", "last_out", "switched_at", "marker")
+
+    def __init__(self, peer_id, ip, port, sock):
+        self.peer_id = peer_id
+        self.ip = ip
+        self.addr = (ip, int(port))
+        self.sock = sock
+        # As a source: smoothed payload size (Opus VBR/DTX makes it track speech) and last arrival.
+        self.level = 0.0
+        self.last_rx = 0.0
+        self.rx = 0
+        self.tx = 0
+        # As a destination: the peer it currently hears and how that stream's headers are mapped.
+        self.source = None
+        self.ssrc = None
+        self.seq_offset = 0
+        self.ts_offset = 0
+        self.last_seq = 0
+        self.last_ts = 0
+        self.last_out = 0.0
+        self.switched_at = 0.0
+        self.marker = False
+
+
+class RtpRelay:
+    """Forwards Opus/RTP between peers without decoding; a hub for small calls.
+
+    Each peer sends to its own local port (its signaling session's RTP port) and is sent one
+    stream back from that port: the most active of the other peers, judged by payload size.
+    While the choice holds, packets go out byte for byte. When it changes, SSRC, sequence number
+    and timestamp are rewritten so the receiver's jitter buffer sees one continuous stream.
+    """
+
+    def __init__(self, metrics=None, clock_rate=48000, hold_ms=None, switch_ratio=None):
+        self.logger = logging.getLogger("Relay")
+        self.metrics = metrics
+        self.clock_rate = int(clock_rate)
+        if hold_ms is None:
+            try:
+                hold_ms = float(os.getenv("TCHAT_RELAY_HOLD_MS", "400"))
+            except ValueError:
+                hold_ms = 400.0
+        if switch_ratio is None:
+            try:
+                switch_ratio = float(os.getenv("TCHAT_RELAY_SWITCH_RATIO", "1.5"))
+            except ValueError:
+                switch_ratio = 1.5
+        try:
+            rcvbuf = int(os.getenv("TCHAT_RELAY_RCVBUF", "1048576"))
+        except ValueError:
+            rcvbuf = 1048576
+        # A source silent this long loses the floor at once.
+        self.stale_s = 0.2
+        self.hold_s = max(0.0, hold_ms / 1000.0)
+        self.switch_ratio = max(1.0, switch_ratio)
+        self.level_smoothing = 0.05
+        self.rcvbuf = rcvbuf
+        self.bind_ip = os.getenv("TCHAT_RELAY_BIND", "0.0.0.0").strip() or "0.0.0.0"
+        self.peers = {}
+        # Copy-on-write snapshot for the forwarding loop, which never takes the lock.
+        self._fanout = ()
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._thread = None
+        self.running = False
+        self.signaling = None
+        self._primary_id = None
+        self.counters = {
+            "received": 0,
+            "forwarded": 0,
+            "rewritten": 0,
+            "switches": 0,
+            "not_selected": 0,
+            "dropped_foreign": 0,
+            "dropped_malformed": 0,
+            "send_errors": 0,
+        }
+
+    def attach(self, signaling):
+        """Relay every call and conference session of a Signaling endpoint."""
+        # No peer anchors a hub: the others stay when the first one hangs up.
+        signaling.anchor_sessions = False
+        signaling.on_connected = self._on_connected
+        signaling.on_disconnected = self._on_disconnected
+        signaling.on_session = self._on_session
+        self.signaling = signaling
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="rtp-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wake()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        for peer_id in list(self.peers):
+            self.remove_peer(peer_id)
+
+    def add_peer(self, peer_id, ip, port, local_port):
+        """Start relaying for a peer that sends to local_port and receives at ip:port."""
+        with self._lock:
+            if peer_id in self.peers:
+                return True
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+            except OSError as exc:
+                self.logger.warning("Failed to set relay UDP buffer size: %s", exc)
+            try:
+                sock.bind((self.bind_ip, int(local_port)))
+            except OSError as exc:
+                sock.close()
+                self.logger.warning("Relay cannot bind RTP port %s for %s: %s", local_port, peer_id, exc)
+                return False
+            sock.setblocking(False)
+            peer = _Peer(peer_id, ip, port, sock)
+            self.peers[peer_id] = peer
+            self._fanout = tuple(self.peers.values())
+            self._selector.register(sock, selectors.EVENT_READ, peer)
+        self.logger.info("Relaying %s: receive on %s, send to %s:%s", peer_id, local_port, ip, port)
+        self._publish()
+        return True
+
+    def remove_peer(self, peer_id):
+        with self._lock:
+            peer = self.peers.pop(peer_id, None)
+            if peer is None:
+                return
+            self._fanout = tuple(self.peers.values())
+            try:
+                self._selector.unregister(peer.sock)
+            except (KeyError, ValueError):
+                pass
+            peer.sock.close()
+            for other in self.peers.values():
+                if other.source is peer:
+                    other.source = None
+        self.logger.info("Stopped relaying %s", peer_id)
+        self._publish()
+
+    def stats(self):
+        return {
+            "peers": len(self.peers),
+            **self.counters,
+            "per_peer": {peer.peer_id: {"rx": peer.rx, "tx": peer.tx} for peer in self._fanout},
+        }
+
+    def _publish(self):
+        if self.metrics:
+            self.metrics.update_relay(self.stats())
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    def _run(self):
+        buf = bytearray(2048)
+        view = memoryview(buf)
+        select = self._selector.select
+        while self.running:
+            for key, _events in select(0.5):
+                peer = key.data
+                if peer is None:
+                    try:
+                        self._wake_r.recv(64)
+                    except OSError:
+                        pass
+                    continue
+                # Drain a burst per wakeup; one select per packet would dominate the cost.
+                for _ in range(64):
+                    try:
+                        size, addr = peer.sock.recvfrom_into(buf)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except OSError:
+                        break
+                    self._forward(peer, view, size, addr, time.monotonic())
+
+    def _forward(self, src, view, size, addr, now):
+        counters = self.counters
+        if size < 12 or view[0] & 0xC0 != 0x80:
+            counters["dropped_malformed"] += 1
+            return
+        if addr[0] != src.ip:
+            counters["dropped_foreign"] += 1
+            return
+        counters["received"] += 1
+        src.rx += 1
+        src.level += (size - 12 - src.level) * self.level_smoothing
+        src.last_rx = now
+        seq, ts, ssrc = RTP_FIELDS.unpack_from(view, 2)
+        for dst in self._fanout:
+            if dst is src:
+                continue
+            if dst.source is not src:
+                if not self._take_floor(dst, src, now):
+                    counters["not_selected"] += 1
+                    continue
+                self._switch(dst, src, seq, ts, ssrc, now)
+            out_seq = (seq + dst.seq_offset) & 0xFFFF
+            out_ts = (ts + dst.ts_offset) & 0xFFFFFFFF
+            dst.last_seq, dst.last_ts, dst.last_out = out_seq, out_ts, now
+            try:
+                if ssrc == dst.ssrc and not dst.seq_offset and not dst.ts_offset and not dst.marker:
+                    dst.sock.sendto(view[:size], dst.addr)
+                else:
+                    packet = bytearray(view[:size])
+                    RTP_FIELDS.pack_into(packet, 2, out_seq, out_ts, dst.ssrc)
+                    if dst.marker:
+                        # First packet from the new talker starts a talkspurt.
+                        packet[1] |= 0x80
+                        dst.marker = False
+                    dst.sock.sendto(packet, dst.addr)
+                    counters["rewritten"] += 1
+            except OSError:
+                counters["send_errors"] += 1
+                continue
+            dst.tx += 1
+            counters["forwarded"] += 1
+
+    def _take_floor(self, dst, src, now):
+        current = dst.source
+        if current is None or now - current.last_rx > self.stale_s:
+            return True
+        if now - dst.switched_at < self.hold_s:
+            return False
+        return src.level > current.level * self.switch_ratio
+
+    def _switch(self, dst, src, seq, ts, ssrc, now):
+        if dst.ssrc is None:
+            # The first stream a destination hears goes out unchanged.
+            dst.ssrc = ssrc
+        else:
+            # Continue the destination's stream: next sequence number, timestamp advanced by wall time.
+            elapsed = max(1, int(round((now - dst.last_out) * self.clock_rate)))
+            dst.seq_offset = (dst.last_seq + 1 - seq) & 0xFFFF
+            dst.ts_offset = (dst.last_ts + elapsed - ts) & 0xFFFFFFFF
+            dst.marker = True
+            self.counters["switches"] += 1
+        dst.source = src
+        dst.switched_at = now
+
+    def _on_connected(self, remote_info):
+        ip, signaling_port, rtp_port, call_id = remote_info[:4]
+        if rtp_port is None:
+            rtp_port = max(1, signaling_port - 1)
+        self._primary_id = call_id
+        self.add_peer(call_id, ip, rtp_port, self.signaling.local_rtp_port)
+
+    def _on_disconnected(self):
+        primary, self._primary_id = self._primary_id, None
+        if primary:
+            self.remove_peer(primary)
+
+    def _on_session(self, event, info):
+        ip, signaling_port, rtp_port, call_id, local_rtp_port = info
+        if event == "removed":
+            self.remove_peer(call_id)
+            return
+        if rtp_port is None:
+            rtp_port = max(1, signaling_port - 1)
+        self.add_peer(call_id, ip, rtp_port, local_rtp_port)
+
+
+def run(args):
+    """`app.main --relay`: signaling plus RtpRelay, no audio devices or GStreamer pipeline."""
+    from .metrics import Metrics
+    from .signaling import Signaling
+
+    logger = logging.getLogger("Relay")
+    metrics = Metrics()
+    max_sessions = args.conference
+    if not max_sessions:
+        try:
+            max_sessions = int(os.getenv("TCHAT_MAX_SESSIONS", "8"))
+        except ValueError:
+            max_sessions = 8
+    signaling = Signaling(metrics=metrics, max_sessions=max(2, max_sessions))
+    relay = RtpRelay(metrics)
+    relay.attach(signaling)
+    done = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_args: done.set())
+    try:
+        signaling.start_listen(args.port + 1, rtp_port=args.port)
+    except OSError as exc:
+        logger.error("Start failed: %s", exc)
+        return 1
+    relay.start()
+    logger.info("Relay up: signaling %d, RTP from %d (up to %d peers)", args.port + 1, args.port, signaling.max_sessions)
+    deadline = time.monotonic() + args.exit_after if args.exit_after is not None else None
+    interval = args.metrics_log if args.metrics_log > 0 else 1.0
+    try:
+        while True:
+            timeout = interval if deadline is None else max(0.0, min(interval, deadline - time.monotonic()))
+            if done.wait(timeout) or (deadline is not None and time.monotonic() >= deadline):
+                break
+            stats = relay.stats()
+            metrics.update_relay(stats)
+            if args.metrics_log > 0:
+                logger.info(
+                    "peers=%d received=%d forwarded=%d rewritten=%d switches=%d dropped=%d",
+                    stats["peers"], stats["received"], stats["forwarded"], stats["rewritten"], stats["switches"],
+                    stats["dropped_foreign"] + stats["dropped_malformed"] + stats["send_errors"],
+                )
+    finally:
+        signaling.hangup()
+        signaling.stop()
+        relay.stop()
+    return 0
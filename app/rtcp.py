@@ -0,0 +1,53 @@
+# Fields of each `source-stats` entry that summarize() reads.
+SOURCE_FIELDS = (
+    "internal", "ssrc", "is-sender", "clock-rate", "packets-received", "packets-lost", "jitter",
+    "sent-rb", "sent-rb-fractionlost", "sent-rb-packetslost",
+    "have-rb", "rb-fractionlost", "rb-packetslost", "rb-jitter", "rb-round-trip",
+)
+
+
+def summarize(sources, clock_rate):
+    """Receive/send loss and jitter plus RTT for the far end's source.
+
+    `sources` are dicts of SOURCE_FIELDS. "receive" is the peer's stream as we measure it
+    (what our receiver reports say); "send" is our stream as the peer's reports describe it.
+    Fraction lost is per report interval; jitter is RFC 3550 interarrival jitter.
+    """
+    remote = [source for source in sources if not source.get("internal")]
+    if not remote:
+        return {}
+    # After an SSRC change the old source lingers until it times out; follow the busiest one.
+    peer = max(remote, key=lambda source: (bool(source.get("have-rb")), source.get("packets-received") or 0))
+    rate = peer.get("clock-rate") or 0
+    rate = rate if rate > 0 else clock_rate
+    summary = {"ssrc": peer.get("ssrc"), "rtt_ms": None, "receive": {}, "send": {}}
+    if peer.get("is-sender") or peer.get("packets-received"):
+        summary["receive"] = {
+            "packets_received": peer.get("packets-received"),
+            "packets_lost": peer.get("packets-lost"),
+            "jitter_ms": _jitter_ms(peer.get("jitter"), rate),
+            "fraction_lost_pct": _fraction_pct(peer.get("sent-rb-fractionlost")) if peer.get("sent-rb") else None,
+        }
+    if peer.get("have-rb"):
+        summary["send"] = {
+            "packets_lost": peer.get("rb-packetslost"),
+            "jitter_ms": _jitter_ms(peer.get("rb-jitter"), clock_rate),
+            "fraction_lost_pct": _fraction_pct(peer.get("rb-fractionlost")),
+        }
+        round_trip = peer.get("rb-round-trip")
+        if round_trip:
+            # NTP short format: 1/65536 s.
+            summary["rtt_ms"] = round(round_trip * 1000.0 / 65536.0, 2)
+    return summary
+
+
+def _jitter_ms(units, rate):
+    if units is None or not rate:
+        return None
+    return round(units * 1000.0 / rate, 2)
+
+
+def _fraction_pct(fraction):
+    if fraction is None:
+        return None
+    return round(fraction * 100.0 / 256.0, 2)
@@ -5,16 +5,45 @@ import socket
 import threading
 import time
 import uuid
+from collections import OrderedDict, deque
+
+from .profiles import NEGOTIABLE_PTIMES
 
 
 class Signaling:
     """Minimal HELLO/ACK/KEEPALIVE/BYE signaling over UDP."""
 
-    def __init__(self, on_connected=None, on_disconnected=None, on_incoming=None):
+    REPORT_FIELDS = ("received", "lost", "late", "duplicates", "loss_pct", "interval_ms")
+    # Conference sessions after the first receive RTP at local_rtp_port + stride * slot
+    # (the first call keeps local_rtp_port, +1 signaling and +2 RTCP).
+    SESSION_PORT_STRIDE = 10
+    MAX_HELLO_RETRIES = 5
+    # Rate-limit buckets kept at once; the least recently seen source is forgotten first.
+    MAX_BUCKETS = 4096
+
+    def __init__(
+        self,
+        on_connected=None,
+        on_disconnected=None,
+        on_incoming=None,
+        metrics=None,
+        on_early_media=None,
+        on_early_media_cancel=None,
+        on_report=None,
+        on_ptime=None,
+        on_session=None,
+        max_sessions=None,
+    ):
         self.logger = logging.getLogger("Signaling")
+        self.metrics = metrics
         self.on_connected = on_connected
         self.on_disconnected = on_disconnected
         self.on_incoming = on_incoming
+        self.on_early_media = on_early_media
+        self.on_early_media_cancel = on_early_media_cancel
+        self.on_report = on_report
+        self.on_ptime = on_ptime
+        self.on_session = on_session
         self.sock = None
         self.recv_thread = None
         self.keepalive_thread = None
@@ -23,16 +52,43 @@ class Signaling:
         self.remote_addr = None
         self.remote_rtp_port = None
         self.local_rtp_port = None
+        self.ptime_ms = None
+        self.remote_ptime_ms = None
+        self.negotiated_ptime_ms = None
         self.local_port = None
         self.call_id = None
         self.tie = None
         self.last_seen = 0.0
         self.keepalive_misses = 0
         self.lock = threading.RLock()
+        # Callbacks raised under self.lock wait here and run after it is released (_run_deferred),
+        # so a handler can take its own locks or call back into us without inverting the order.
+        self._deferred = deque()
+        self._delivering = threading.Lock()
         self.bind_ip = os.getenv("TCHAT_SIGNAL_BIND", "0.0.0.0").strip() or "0.0.0.0"
         self.token = os.getenv("TCHAT_SIGNAL_TOKEN", "").strip()
         allowlist_raw = os.getenv("TCHAT_SIGNAL_ALLOWLIST", "").strip()
         self.allowlist = {item for item in allowlist_raw.replace(" ", ",").split(",") if item}
+        self._token_marker = json.dumps(self.token).encode("utf-8") if self.token else None
+        try:
+            rate = float(os.getenv("TCHAT_SIGNAL_RATE", "50"))
+        except ValueError:
+            rate = 50.0
+        try:
+            burst = float(os.getenv("TCHAT_SIGNAL_BURST", "100"))
+        except ValueError:
+            burst = 100.0
+        self.rate_limit = max(0.0, rate)
+        self.rate_burst = max(1.0, burst)
+        self._buckets = OrderedDict()
+        self.rx_counters = {
+            "accepted": 0,
+            "dropped_allowlist": 0,
+            "dropped_rate": 0,
+            "dropped_malformed": 0,
+            "dropped_token": 0,
+        }
+        self._rx_dropped_reported = 0
         try:
             interval = float(os.getenv("TCHAT_KEEPALIVE_INTERVAL", "1.0"))
         except ValueError:
@@ -48,6 +104,31 @@ class Signaling:
         self.keepalive_interval = max(0.2, interval)
         self.keepalive_timeout = max(1.0, timeout)
         self.keepalive_max_misses = max(1, misses)
+        early_raw = os.getenv("TCHAT_EARLY_MEDIA", "").strip().lower()
+        self.early_media = early_raw not in ("", "0", "false", "no", "off")
+        self._early_call_id = None
+        try:
+            stagger_ms = float(os.getenv("TCHAT_DIAL_STAGGER_MS", "250"))
+        except ValueError:
+            stagger_ms = 250.0
+        self.dial_stagger = max(0.0, stagger_ms / 1000.0)
+        self.dial_results = []
+        self._dial_timers = []
+        self.rtt_ms = None
+        self.rtt_var_ms = None
+        self.clock_offset_ms = None
+        self._timing_samples = deque(maxlen=8)
+        # Conference: the first call is the primary session (state/remote_addr/call_id above);
+        # further peers live in self.sessions, keyed by their signaling address.
+        if max_sessions is None:
+            try:
+                max_sessions = int(os.getenv("TCHAT_MAX_SESSIONS", "1"))
+            except ValueError:
+                max_sessions = 1
+        self.max_sessions = max(1, int(max_sessions))
+        self.sessions = {}
+        # Whether the other sessions end with the first call (a relay has no anchor peer).
+        self.anchor_sessions = True
 
     def set_local_rtp_port(self, port):
         try:
@@ -89,6 +170,7 @@ class Signaling:
 
     def stop(self):
         self.running = False
+        self._cancel_dial_timers()
         if self.sock:
             try:
                 self.sock.close()
@@ -105,6 +187,10 @@ class Signaling:
         self.remote_addr = None
         self.remote_rtp_port = None
         self.keepalive_misses = 0
+        self._reset_timing()
+        with self.lock:
+            self.sessions = {}
+            self._publish_sessions()
 
     def call(self, remote_ip, remote_port):
         with self.lock:
@@ -112,49 +198,299 @@ class Signaling:
             self.call_id = str(uuid.uuid4())
             self.tie = int(uuid.uuid4().int & 0x7FFFFFFF)
             self.state = "calling"
+            self._reset_timing()
+            self._cancel_dial_timers()
+            self.dial_results = []
         self.logger.info("Calling %s:%d", remote_ip, remote_port)
-        self._send({"type": "HELLO", "call_id": self.call_id, "tie": self.tie, "rtp_port": self.local_rtp_port})
+        self._send({"type": "HELLO", "call_id": self.call_id, "tie": self.tie, **self._media_fields()})
+        with self.lock:
+            self._start_early_media(self.remote_addr, None)
+        self._run_deferred()
         if self.on_incoming:
             self.on_incoming(remote_ip, remote_port)
 
+    def add_call(self, remote_ip, remote_port):
+        """Dial one more peer into the current call (conference); with no call up this is call()."""
+        addr = (remote_ip, int(remote_port))
+        with self.lock:
+            if self.state != "idle":
+                if addr == self.remote_addr or addr in self.sessions:
+                    return False
+                session = self._new_session(addr, str(uuid.uuid4()), "calling")
+                if session is None:
+                    self.logger.warning("No free conference slot for %s:%d (max %d)", addr[0], addr[1], self.max_sessions)
+                    return False
+                self.logger.info("Adding %s:%d to the call (slot %d)", addr[0], addr[1], session["slot"])
+                self._send_session_hello(session)
+                return True
+        self.call(remote_ip, remote_port)
+        return True
+
+    def call_candidates(self, candidates):
+        """Dial several addresses of one peer with staggered HELLOs; the first ACK wins, the rest get BYE."""
+        candidates = [(ip, int(port)) for ip, port in candidates]
+        if len(candidates) <= 1:
+            if candidates:
+                self.call(*candidates[0])
+            return
+        with self.lock:
+            self._cancel_dial_timers()
+            base_id = str(uuid.uuid4())
+            self.remote_addr = None
+            self.call_id = base_id
+            self.tie = int(uuid.uuid4().int & 0x7FFFFFFF)
+            self.state = "calling"
+            self._reset_timing()
+            # Each candidate gets its own call_id so a cancelling BYE can never
+            # tear down the winning session when two addresses reach the same host.
+            self.dial_results = [
+                {"addr": addr, "call_id": f"{base_id}-{idx}", "state": "pending", "started": None, "setup_ms": None}
+                for idx, addr in enumerate(candidates)
+            ]
+            pending = list(self.dial_results)
+        self.logger.info(
+            "Dialing %d candidates in parallel (stagger %.0f ms): %s",
+            len(pending),
+            self.dial_stagger * 1000.0,
+            ", ".join(f"{ip}:{port}" for ip, port in candidates),
+        )
+        for idx, candidate in enumerate(pending):
+            delay = idx * self.dial_stagger
+            if delay <= 0.0:
+                self._start_candidate(candidate)
+                continue
+            timer = threading.Timer(delay, self._start_candidate, args=(candidate,))
+            timer.daemon = True
+            with self.lock:
+                self._dial_timers.append(timer)
+            timer.start()
+
+    def _start_candidate(self, candidate):
+        with self.lock:
+            if self.state != "calling" or candidate["state"] != "pending":
+                return
+            candidate["state"] = "dialing"
+            candidate["started"] = time.monotonic()
+            self._send_candidate_hello(candidate)
+
+    def _send_candidate_hello(self, candidate):
+        self._send(
+            {"type": "HELLO", "call_id": candidate["call_id"], "tie": self.tie, **self._media_fields()},
+            addr=candidate["addr"],
+        )
+
+    def _send_hello(self):
+        if self._dial_active():
+            for candidate in self.dial_results:
+                if candidate["state"] == "dialing":
+                    self._send_candidate_hello(candidate)
+            return
+        self._send({"type": "HELLO", "call_id": self.call_id, "tie": self.tie, **self._media_fields()})
+
+    def _dial_active(self):
+        return self.state == "calling" and any(c["state"] in ("pending", "dialing") for c in self.dial_results)
+
+    def _find_candidate(self, call_id):
+        if not call_id:
+            return None
+        for candidate in self.dial_results:
+            if candidate["call_id"] == call_id and candidate["state"] != "won":
+                return candidate
+        return None
+
+    def _handle_candidate_ack(self, candidate, msg, addr, recv_ts):
+        if candidate["setup_ms"] is None and candidate["started"] is not None:
+            candidate["setup_ms"] = (time.monotonic() - candidate["started"]) * 1000.0
+        if self.state != "calling" or candidate["state"] != "dialing":
+            # Lost the race: release whatever the peer set up on this path.
+            self._send({"type": "BYE", "call_id": candidate["call_id"]}, addr=addr)
+            self._publish_dial_results()
+            return
+        candidate["state"] = "won"
+        self._cancel_dial_timers()
+        for other in self.dial_results:
+            if other is candidate:
+                continue
+            if other["state"] == "dialing":
+                self._send({"type": "BYE", "call_id": other["call_id"]}, addr=other["addr"])
+            if other["state"] in ("pending", "dialing"):
+                other["state"] = "cancelled"
+        self.logger.info(
+            "Candidate %s:%d won after %.1f ms",
+            candidate["addr"][0],
+            candidate["addr"][1],
+            candidate["setup_ms"] or 0.0,
+        )
+        self.remote_addr = addr
+        self.call_id = candidate["call_id"]
+        remote_rtp = msg.get("rtp_port")
+        if remote_rtp is not None:
+            try:
+                self.remote_rtp_port = int(remote_rtp)
+            except (TypeError, ValueError):
+                self.remote_rtp_port = None
+        self._take_remote_ptime(msg)
+        self._publish_dial_results()
+        if recv_ts is not None:
+            self._update_timing(msg, recv_ts)
+        self._set_connected()
+
+    def _cancel_dial(self, state):
+        self._cancel_dial_timers()
+        for candidate in self.dial_results:
+            if candidate["state"] == "dialing":
+                self._send({"type": "BYE", "call_id": candidate["call_id"]}, addr=candidate["addr"])
+            if candidate["state"] in ("pending", "dialing"):
+                candidate["state"] = state
+        if self.dial_results:
+            self._publish_dial_results()
+
+    def _cancel_dial_timers(self):
+        timers = self._dial_timers
+        self._dial_timers = []
+        for timer in timers:
+            timer.cancel()
+
+    def _publish_dial_results(self):
+        winner = None
+        summary = []
+        for candidate in self.dial_results:
+            label = f"{candidate['addr'][0]}:{candidate['addr'][1]}"
+            if candidate["state"] == "won":
+                winner = label
+            summary.append({"addr": label, "state": candidate["state"], "setup_ms": candidate["setup_ms"]})
+        if self.metrics:
+            self.metrics.update_dial_results(winner, summary)
+
+    def send_report(self, report):
+        """Send a receiver report (loss counters for the peer's RTP) on the established call."""
+        with self.lock:
+            if self.state != "connected":
+                return
+            fields = {key: report[key] for key in self.REPORT_FIELDS if key in report}
+            self._send({"type": "REPORT", "call_id": self.call_id, **fields})
+
+    def set_ptime(self, ptime_ms):
+        """Set our preferred packet time (ms); re-offered to the peer while a call is up."""
+        with self.lock:
+            self.ptime_ms = self._valid_ptime(ptime_ms)
+            self._renegotiate_ptime()
+            if self.state == "connected":
+                self._send({"type": "HELLO", "call_id": self.call_id, "tie": self.tie, **self._media_fields()})
+        self._run_deferred()
+
+    def _media_fields(self):
+        fields = {"rtp_port": self.local_rtp_port}
+        if self.ptime_ms:
+            fields["ptime"] = self.ptime_ms
+        return fields
+
+    def _valid_ptime(self, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or int(value) not in NEGOTIABLE_PTIMES:
+            return None
+        return int(value)
+
+    def _take_remote_ptime(self, msg):
+        # No (or no valid) ptime: a peer without a preference, which leaves ours in charge.
+        self.remote_ptime_ms = self._valid_ptime(msg.get("ptime"))
+        self._renegotiate_ptime()
+
+    def _renegotiate_ptime(self):
+        """Both ends use the larger preference, so neither sends more packets than it asked for."""
+        ptime = None
+        if self.remote_ptime_ms:
+            ptime = max(self.remote_ptime_ms, self.ptime_ms or 0)
+        if ptime == self.negotiated_ptime_ms:
+            return
+        self.negotiated_ptime_ms = ptime
+        if ptime:
+            self.logger.info("Packet time %d ms (ours %s, peer %d)", ptime, self.ptime_ms or "-", self.remote_ptime_ms)
+        self._defer(self.on_ptime, ptime)
+
     def hangup(self):
+        with self.lock:
+            for session in list(self.sessions.values()):
+                self._end_session(session, "local hangup", send_bye=True)
         if self.remote_addr:
             self._send({"type": "BYE"})
         self._set_disconnected("local hangup")
+        self._run_deferred()
 
     def _set_connected(self):
         if self.state != "connected":
             self.state = "connected"
             self.last_seen = time.monotonic()
             self.keepalive_misses = 0
+            self._early_call_id = None
             self.logger.info("Call connected to %s:%d", self.remote_addr[0], self.remote_addr[1])
-            if self.on_connected:
-                remote_info = (self.remote_addr[0], self.remote_addr[1], self.remote_rtp_port)
-                self.on_connected(remote_info)
+            remote_info = (self.remote_addr[0], self.remote_addr[1], self.remote_rtp_port, self.call_id)
+            self._defer(self.on_connected, remote_info)
+
+    def _start_early_media(self, addr, rtp_port):
+        """Hand the peer's media address to the engine before the handshake completes."""
+        if not self.early_media or not self.on_early_media or not addr:
+            return
+        self._early_call_id = self.call_id
+        self._defer(self.on_early_media, (addr[0], addr[1], rtp_port, self.call_id))
+
+    def _cancel_early_media(self):
+        call_id = self._early_call_id
+        self._early_call_id = None
+        if call_id and self.on_early_media_cancel:
+            self.logger.info("Dropping early media for call %s", call_id)
+            self._defer(self.on_early_media_cancel, call_id)
 
     def _set_disconnected(self, reason):
         with self.lock:
             if self.state != "idle":
                 self.logger.info("Disconnected: %s", reason)
+            self._cancel_early_media()
+            if self._dial_active():
+                self._cancel_dial("failed")
+            if self.anchor_sessions:
+                for session in list(self.sessions.values()):
+                    self._end_session(session, "call ended", send_bye=True)
             self.state = "idle"
             self.remote_addr = None
             self.call_id = None
             self.remote_rtp_port = None
+            self.remote_ptime_ms = None
+            self._renegotiate_ptime()
             self.keepalive_misses = 0
-        if self.on_disconnected:
-            self.on_disconnected()
+            self._reset_timing()
+            self._defer(self.on_disconnected)
 
-    def _send(self, payload):
+    def _defer(self, callback, *args):
+        if callback:
+            with self.lock:
+                self._deferred.append((callback, args))
+
+    def _run_deferred(self):
+        """Run queued callbacks in order; call only where this thread does not hold self.lock."""
+        # One thread delivers at a time; a callback that calls back into us leaves the rest to it.
+        while self._deferred and self._delivering.acquire(blocking=False):
+            try:
+                while True:
+                    with self.lock:
+                        if not self._deferred:
+                            break
+                        callback, args = self._deferred.popleft()
+                    callback(*args)
+            finally:
+                self._delivering.release()
+
+    def _send(self, payload, addr=None):
         with self.lock:
-            if not self.sock or not self.remote_addr:
+            target = addr or self.remote_addr
+            if not self.sock or not target:
                 return
             payload = dict(payload)
             payload["ts"] = time.time()
-            payload["id"] = self.call_id
+            payload["id"] = payload.get("call_id") or self.call_id
             if self.token:
                 payload["token"] = self.token
             try:
-                self.sock.sendto(json.dumps(payload).encode("utf-8"), self.remote_addr)
+                self.sock.sendto(json.dumps(payload).encode("utf-8"), target)
             except OSError as exc:
                 self.logger.warning("Send failed: %s", exc)
 
@@ -162,6 +498,41 @@ class Signaling:
         self.last_seen = time.monotonic()
         self.keepalive_misses = 0
 
+    def _reset_timing(self):
+        self.rtt_ms = None
+        self.rtt_var_ms = None
+        self.clock_offset_ms = None
+        self._timing_samples.clear()
+        if self.metrics:
+            self.metrics.clear_network_timing()
+
+    def _update_timing(self, msg, recv_ts):
+        """NTP-style RTT/offset from an echoed timestamp (t1=echo_ts, t2=recv_ts, t3=ts, t4=local arrival)."""
+        try:
+            t1 = float(msg["echo_ts"])
+            t2 = float(msg["recv_ts"])
+            t3 = float(msg["ts"])
+        except (KeyError, TypeError, ValueError):
+            return
+        t4 = float(recv_ts)
+        rtt = (t4 - t1) - (t3 - t2)
+        if rtt < 0.0 or rtt > self.keepalive_timeout:
+            return
+        offset = ((t2 - t1) + (t3 - t4)) / 2.0
+        rtt_ms = rtt * 1000.0
+        if self.rtt_ms is None:
+            self.rtt_ms = rtt_ms
+            self.rtt_var_ms = rtt_ms / 2.0
+        else:
+            # RFC 6298 smoothing.
+            self.rtt_var_ms = 0.75 * self.rtt_var_ms + 0.25 * abs(self.rtt_ms - rtt_ms)
+            self.rtt_ms = 0.875 * self.rtt_ms + 0.125 * rtt_ms
+        # Clock filter: the sample with the smallest RTT has the least asymmetric queuing.
+        self._timing_samples.append((rtt_ms, offset * 1000.0))
+        self.clock_offset_ms = min(self._timing_samples)[1]
+        if self.metrics:
+            self.metrics.update_network_timing(self.rtt_ms, self.rtt_var_ms, self.clock_offset_ms)
+
     def _recv_loop(self):
         while self.running:
             try:
@@ -170,44 +541,91 @@ class Signaling:
                 continue
             except OSError:
                 break
+            recv_ts = time.time()
+            # Cheapest checks first: nothing is decoded until the source is welcome.
+            if self.allowlist and addr[0] not in self.allowlist:
+                self.rx_counters["dropped_allowlist"] += 1
+                continue
+            # The established peer is exempt so a flood sharing its IP cannot starve keepalives.
+            established = (self.state == "connected" and addr == self.remote_addr) or addr in self.sessions
+            if not established and not self._take_token(addr[0]):
+                self.rx_counters["dropped_rate"] += 1
+                continue
+            if not data.startswith(b"{"):
+                self.rx_counters["dropped_malformed"] += 1
+                continue
+            if self._token_marker and self._token_marker not in data:
+                self.rx_counters["dropped_token"] += 1
+                continue
             try:
                 decoded = data.decode("utf-8")
                 msg = json.loads(decoded)
             except (UnicodeDecodeError, json.JSONDecodeError):
+                self.rx_counters["dropped_malformed"] += 1
+                continue
+            if not isinstance(msg, dict):
+                self.rx_counters["dropped_malformed"] += 1
                 continue
             if not self._accept_message(msg, addr):
+                self.rx_counters["dropped_token"] += 1
                 continue
-            msg_type = msg.get("type")
-            if msg_type == "HELLO":
-                self._handle_hello(msg, addr)
-            elif msg_type == "ACK":
-                self._handle_ack(msg, addr)
-            elif msg_type == "KEEPALIVE":
-                self._handle_keepalive(msg, addr)
-            elif msg_type == "BYE":
-                self._handle_bye(msg, addr)
-            elif msg_type == "BUSY":
-                self._handle_busy(addr)
+            try:
+                self._dispatch(msg, addr, recv_ts)
+            except (TypeError, ValueError) as exc:
+                # Valid JSON with a field of the wrong type: drop it, never the receive loop.
+                self.rx_counters["dropped_malformed"] += 1
+                self.logger.debug("Malformed message from %s:%d dropped: %s", addr[0], addr[1], exc)
+            else:
+                self.rx_counters["accepted"] += 1
+            self._run_deferred()
+
+    def _dispatch(self, msg, addr, recv_ts):
+        msg_type = msg.get("type")
+        if addr in self.sessions:
+            self._handle_session_message(msg_type, msg, addr, recv_ts)
+        elif msg_type == "HELLO":
+            self._handle_hello(msg, addr, recv_ts)
+        elif msg_type == "ACK":
+            self._handle_ack(msg, addr, recv_ts)
+        elif msg_type == "KEEPALIVE":
+            self._handle_keepalive(msg, addr, recv_ts)
+        elif msg_type == "KEEPALIVE_ACK":
+            self._handle_keepalive_ack(msg, addr, recv_ts)
+        elif msg_type == "BYE":
+            self._handle_bye(msg, addr)
+        elif msg_type == "BUSY":
+            self._handle_busy(addr)
+        elif msg_type == "REPORT":
+            self._handle_report(msg, addr)
 
-    def _handle_hello(self, msg, addr):
+    def _handle_hello(self, msg, addr, recv_ts=None):
         remote_tie = int(msg.get("tie", 0))
         remote_rtp = msg.get("rtp_port")
+        echo = self._echo_fields(msg, recv_ts)
         with self.lock:
+            if self.max_sessions > 1 and self.state != "idle" and addr != self.remote_addr and not self._is_candidate(addr):
+                self._accept_session(msg, addr, echo)
+                return
             if self.state == "calling":
                 if remote_tie > (self.tie or 0):
                     self.logger.info("Incoming HELLO from %s:%d (tie won, accepting)", addr[0], addr[1])
+                    self._cancel_early_media()
+                    if self._dial_active():
+                        self._cancel_dial("cancelled")
                     self.remote_addr = addr
                     if remote_rtp is not None:
                         try:
                             self.remote_rtp_port = int(remote_rtp)
                         except (TypeError, ValueError):
                             self.remote_rtp_port = None
+                    self._take_remote_ptime(msg)
                     self.call_id = msg.get("call_id") or self.call_id
-                    self._send({"type": "ACK", "call_id": self.call_id, "rtp_port": self.local_rtp_port})
+                    self._start_early_media(addr, self.remote_rtp_port)
+                    self._send({"type": "ACK", "call_id": self.call_id, **self._media_fields(), **echo})
                     self._set_connected()
                 else:
                     self.logger.info("Incoming HELLO from %s:%d (tie lost, rejecting)", addr[0], addr[1])
-                    self._send({"type": "BUSY"})
+                    self._send({"type": "BUSY"}, addr=addr)
                 return
             if self.state == "connected":
                 if addr == self.remote_addr:
@@ -216,7 +634,8 @@ class Signaling:
                             self.remote_rtp_port = int(remote_rtp)
                         except (TypeError, ValueError):
                             self.remote_rtp_port = None
-                    self._send({"type": "ACK", "call_id": self.call_id, "rtp_port": self.local_rtp_port})
+                    self._take_remote_ptime(msg)
+                    self._send({"type": "ACK", "call_id": self.call_id, **self._media_fields(), **echo})
                     self._mark_seen()
                 return
             self.logger.info("Client connected from %s:%d", addr[0], addr[1])
@@ -226,14 +645,21 @@ class Signaling:
                     self.remote_rtp_port = int(remote_rtp)
                 except (TypeError, ValueError):
                     self.remote_rtp_port = None
+            self._take_remote_ptime(msg)
             self.call_id = msg.get("call_id") or str(uuid.uuid4())
             self.tie = int(uuid.uuid4().int & 0x7FFFFFFF)
-            self._send({"type": "ACK", "call_id": self.call_id, "rtp_port": self.local_rtp_port})
+            if self.remote_rtp_port is not None:
+                self._start_early_media(addr, self.remote_rtp_port)
+            self._send({"type": "ACK", "call_id": self.call_id, **self._media_fields(), **echo})
             self._set_connected()
 
-    def _handle_ack(self, msg, addr):
+    def _handle_ack(self, msg, addr, recv_ts=None):
         with self.lock:
             msg_id = msg.get("call_id") or msg.get("id")
+            candidate = self._find_candidate(msg_id)
+            if candidate is not None:
+                self._handle_candidate_ack(candidate, msg, addr, recv_ts)
+                return
             if self.call_id and msg_id and msg_id != self.call_id:
                 return
             if self.state == "calling" and addr == self.remote_addr:
@@ -243,17 +669,42 @@ class Signaling:
                         self.remote_rtp_port = int(remote_rtp)
                     except (TypeError, ValueError):
                         self.remote_rtp_port = None
+                self._take_remote_ptime(msg)
+                if recv_ts is not None:
+                    self._update_timing(msg, recv_ts)
                 self._set_connected()
             elif self.state == "connected" and addr == self.remote_addr:
                 self._mark_seen()
+                # Answer to a mid-call re-offer (set_ptime).
+                self._take_remote_ptime(msg)
+                if recv_ts is not None:
+                    self._update_timing(msg, recv_ts)
 
-    def _handle_keepalive(self, msg, addr):
+    def _handle_keepalive(self, msg, addr, recv_ts=None):
         with self.lock:
             msg_id = msg.get("call_id") or msg.get("id")
             if self.call_id and msg_id and msg_id != self.call_id:
                 return
             if self.remote_addr and addr == self.remote_addr:
                 self._mark_seen()
+                echo = self._echo_fields(msg, recv_ts)
+                if echo:
+                    self._send({"type": "KEEPALIVE_ACK", **echo})
+
+    def _handle_keepalive_ack(self, msg, addr, recv_ts):
+        with self.lock:
+            msg_id = msg.get("call_id") or msg.get("id")
+            if self.call_id and msg_id and msg_id != self.call_id:
+                return
+            if self.state == "connected" and addr == self.remote_addr:
+                self._mark_seen()
+                self._update_timing(msg, recv_ts)
+
+    def _echo_fields(self, msg, recv_ts=None):
+        ts = msg.get("ts")
+        if not isinstance(ts, (int, float)):
+            return {}
+        return {"echo_ts": ts, "recv_ts": recv_ts if recv_ts is not None else time.time()}
 
     def _handle_bye(self, msg, addr):
         msg_id = msg.get("call_id") or msg.get("id")
@@ -262,23 +713,48 @@ class Signaling:
         if self.remote_addr and addr == self.remote_addr:
             self._set_disconnected("remote bye")
 
+    def _handle_report(self, msg, addr):
+        with self.lock:
+            msg_id = msg.get("call_id") or msg.get("id")
+            if self.call_id and msg_id and msg_id != self.call_id:
+                return
+            if self.state != "connected" or addr != self.remote_addr:
+                return
+            self._mark_seen()
+        report = {}
+        for key in self.REPORT_FIELDS:
+            value = msg.get(key)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                self.rx_counters["dropped_malformed"] += 1
+                return
+            report[key] = value
+        if self.on_report:
+            self.on_report(report)
+
     def _handle_busy(self, addr):
         with self.lock:
+            if self._dial_active():
+                for candidate in self.dial_results:
+                    if candidate["addr"] == addr and candidate["state"] == "dialing":
+                        candidate["state"] = "busy"
+                if self._dial_active():
+                    return
             if self.state == "calling":
                 self.logger.info("Remote is busy")
                 self._set_disconnected("remote busy")
 
     def _keepalive_loop(self):
         hello_retries = 0
-        max_hello_retries = 5
+        max_hello_retries = self.MAX_HELLO_RETRIES
         while self.running:
             time.sleep(self.keepalive_interval)
+            self._publish_rx_counters()
             with self.lock:
                 if self.state == "calling":
                     hello_retries += 1
                     if hello_retries <= max_hello_retries:
                         self.logger.info("Retrying HELLO (%d/%d)", hello_retries, max_hello_retries)
-                        self._send({"type": "HELLO", "call_id": self.call_id, "tie": self.tie, "rtp_port": self.local_rtp_port})
+                        self._send_hello()
                     else:
                         self._set_disconnected("no response")
                         hello_retries = 0
@@ -296,12 +772,204 @@ class Signaling:
                             self._set_disconnected("keepalive timeout")
                 else:
                     hello_retries = 0
+                self._session_keepalives()
+            self._run_deferred()
+
+    def _new_session(self, addr, call_id, state):
+        used = {session["slot"] for session in self.sessions.values()}
+        slot = next((slot for slot in range(1, self.max_sessions) if slot not in used), None)
+        if slot is None:
+            return None
+        local_rtp = self.local_rtp_port + self.SESSION_PORT_STRIDE * slot if self.local_rtp_port is not None else None
+        session = {
+            "addr": addr,
+            "call_id": call_id,
+            "slot": slot,
+            "state": state,
+            "remote_rtp_port": None,
+            "local_rtp_port": local_rtp,
+            "last_seen": time.monotonic(),
+            "misses": 0,
+            "retries": 0,
+        }
+        self.sessions[addr] = session
+        self._publish_sessions()
+        return session
+
+    def _session_fields(self, session):
+        return {**self._media_fields(), "rtp_port": session["local_rtp_port"]}
+
+    def _send_session_hello(self, session):
+        self._send(
+            {"type": "HELLO", "call_id": session["call_id"], "tie": self.tie or 0, **self._session_fields(session)},
+            addr=session["addr"],
+        )
+
+    def _is_candidate(self, addr):
+        return any(candidate["addr"] == addr for candidate in self.dial_results if candidate["state"] != "won")
+
+    def _accept_session(self, msg, addr, echo):
+        """HELLO from a new peer while a call is up: join it to the conference if a slot is free."""
+        session = self._new_session(addr, self._session_msg_id(msg) or str(uuid.uuid4()), "accepting")
+        if session is None:
+            self.logger.info("HELLO from %s:%d but the conference is full", addr[0], addr[1])
+            self._send({"type": "BUSY"}, addr=addr)
+            return
+        self.logger.info("Peer %s:%d joins the call (slot %d)", addr[0], addr[1], session["slot"])
+        session["remote_rtp_port"] = self._rtp_port_of(msg)
+        self._send({"type": "ACK", "call_id": session["call_id"], **self._session_fields(session), **echo}, addr=addr)
+        self._session_up(session)
+
+    @staticmethod
+    def _session_msg_id(msg):
+        msg_id = msg.get("call_id") or msg.get("id")
+        # Session call_ids are compared and ordered; a number would raise under the lock.
+        if msg_id is not None and not isinstance(msg_id, str):
+            raise ValueError(f"call_id is {type(msg_id).__name__}, not a string")
+        return msg_id
+
+    def _handle_session_message(self, msg_type, msg, addr, recv_ts):
+        msg_id = self._session_msg_id(msg)
+        with self.lock:
+            session = self.sessions.get(addr)
+            if session is None:
+                return
+            if msg_type == "HELLO":
+                if session["state"] == "calling":
+                    # Both ends dialed each other: settle on the smaller call_id, which both pick.
+                    session["call_id"] = min(session["call_id"], msg_id or session["call_id"])
+                elif msg_id and msg_id != session["call_id"]:
+                    return
+                session["remote_rtp_port"] = self._rtp_port_of(msg)
+                echo = self._echo_fields(msg, recv_ts)
+                self._send({"type": "ACK", "call_id": session["call_id"], **self._session_fields(session), **echo}, addr=addr)
+                self._session_up(session)
+                return
+            if msg_id and msg_id != session["call_id"]:
+                return
+            if msg_type == "ACK":
+                if "rtp_port" in msg:
+                    session["remote_rtp_port"] = self._rtp_port_of(msg)
+                self._session_up(session)
+            elif msg_type == "KEEPALIVE":
+                self._session_up(session)
+                echo = self._echo_fields(msg, recv_ts)
+                if echo:
+                    self._send({"type": "KEEPALIVE_ACK", "call_id": session["call_id"], **echo}, addr=addr)
+            elif msg_type in ("KEEPALIVE_ACK", "REPORT"):
+                # Loss feedback drives the shared encoder from the first call only.
+                self._session_up(session)
+            elif msg_type == "BYE":
+                self._end_session(session, "remote bye")
+            elif msg_type == "BUSY" and session["state"] == "calling":
+                self._end_session(session, "remote busy")
+
+    def _rtp_port_of(self, msg):
+        try:
+            return int(msg["rtp_port"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _session_up(self, session):
+        session["last_seen"] = time.monotonic()
+        session["misses"] = 0
+        if session["state"] == "connected":
+            return
+        session["state"] = "connected"
+        addr = session["addr"]
+        self.logger.info("Conference peer %s:%d connected (RTP %s → local %s)",
+                         addr[0], addr[1], session["remote_rtp_port"], session["local_rtp_port"])
+        self._publish_sessions()
+        self._notify_session("added", session)
+
+    def _end_session(self, session, reason, send_bye=False):
+        addr = session["addr"]
+        if self.sessions.pop(addr, None) is None:
+            return
+        if send_bye:
+            self._send({"type": "BYE", "call_id": session["call_id"]}, addr=addr)
+        self.logger.info("Conference peer %s:%d left: %s", addr[0], addr[1], reason)
+        self._publish_sessions()
+        if session["state"] == "connected":
+            self._notify_session("removed", session)
+
+    def _notify_session(self, event, session):
+        addr = session["addr"]
+        self._defer(self.on_session, event, (addr[0], addr[1], session["remote_rtp_port"], session["call_id"], session["local_rtp_port"]))
+
+    def _session_keepalives(self):
+        now = time.monotonic()
+        for session in list(self.sessions.values()):
+            if session["state"] == "calling":
+                session["retries"] += 1
+                if session["retries"] > self.MAX_HELLO_RETRIES:
+                    self._end_session(session, "no response")
+                else:
+                    self._send_session_hello(session)
+                continue
+            self._send({"type": "KEEPALIVE", "call_id": session["call_id"]}, addr=session["addr"])
+            if now - session["last_seen"] > self.keepalive_timeout:
+                session["misses"] += 1
+            else:
+                session["misses"] = 0
+            if session["misses"] >= self.keepalive_max_misses:
+                self._end_session(session, "keepalive timeout")
+
+    def _publish_sessions(self):
+        if not self.metrics:
+            return
+        self.metrics.update_sessions([
+            {
+                "addr": f"{session['addr'][0]}:{session['addr'][1]}",
+                "state": session["state"],
+                "rtp_port": session["remote_rtp_port"],
+                "local_rtp_port": session["local_rtp_port"],
+            }
+            for session in self.sessions.values()
+        ])
 
     def _accept_message(self, msg, addr):
-        if self.allowlist and addr[0] not in self.allowlist:
-            return False
         if self.token:
             if msg.get("token") != self.token:
-                self.logger.warning("Signaling token mismatch from %s:%d", addr[0], addr[1])
+                mismatches = self.rx_counters["dropped_token"] + 1
+                if mismatches == 1 or mismatches % 100 == 0:
+                    self.logger.warning("Signaling token mismatch from %s:%d (%d)", addr[0], addr[1], mismatches)
                 return False
         return True
+
+    def _take_token(self, source_ip):
+        """Per-source token bucket; only the receive thread touches the buckets."""
+        if self.rate_limit <= 0.0:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.get(source_ip)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_BUCKETS:
+                # Clearing them all would let a spoofed-source flood reset every limit.
+                self._buckets.popitem(last=False)
+            bucket = self._buckets[source_ip] = [self.rate_burst, now]
+        else:
+            self._buckets.move_to_end(source_ip)
+        tokens = min(self.rate_burst, bucket[0] + (now - bucket[1]) * self.rate_limit)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1.0
+        return True
+
+    def _publish_rx_counters(self):
+        counters = dict(self.rx_counters)
+        dropped = sum(value for key, value in counters.items() if key.startswith("dropped_"))
+        if dropped > self._rx_dropped_reported:
+            self.logger.warning(
+                "Signaling dropped %d datagrams (allowlist=%d rate=%d malformed=%d token=%d)",
+                dropped - self._rx_dropped_reported,
+                counters["dropped_allowlist"],
+                counters["dropped_rate"],
+                counters["dropped_malformed"],
+                counters["dropped_token"],
+            )
+            self._rx_dropped_reported = dropped
+        if self.metrics:
+            self.metrics.update_signal_rx(counters)
@@ -0,0 +1,127 @@
+import threading
+
+import numpy as np
+
+
+class Wsola:
+    """Streaming WSOLA time-scale modification for mono float32 audio.
+
+    Output is built from half-overlapping frames under a periodic Hann window, which sums to
+    one. Each frame is taken near its ideal input position (advanced by speed × hop), at the
+    offset that best continues the previous frame. At speed 1.0 the search is skipped and the
+    input comes back unchanged, delayed by `latency_samples`.
+    """
+
+    def __init__(self, rate, frame_ms=10, search_ms=3):
+        self.frame = max(4, int(rate * frame_ms / 1000) // 2 * 2)
+        self.hop = self.frame // 2
+        self.search = max(0, int(rate * search_ms / 1000))
+        self.window = (0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(self.frame) / self.frame)).astype(np.float32)
+        self.latency_samples = self.frame + self.search
+        self.reset()
+
+    def reset(self):
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._base = 0  # absolute index of _buf[0]
+        self._next = None  # ideal absolute start of the next frame
+        self._prev = None  # absolute start of the previous frame
+        self._tail = np.zeros(self.hop, dtype=np.float32)
+        self.consumed = 0  # input samples the output has advanced over
+        self.produced = 0
+
+    def process(self, samples, speed=1.0):
+        """Feed input; returns whatever output is ready (hop-sized steps, possibly empty)."""
+        self._buf = np.concatenate((self._buf, np.asarray(samples, dtype=np.float32)))
+        if self._next is None:
+            self._next = float(self.search)
+        end = self._base + self._buf.size
+        analysis_hop = self.hop * float(speed)
+        out = []
+        while True:
+            natural = self._prev + self.hop if self._prev is not None else int(self._next)
+            tolerance = 0 if speed == 1.0 or self._prev is None else self.search
+            ideal = natural if tolerance == 0 else int(round(self._next))
+            lo = max(ideal - tolerance, self._base)
+            hi = ideal + tolerance
+            if hi + self.frame > end or natural + self.frame > end:
+                break
+            if hi > lo:
+                template = self._buf[natural - self._base:natural - self._base + self.frame]
+                region = self._buf[lo - self._base:hi - self._base + self.frame]
+                start = lo + int(np.argmax(np.correlate(region, template, mode="valid")))
+            else:
+                start = lo
+            segment = self._buf[start - self._base:start - self._base + self.frame] * self.window
+            out.append(self._tail + segment[:self.hop])
+            self._tail = segment[self.hop:].copy()
+            if self._prev is not None:
+                self.consumed += start - self._prev
+            self._prev = start
+            # Ideal positions advance on their own so the speed is met on average; at unit speed
+            # they re-anchor on the frame actually used.
+            self._next = (self._next if tolerance else start) + analysis_hop
+        keep_from = min(self._prev + self.hop, int(self._next) - self.search) if self._prev is not None else self._base
+        drop = max(0, keep_from - self._base)
+        if drop:
+            self._buf = self._buf[drop:]
+            self._base += drop
+        if not out:
+            return np.zeros(0, dtype=np.float32)
+        result = np.concatenate(out)
+        self.produced += result.size
+        return result
+
+
+class StretchController:
+    """Speed that steers the playout reserve to its setpoint, plus the speed distribution."""
+
+    def __init__(self, setpoint_ms=40.0, max_stretch=0.05, gain_per_ms=0.002, deadband_ms=3.0):
+        self.setpoint_ms = float(setpoint_ms)
+        self.max_stretch = max(0.0, min(0.25, float(max_stretch)))
+        self.gain_per_ms = float(gain_per_ms)
+        self.deadband_ms = float(deadband_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._hist = {}
+            self.frames = 0
+            self.reserve_ms = None
+
+    def speed(self, reserve_ms):
+        """>1 drains an over-full reserve, <1 grows a short one; 1.0 inside the deadband."""
+        error = reserve_ms - self.setpoint_ms
+        if abs(error) <= self.deadband_ms:
+            speed = 1.0
+        else:
+            adjust = (error - self.deadband_ms if error > 0 else error + self.deadband_ms) * self.gain_per_ms
+            speed = 1.0 + max(-self.max_stretch, min(self.max_stretch, adjust))
+        with self._lock:
+            self.reserve_ms = reserve_ms
+            key = round(speed, 2)
+            self._hist[key] = self._hist.get(key, 0) + 1
+            self.frames += 1
+        return speed
+
+    def snapshot(self):
+        with self._lock:
+            hist = dict(sorted(self._hist.items()))
+            frames = self.frames
+            reserve_ms = self.reserve_ms
+        stretched = frames - hist.get(1.0, 0)
+        percentiles = {}
+        seen = 0
+        for speed, count in hist.items():
+            seen += count
+            for pct in (5, 50, 95):
+                if f"speed_p{pct}" not in percentiles and seen >= frames * pct / 100.0:
+                    percentiles[f"speed_p{pct}"] = speed
+        return {
+            "reserve_ms": reserve_ms,
+            "setpoint_ms": self.setpoint_ms,
+            "frames": frames,
+            "stretched_pct": 100.0 * stretched / frames if frames else None,
+            "speed_hist": {f"{speed:.2f}": count for speed, count in hist.items()},
+            **percentiles,
+        }
@@ -35,6 +35,9 @@ class MainWindow(QtWidgets.QMainWindow):
     # Qt signals for thread-safe UI updates
     connected_signal = QtCore.Signal(tuple)
     disconnected_signal = QtCore.Signal()
+    early_media_signal = QtCore.Signal(tuple)
+    early_media_cancel_signal = QtCore.Signal(str)
+    session_signal = QtCore.Signal(str, tuple)
     media_error_signal = QtCore.Signal(str)
     media_warning_signal = QtCore.Signal(str)
     
@@ -81,7 +84,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.remote_port = QtWidgets.QLineEdit("5004")
         
         self.local_port.setPlaceholderText("例如 5004, 5006, 5008...")
-        self.remote_ip.setPlaceholderText("例如 127.0.0.1 或 192.168.1.100")
+        self.remote_ip.setPlaceholderText("例如 127.0.0.1，多个候选用逗号分隔：192.168.1.100, 10.8.0.2")
         self.remote_port.setPlaceholderText("远端 RTP 端口")
         
         conn_layout.addRow("本地 RTP 端口", self.local_port)
@@ -182,6 +185,7 @@ class MainWindow(QtWidgets.QMainWindow):
         dfn_post_widget.setLayout(dfn_post_wrap)
 
         self.dfn_vad_link_main = QtWidgets.QCheckBox()
+        self.profiler_enable = QtWidgets.QCheckBox()
 
         self.aec_status = QtWidgets.QLabel("-")
         self.dfn_status = QtWidgets.QLabel("-")
@@ -203,6 +207,7 @@ class MainWindow(QtWidgets.QMainWindow):
         processing_form.addRow("降噪等级（DFN Mix）", dfn_mix_widget)
         processing_form.addRow("后滤波（Post Filter）", dfn_post_widget)
         processing_form.addRow("VAD 联动降噪", self.dfn_vad_link_main)
+        processing_form.addRow("元素耗时剖析", self.profiler_enable)
         processing_form.addRow("AEC 状态", self.aec_status)
         processing_form.addRow("DFN 状态", self.dfn_status)
         processing_form.addRow("HPF 状态", self.hpf_status)
@@ -368,6 +373,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.opus_loss = QtWidgets.QSpinBox()
         self.opus_loss.setRange(0, 20)
         self.opus_loss.setSuffix(" %")
+        self.opus_loss_adaptive = QtWidgets.QCheckBox()
 
         self.limiter_threshold_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)
         self.limiter_threshold_slider.setRange(-20, 0)
@@ -437,6 +443,7 @@ class MainWindow(QtWidgets.QMainWindow):
         opus_form.addRow("Opus 前向纠错（FEC）", self.opus_fec)
         opus_form.addRow("Opus 静音检测（DTX）", self.opus_dtx)
         opus_form.addRow("Opus 预期丢包", self.opus_loss)
+        opus_form.addRow("按对端丢包自适应", self.opus_loss_adaptive)
         opus_page.setLayout(opus_form)
 
         limiter_page = QtWidgets.QWidget()
@@ -468,9 +475,25 @@ class MainWindow(QtWidgets.QMainWindow):
             "queue_depth": "队列深度（Queue Depth）",
             "jitter_depth": "抖动缓冲（Jitter）",
             "mic_send": "麦克风→发送（Mic→Send, ms）",
+            "signal_rtt": "信令 RTT / 时钟偏移（ms）",
+            "first_audio": "首包时延（First RTP, ms）",
+            "duplex_transition": "全双工切换（ms）",
+            "pipeline_start": "管线启动（Start→PLAYING, ms）",
+            "signal_rx": "信令接收/丢弃（Signal Rx/Drop）",
             "vad_prob": "VAD 概率（VAD Prob）",
             "vad_energy": "VAD 能量（VAD Energy, dB）",
             "sample_rate": "采样率（输入/目标, Hz）",
+            "element_timing": "元素耗时 P50/P95（ms）",
+            "latency_up": "上行时延（设备+处理+网络, ms）",
+            "latency_down": "下行时延（网络+抖动+解码播放+设备, ms）",
+            "bus_latency": "总线处理延迟 P95（统计/控制, ms）",
+            "tsm": "播放变速（实际时延/储备 ms · 速率 P5/P50/P95）",
+            "rtcp": "RTCP（丢包 收/发 % · 抖动 收/发 ms · RTT ms）",
+            "loss_feedback": "丢包反馈（本端收/对端收 % · Opus 码率/FEC/预期丢包）",
+            "ptime": "打包时长（当前/本端偏好 ms · 发送 pps · kbps）",
+            "vad_dtx": "静音 DTX（模式 · 静音占比 % · 省略 ms · 保活包）",
+            "conference": "会议（成员数 · 接收端口）",
+            "recording": "录音（已写 上行/下行 · 丢弃 上行/下行）",
         }
         self.dfn_p50 = self._make_metric_label(self.metric_titles["dfn_p50"])
         self.dfn_p95 = self._make_metric_label(self.metric_titles["dfn_p95"])
@@ -482,9 +505,25 @@ class MainWindow(QtWidgets.QMainWindow):
         self.queue_depth = self._make_metric_label(self.metric_titles["queue_depth"])
         self.jitter_depth = self._make_metric_label(self.metric_titles["jitter_depth"])
         self.mic_send = self._make_metric_label(self.metric_titles["mic_send"])
+        self.signal_rtt = self._make_metric_label(self.metric_titles["signal_rtt"])
+        self.first_audio = self._make_metric_label(self.metric_titles["first_audio"])
+        self.duplex_transition = self._make_metric_label(self.metric_titles["duplex_transition"])
+        self.pipeline_start = self._make_metric_label(self.metric_titles["pipeline_start"])
+        self.signal_rx = self._make_metric_label(self.metric_titles["signal_rx"])
         self.vad_prob = self._make_metric_label(self.metric_titles["vad_prob"])
         self.vad_energy = self._make_metric_label(self.metric_titles["vad_energy"])
         self.sample_rate = self._make_metric_label(self.metric_titles["sample_rate"])
+        self.element_timing = self._make_metric_label(self.metric_titles["element_timing"])
+        self.latency_up = self._make_metric_label(self.metric_titles["latency_up"])
+        self.latency_down = self._make_metric_label(self.metric_titles["latency_down"])
+        self.bus_latency = self._make_metric_label(self.metric_titles["bus_latency"])
+        self.tsm_metric = self._make_metric_label(self.metric_titles["tsm"])
+        self.loss_feedback = self._make_metric_label(self.metric_titles["loss_feedback"])
+        self.rtcp_metric = self._make_metric_label(self.metric_titles["rtcp"])
+        self.ptime_metric = self._make_metric_label(self.metric_titles["ptime"])
+        self.vad_dtx_metric = self._make_metric_label(self.metric_titles["vad_dtx"])
+        self.conference_metric = self._make_metric_label(self.metric_titles["conference"])
+        self.recording_metric = self._make_metric_label(self.metric_titles["recording"])
         metrics_layout.addWidget(self.dfn_p50)
         metrics_layout.addWidget(self.dfn_p95)
         metrics_layout.addWidget(self.dfn_bypass)
@@ -495,9 +534,25 @@ class MainWindow(QtWidgets.QMainWindow):
         metrics_layout.addWidget(self.queue_depth)
         metrics_layout.addWidget(self.jitter_depth)
         metrics_layout.addWidget(self.mic_send)
+        metrics_layout.addWidget(self.latency_up)
+        metrics_layout.addWidget(self.latency_down)
+        metrics_layout.addWidget(self.tsm_metric)
+        metrics_layout.addWidget(self.loss_feedback)
+        metrics_layout.addWidget(self.rtcp_metric)
+        metrics_layout.addWidget(self.ptime_metric)
+        metrics_layout.addWidget(self.vad_dtx_metric)
+        metrics_layout.addWidget(self.conference_metric)
+        metrics_layout.addWidget(self.recording_metric)
+        metrics_layout.addWidget(self.signal_rtt)
+        metrics_layout.addWidget(self.first_audio)
+        metrics_layout.addWidget(self.duplex_transition)
+        metrics_layout.addWidget(self.pipeline_start)
+        metrics_layout.addWidget(self.signal_rx)
         metrics_layout.addWidget(self.vad_prob)
         metrics_layout.addWidget(self.vad_energy)
         metrics_layout.addWidget(self.sample_rate)
+        metrics_layout.addWidget(self.bus_latency)
+        metrics_layout.addWidget(self.element_timing)
         metrics_group.setLayout(metrics_layout)
 
         left_col = QtWidgets.QVBoxLayout()
@@ -566,6 +621,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.dfn_post_slider.valueChanged.connect(self._on_dfn_post_changed)
         self.dfn_vad_link.toggled.connect(self._on_dfn_vad_link_toggle)
         self.dfn_vad_link_main.toggled.connect(self._on_dfn_vad_link_toggle)
+        self.profiler_enable.toggled.connect(self._on_profiler_toggle)
         self.dfn_mix_speech_slider.valueChanged.connect(self._on_dfn_mix_speech_changed)
         self.dfn_mix_silence_slider.valueChanged.connect(self._on_dfn_mix_silence_changed)
         self.eq_enable.toggled.connect(self._on_eq_toggle)
@@ -578,6 +634,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.opus_fec.toggled.connect(self._on_opus_fec_toggle)
         self.opus_dtx.toggled.connect(self._on_opus_dtx_toggle)
         self.opus_loss.valueChanged.connect(self._on_opus_loss_changed)
+        self.opus_loss_adaptive.toggled.connect(self._on_opus_loss_adaptive_toggle)
         self.limiter_threshold_slider.valueChanged.connect(self._on_limiter_threshold_changed)
         self.limiter_attack_spin.valueChanged.connect(self._on_limiter_attack_changed)
         self.limiter_release_spin.valueChanged.connect(self._on_limiter_release_changed)
@@ -585,12 +642,18 @@ class MainWindow(QtWidgets.QMainWindow):
         # Connect Qt signals to slots for thread-safe UI updates
         self.connected_signal.connect(self._on_connected_slot)
         self.disconnected_signal.connect(self._on_disconnected_slot)
+        self.early_media_signal.connect(self._on_early_media_slot)
+        self.early_media_cancel_signal.connect(self._on_early_media_cancel_slot)
+        self.session_signal.connect(self._on_session_slot)
         self.media_error_signal.connect(self._on_media_error_slot)
         self.media_warning_signal.connect(self._on_media_warning_slot)
         
         # Set callbacks that emit signals (thread-safe)
         self.signaling.on_connected = self._on_connected_callback
         self.signaling.on_disconnected = self._on_disconnected_callback
+        self.signaling.on_early_media = self._on_early_media_callback
+        self.signaling.on_early_media_cancel = self._on_early_media_cancel_callback
+        self.signaling.on_session = self._on_session_callback
         self.media.on_error = self._on_media_error_callback
         self.media.on_warning = self._on_media_warning_callback
 
@@ -650,7 +713,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.device_timer.start(3000)
 
     def _update_metrics(self):
-        if self.media.pipeline:
+        if self.media.pipeline and not self.media.sampling:
             self.media.poll_metrics()
         data = self.metrics.snapshot()
         if self.media.dfn_active is False:
@@ -679,8 +742,27 @@ class MainWindow(QtWidgets.QMainWindow):
             self._set_metric(self.aec_erle, self.metric_titles["aec_erle"], self._fmt(data.get("aec_erle_db")))
             self._set_metric(self.aec_erl, self.metric_titles["aec_erl"], self._fmt(data.get("aec_erl_db")))
             self._set_metric(self.aec_delay_metric, self.metric_titles["aec_delay"], self._fmt(data.get("aec_delay_ms")))
-        self._set_metric(self.jitter_depth, self.metric_titles["jitter_depth"], self._fmt_jitter(data.get("jitter_depth"), data.get("jitter_kind")))
+        jitter_text = self._fmt_jitter(data.get("jitter_depth"), data.get("jitter_kind"))
+        if data.get("jitter_latency_ms") is not None:
+            jitter_text += f" · 缓冲 {data['jitter_latency_ms']} ms（目标 {data.get('jitter_target_ms')}）"
+        self._set_metric(self.jitter_depth, self.metric_titles["jitter_depth"], jitter_text)
         self._set_metric(self.mic_send, self.metric_titles["mic_send"], self._fmt(data.get("mic_send_latency_ms")))
+        breakdown = data.get("latency_breakdown") or {}
+        self._set_metric(self.latency_up, self.metric_titles["latency_up"], self._fmt_latency(
+            breakdown.get("uplink"), ("capture_device_ms", "processing_ms", "network_ms")))
+        self._set_metric(self.latency_down, self.metric_titles["latency_down"], self._fmt_latency(
+            breakdown.get("downlink"), ("network_ms", "jitter_buffer_ms", "decode_playout_ms", "playout_device_ms")))
+        self._set_metric(self.signal_rtt, self.metric_titles["signal_rtt"], self._fmt_rtt(data))
+        self._set_metric(self.first_audio, self.metric_titles["first_audio"], self._fmt(data.get("first_audio_ms")))
+        transition = self._fmt(data.get("duplex_transition_ms"))
+        if data.get("duplex_transition_mode"):
+            transition += f" ({data['duplex_transition_mode']})"
+        self._set_metric(self.duplex_transition, self.metric_titles["duplex_transition"], transition)
+        pipeline_start = self._fmt(data.get("pipeline_start_ms"))
+        if data.get("pipeline_start_pooled") is not None:
+            pipeline_start += " (standby)" if data["pipeline_start_pooled"] else " (cold)"
+        self._set_metric(self.pipeline_start, self.metric_titles["pipeline_start"], pipeline_start)
+        self._set_metric(self.signal_rx, self.metric_titles["signal_rx"], self._fmt_signal_rx(data.get("signal_rx", {})))
         self._set_metric(self.vad_prob, self.metric_titles["vad_prob"], self._fmt(data.get("vad_prob")))
         self._set_metric(self.vad_energy, self.metric_titles["vad_energy"], self._fmt(data.get("vad_energy_db")))
         queues = self._format_queue_depths(data.get("queue_depths", {}), data.get("queue_overruns", {}))
@@ -692,6 +774,20 @@ class MainWindow(QtWidgets.QMainWindow):
         else:
             rate_text = "-"
         self._set_metric(self.sample_rate, self.metric_titles["sample_rate"], rate_text)
+        bus = data.get("bus_latency") or {}
+        bus_text = " / ".join(
+            f"{bus[kind]['p95_ms']:.2f}" if kind in bus else "-" for kind in ("stats", "control")
+        )
+        self._set_metric(self.bus_latency, self.metric_titles["bus_latency"], bus_text)
+        self._set_metric(self.tsm_metric, self.metric_titles["tsm"], self._fmt_tsm(data.get("tsm") or {}))
+        self._set_metric(self.loss_feedback, self.metric_titles["loss_feedback"], self._fmt_loss_feedback(data.get("loss_feedback") or {}))
+        self._set_metric(self.rtcp_metric, self.metric_titles["rtcp"], self._fmt_rtcp(data.get("rtcp") or {}))
+        self._set_metric(self.ptime_metric, self.metric_titles["ptime"], self._fmt_ptime(data.get("ptime") or {}, data.get("rtp_tx") or {}))
+        self._set_metric(self.vad_dtx_metric, self.metric_titles["vad_dtx"], self._fmt_vad_dtx(data.get("vad_dtx") or {}))
+        self._set_metric(self.conference_metric, self.metric_titles["conference"], self._fmt_conference(data.get("conference") or {}))
+        self._set_metric(self.recording_metric, self.metric_titles["recording"], self._fmt_recording(data.get("recording") or {}))
+        timing = self._format_element_timing(data.get("element_timing", {})) if self.media.profiling else "关闭"
+        self._set_metric(self.element_timing, self.metric_titles["element_timing"], timing)
         
         is_speaking = data.get("vad_speaking")
         if is_speaking:
@@ -710,6 +806,88 @@ class MainWindow(QtWidgets.QMainWindow):
     def _set_metric(self, label, title, value):
         label.setText(f"{title}：{value}")
 
+    def _fmt_rtt(self, data):
+        rtt = data.get("signal_rtt_ms")
+        if rtt is None:
+            return "-"
+        text = f"{rtt:.1f}"
+        rtt_var = data.get("signal_rtt_var_ms")
+        if rtt_var is not None:
+            text += f" ±{rtt_var:.1f}"
+        offset = data.get("clock_offset_ms")
+        if offset is not None:
+            text += f" / {offset:+.1f}"
+        return text
+
+    def _fmt_latency(self, direction, terms):
+        if not direction or direction.get("total_ms") is None:
+            return "-"
+        parts = "+".join("?" if direction.get(term) is None else f"{direction[term]:.0f}" for term in terms)
+        return f"{direction['total_ms']:.0f}（{parts}）"
+
+    def _fmt_signal_rx(self, counters):
+        if not counters:
+            return "-"
+        dropped = sum(value for key, value in counters.items() if key.startswith("dropped_"))
+        return f"{counters.get('accepted', 0)} / {dropped}"
+
+    def _fmt_rtcp(self, summary):
+        if not summary:
+            return "-"
+        receive = summary.get("receive") or {}
+        send = summary.get("send") or {}
+        loss = f"{self._fmt(receive.get('fraction_lost_pct'))}/{self._fmt(send.get('fraction_lost_pct'))}"
+        jitter = f"{self._fmt(receive.get('jitter_ms'))}/{self._fmt(send.get('jitter_ms'))}"
+        return f"{loss} · {jitter} · {self._fmt(summary.get('rtt_ms'))}"
+
+    def _fmt_ptime(self, ptime, tx):
+        current = ptime.get("ptime_ms", self.media.opus_frame_ms)
+        text = f"{current}{'（协商）' if ptime.get('negotiated') else ''}/{self._fmt(ptime.get('preferred_ms'))}"
+        return f"{text} · {self._fmt(tx.get('pps'))} · {self._fmt(tx.get('kbps'))}"
+
+    def _fmt_vad_dtx(self, dtx):
+        if self.media.vad_dtx == "off":
+            return "关闭"
+        if not dtx:
+            return self.media.vad_dtx
+        state = "静音" if dtx.get("silent") else "语音"
+        return f"{dtx['mode']}/{state} · {self._fmt(dtx.get('silent_pct'))} · {dtx.get('dropped_ms', 0)} · {dtx.get('keepalives', 0)}"
+
+    def _fmt_conference(self, conference):
+        if not self.media.conference:
+            return "关闭"
+        peers = conference.get("peers") or []
+        ports = ",".join(str(peer["local_port"]) for peer in peers) or "-"
+        return f"{len(peers) + (1 if conference.get('primary') else 0)} · {ports}"
+
+    def _fmt_recording(self, recording):
+        if not self.media.record_dir:
+            return "关闭"
+        if not recording:
+            return "-"
+        up = recording.get("up") or {}
+        down = recording.get("down") or {}
+        failed = " · 写入失败" if up.get("error") or down.get("error") else ""
+        return (f"{self._fmt(up.get('written'))}/{self._fmt(down.get('written'))} · "
+                f"{self._fmt(up.get('dropped'))}/{self._fmt(down.get('dropped'))}{failed}")
+
+    def _fmt_loss_feedback(self, feedback):
+        local = feedback.get("local") or {}
+        remote = feedback.get("remote") or {}
+        opus = feedback.get("opus") or {}
+        text = f"{self._fmt(local.get('loss_pct'))} / {self._fmt(remote.get('loss_pct'))}"
+        if opus:
+            text += f" · {opus['bitrate'] // 1000}k/{'开' if opus['fec'] else '关'}/{opus['packet_loss']}%"
+        return text
+
+    def _fmt_tsm(self, tsm):
+        if not self.media.tsm_enabled:
+            return "关闭"
+        if tsm.get("speed_p50") is None:
+            return "-"
+        speeds = "/".join(f"{tsm[f'speed_p{pct}']:.2f}" for pct in (5, 50, 95))
+        return f"{self._fmt(tsm.get('achieved_ms'))} / {self._fmt(tsm.get('reserve_ms'))} · {speeds}"
+
     def _fmt_jitter(self, value, kind):
         if value is None:
             return "-"
@@ -740,6 +918,20 @@ class MainWindow(QtWidgets.QMainWindow):
                     items.append(f"{label}:{queue_depths[key]}")
         return "、".join(items) if items else "-"
 
+    def _format_element_timing(self, timing, limit=6):
+        if not timing:
+            return "-"
+        # Slowest first by p95; queues report residency, elements processing time.
+        ranked = sorted(
+            ((name, stats) for name, stats in timing.items() if stats.get("count")),
+            key=lambda item: -(item[1].get("p95_us") or 0.0),
+        )
+        items = [
+            f"{name}:{stats['p50_us'] / 1000.0:.2f}/{stats['p95_us'] / 1000.0:.2f}"
+            for name, stats in ranked[:limit]
+        ]
+        return "、".join(items) if items else "-"
+
     def _apply_theme(self):
         font = self._pick_font([
             "PingFang SC",
@@ -949,7 +1141,7 @@ class MainWindow(QtWidgets.QMainWindow):
             main_text += "（监听模式）"
 
         vad_text = "AEC3 后 → VAD"
-        downlink_text = "RTP/UDP → Jitter → Opus → 播放"
+        downlink_text = "RTP/UDP → Jitter → Opus → 变速 → 播放" if self.media.tsm else "RTP/UDP → Jitter → Opus → 播放"
         if self.media.aec_active is not False:
             downlink_text += "（AEC 参考）"
 
@@ -994,6 +1186,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self._set_checkbox_silent(self.cng_enable, self.media.cng_enabled)
         self._set_checkbox_silent(self.dfn_vad_link, self.media.dfn_vad_link)
         self._set_checkbox_silent(self.dfn_vad_link_main, self.media.dfn_vad_link)
+        self._set_checkbox_silent(self.profiler_enable, self.media.profiling)
         self._set_spin_silent(self.aec_delay, int(self.media.aec_delay_ms))
         self._set_slider_silent(self.dfn_mix_slider, int(self.media.dfn_mix * 100))
         self._set_slider_silent(self.dfn_post_slider, int(self.media.dfn_post_filter * 100))
@@ -1012,6 +1205,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self._set_spin_silent(self.opus_loss, int(self.media.opus_packet_loss))
         self._set_checkbox_silent(self.opus_fec, self.media.opus_fec)
         self._set_checkbox_silent(self.opus_dtx, self.media.opus_dtx)
+        self._set_checkbox_silent(self.opus_loss_adaptive, self.media.loss_adaptive)
         self._set_slider_silent(self.limiter_threshold_slider, int(round(self.media.limiter_threshold_db)))
         self._set_spin_silent(self.limiter_attack_spin, int(round(self.media.limiter_attack_ms)))
         self._set_spin_silent(self.limiter_release_spin, int(round(self.media.limiter_release_ms)))
@@ -1154,6 +1348,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self._set_checkbox_silent(self.dfn_vad_link, checked)
         self._set_checkbox_silent(self.dfn_vad_link_main, checked)
 
+    def _on_profiler_toggle(self, checked):
+        self.media.set_profiling(checked)
+
     def _on_dfn_mix_speech_changed(self, value):
         self.dfn_mix_speech_value.setText(f"{value}%")
         self.media.set_processing_options(dfn_mix_speech=value / 100.0)
@@ -1198,6 +1395,9 @@ class MainWindow(QtWidgets.QMainWindow):
     def _on_opus_loss_changed(self, value):
         self.media.set_processing_options(opus_packet_loss=value)
 
+    def _on_opus_loss_adaptive_toggle(self, checked):
+        self.media.set_processing_options(loss_adaptive=checked)
+
     def _on_limiter_threshold_changed(self, value):
         self.limiter_threshold_value.setText(f"{value} dB")
         self.media.set_processing_options(limiter_threshold_db=value)
@@ -1296,6 +1496,17 @@ class MainWindow(QtWidgets.QMainWindow):
         except ValueError as e:
             QtWidgets.QMessageBox.warning(self, "端口无效", f"端口无效：{e}")
             return
+        try:
+            candidates = self._parse_candidates(remote_ip, remote_port)
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, "地址无效", f"远端地址无效：{e}")
+            return
+        remote_ip, remote_port = candidates[0]
+        if self.media.conference and self.signaling.state != "idle":
+            # Already in a call: dial this peer into it.
+            if not self.signaling.add_call(remote_ip, remote_port + 1):
+                QtWidgets.QMessageBox.warning(self, "无法加入", "会议已满或该成员已在通话中")
+            return
         
         signaling_port = local_port + 1
         self._warn_port_occupied(local_port)
@@ -1311,12 +1522,34 @@ class MainWindow(QtWidgets.QMainWindow):
         self.media.set_send_enabled(True)
         self.signaling.set_local_rtp_port(local_port)
         self.signaling.start_listen(signaling_port, rtp_port=local_port)
-        self.signaling.call(remote_ip, remote_port + 1)
+        if len(candidates) > 1:
+            self.signaling.call_candidates([(ip, port + 1) for ip, port in candidates])
+        else:
+            self.signaling.call(remote_ip, remote_port + 1)
         self.status_label.setText("呼叫中...")
         self._set_label_tone(self.status_label, "info")
         self.is_calling = True
         self.call_button.setEnabled(False)
 
+    def _parse_candidates(self, text, default_port):
+        """Parse 'ip[:port], ip[:port] ...' into (ip, rtp_port) pairs."""
+        candidates = []
+        for entry in text.replace(";", ",").replace(" ", ",").split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            ip, port = entry, default_port
+            if entry.count(":") == 1:
+                ip, port_text = entry.split(":", 1)
+                port = int(port_text)
+                if not (1024 <= port <= 65535):
+                    raise ValueError("端口必须在 1024~65535 之间")
+            if (ip, port) not in candidates:
+                candidates.append((ip, port))
+        if not candidates:
+            raise ValueError("请输入远端 IP")
+        return candidates
+
     def _on_hangup(self):
         self.signaling.hangup()
         self.media.set_send_enabled(False)
@@ -1338,7 +1571,45 @@ class MainWindow(QtWidgets.QMainWindow):
         """Called from background thread - emits signal for thread-safe UI update"""
         self.disconnected_signal.emit()
 
+    def _on_early_media_callback(self, remote_info):
+        """Called from background thread - emits signal for thread-safe UI update"""
+        self.early_media_signal.emit(remote_info if remote_info else ())
+
+    def _on_early_media_cancel_callback(self, call_id):
+        """Called from background thread - emits signal for thread-safe UI update"""
+        self.early_media_cancel_signal.emit(call_id or "")
+
+    def _on_session_callback(self, event, info):
+        """Called from background thread - emits signal for thread-safe UI update"""
+        self.session_signal.emit(event, info)
+
     # Qt slots that run in the main thread
+    @QtCore.Slot(tuple)
+    def _on_early_media_slot(self, remote_info):
+        if len(remote_info) < 4 or not self.media.pipeline:
+            return
+        remote_ip, signaling_port, rtp_port, call_id = remote_info[:4]
+        if rtp_port is None:
+            try:
+                rtp_port = int(self.remote_port.text())
+            except ValueError:
+                rtp_port = max(1, signaling_port - 1)
+        self.media.start_early_media(call_id, remote_ip, rtp_port)
+
+    @QtCore.Slot(str)
+    def _on_early_media_cancel_slot(self, call_id):
+        self.media.cancel_early_media(call_id)
+
+    @QtCore.Slot(str, tuple)
+    def _on_session_slot(self, event, info):
+        remote_ip, signaling_port, rtp_port, call_id, local_rtp_port = info
+        if event == "removed":
+            self.media.remove_peer(call_id)
+            return
+        if rtp_port is None:
+            rtp_port = max(1, signaling_port - 1)
+        self.media.add_peer(call_id, remote_ip, rtp_port, local_rtp_port)
+
     @QtCore.Slot(tuple)
     def _on_connected_slot(self, remote_addr):
         if remote_addr:
@@ -1365,6 +1636,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.media.restart_with_remote(remote_ip, rtp_port)
             else:
                 self.media.set_remote(remote_ip, rtp_port)
+            self.media.confirm_media(remote_addr[3] if len(remote_addr) > 3 else None)
             self.media.set_send_enabled(True)
             self.status_label.setText(f"已连接 {remote_ip}:{rtp_port}")
             self._set_label_tone(self.status_label, "success")
@@ -1372,7 +1644,8 @@ class MainWindow(QtWidgets.QMainWindow):
             self.status_label.setText("已连接")
             self._set_label_tone(self.status_label, "success")
         self.is_calling = True
-        self.call_button.setEnabled(False)
+        # In a conference the call button dials further peers into the call.
+        self.call_button.setEnabled(self.media.conference)
 
     @QtCore.Slot()
     def _on_disconnected_slot(self):
@@ -1396,6 +1669,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def _on_media_error_slot(self, message):
         self.logger.error("Media error: %s", message)
         self.signaling.stop()
+        self.media.stop()
         self.status_label.setText("音频错误")
         self._set_label_tone(self.status_label, "warn")
         self.speaking_label.setText("否")
@@ -1421,7 +1695,8 @@ class MainWindow(QtWidgets.QMainWindow):
             if hasattr(self, "device_timer"):
                 self.device_timer.stop()
             self.signaling.stop()
-            self.media.stop()
+            self.media.stop(refill=False)
+            self.media.release_standby()
         except Exception as e:
             print(f"Error during cleanup: {e}")
         finally:
@@ -1,7 +1,13 @@
 import logging
+import sys
 import threading
 from collections import deque
 
+try:
+    import resource
+except ImportError:
+    resource = None
+
 
 class FrameRingBuffer:
     """Thread-safe ring buffer for fixed-size audio frames."""
@@ -34,3 +40,12 @@ class FrameRingBuffer:
     def size(self):
         with self._lock:
             return len(self._frames)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB (None on Windows)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
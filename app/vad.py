@@ -51,6 +51,9 @@ class VADWorker(threading.Thread):
         self.energy_on_db = _env_float("VAD_ENERGY_DB_ON", -40.0)
         self.energy_off_db = _env_float("VAD_ENERGY_DB_OFF", -50.0)
         self.use_energy_fallback = os.getenv("VAD_ENERGY_FALLBACK", "1") != "0"
+        # Run the model on every Nth window; the windows in between reuse its last probability.
+        self.stride = 1
+        self.model_prob = 0.0
         
         self._reset_state()
         
@@ -69,6 +72,7 @@ class VADWorker(threading.Thread):
 
     def reset_runtime(self):
         self._reset_state()
+        self.model_prob = 0.0
         self.buffer_16k.clear()
         self.buffer_samples = 0
         self.speaking = False
@@ -152,7 +156,9 @@ class VADWorker(threading.Thread):
                 self.input_buf[self.CONTEXT_SIZE:] = chunk
                 prob_value = energy_prob
 
-                if self.session:
+                if self.session and frame_count % self.stride:
+                    prob_value = max(self.model_prob, energy_prob) if self.use_energy_fallback else self.model_prob
+                elif self.session:
                     try:
                         if self.feed is None:
                             self.feed = {'input': self.input_view, 'state': self.state, 'sr': self.sr}
@@ -165,6 +171,7 @@ class VADWorker(threading.Thread):
                             self.state = res[1]
                             
                         prob_value = float(np.squeeze(prob))
+                        self.model_prob = prob_value
                         if self.use_energy_fallback:
                             prob_value = max(prob_value, energy_prob)
                         error_count = 0
@@ -235,6 +242,7 @@ class VADManager:
         self.worker = VADWorker(self.ring, metrics, model_path, self.stop_event)
         self.logger = logging.getLogger("VAD")
         self.frame_count = 0
+        self.stride = 1
         self._preloaded = False
 
     def push_frame(self, frame_bytes):
@@ -255,8 +263,13 @@ class VADManager:
             self.worker.reset_runtime()
         else:
             self.worker = VADWorker(self.ring, self.metrics, self.model_path, self.stop_event)
+        self.worker.stride = self.stride
         self.worker.start()
 
+    def set_stride(self, stride):
+        self.stride = max(1, int(stride))
+        self.worker.stride = self.stride
+
     def stop(self):
         self.stop_event.set()
         if self.worker.is_alive():
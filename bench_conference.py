@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Conference CPU: host process cost per added participant against the cost of one decode branch.
+
+The host runs one MediaEngine in conference mode (test tone in, null out). A separate process
+plays the peers: one live Opus sender per participant, aimed at the host's per-peer RTP port.
+Participants are added one at a time; after each step the host's process CPU is measured. The
+encoder, AEC and DFN run once whatever the count, so each step should cost about one receive
+branch (jitter buffer, depayloader, opusdec, mixer input) plus one more send. The reference is
+that receive branch measured on its own in the same process.
+
+Usage:
+    python bench_conference.py [--peers 4] [--seconds 10] [--warmup 2] [--json out.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+os.environ.setdefault("GST_PLUGIN_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "native", "build", "gst-plugins"))
+
+import gi
+
+gi.require_version("Gst", "1.0")
+from gi.repository import Gst
+
+from testutil import free_port
+
+RATE = 48000
+STRIDE = 10
+
+
+def _port_block(count, stride=STRIDE):
+    """A base port P with P + stride * i (and the +1/+2 signaling/RTCP neighbours) free for i < count."""
+    while True:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            base = sock.getsockname()[1]
+        if base + stride * count + 2 > 65535:
+            continue
+        socks = []
+        try:
+            for idx in range(count):
+                for offset in (0, 1, 2):
+                    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    socks.append(probe)
+                    probe.bind(("127.0.0.1", base + stride * idx + offset))
+            return base
+        except OSError:
+            continue
+        finally:
+            for probe in socks:
+                probe.close()
+
+
+def run_senders(targets, frame_ms, ready, stop):
+    """Peer side (own process): one live Opus/RTP sender per target port, plus a sink for what the host sends."""
+    Gst.init(None)
+    pipelines = []
+    for idx, (target, listen) in enumerate(targets):
+        pipeline = Gst.parse_launch(
+            f"audiotestsrc is-live=true wave=sine freq={300 + 70 * idx} volume=0.3 "
+            f"! audio/x-raw,format=S16LE,rate={RATE},channels=1 "
+            f"! opusenc frame-size={frame_ms} ! rtpopuspay pt=96 "
+            f"! udpsink host=127.0.0.1 port={target} sync=false async=false "
+            f"udpsrc port={listen} ! fakesink sync=false async=false"
+        )
+        pipeline.set_state(Gst.State.PLAYING)
+        pipelines.append(pipeline)
+    ready.set()
+    stop.wait()
+    for pipeline in pipelines:
+        pipeline.set_state(Gst.State.NULL)
+
+
+def _measure(seconds, engine=None):
+    proc0, wall0 = time.process_time(), time.monotonic()
+    while time.monotonic() - wall0 < seconds:
+        if engine is not None and not engine.sampling:
+            engine.poll_metrics()
+        time.sleep(0.05)
+    return (time.process_time() - proc0) * 1000.0 / (time.monotonic() - wall0)
+
+
+def measure_decode_branch(port, seconds, warmup, jitter_ms):
+    """CPU of one receive branch as add_peer builds it, alone in this process."""
+    pipeline = Gst.parse_launch(
+        f"udpsrc port={port} caps=\"application/x-rtp,media=audio,encoding-name=OPUS,clock-rate={RATE},payload=96\" "
+        f"! rtpjitterbuffer latency={jitter_ms} drop-on-late=true do-lost=true ! rtpopusdepay ! opusdec "
+        f"! audioconvert ! audioresample ! audio/x-raw,format=F32LE,rate={RATE},channels=1 ! fakesink sync=false"
+    )
+    pipeline.set_state(Gst.State.PLAYING)
+    try:
+        time.sleep(warmup)
+        return _measure(seconds)
+    finally:
+        pipeline.set_state(Gst.State.NULL)
+
+
+def run(peers, seconds, warmup):
+    os.environ["TCHAT_MAX_SESSIONS"] = str(peers + 1)
+    from app.media import MediaEngine
+    from app.metrics import Metrics
+    from app.vad import VADManager
+
+    model = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "silero_vad.onnx")
+    metrics = Metrics()
+    engine = MediaEngine(metrics, VADManager(metrics, model))
+    engine.standby_pool = False
+    host_base = _port_block(peers)
+    peer_listen = [free_port() for _ in range(peers)]
+    reference_port = free_port()
+    targets = [(host_base + STRIDE * idx, peer_listen[idx]) for idx in range(peers)]
+    targets.append((reference_port, free_port()))
+
+    ctx = multiprocessing.get_context("spawn")
+    ready, stop = ctx.Event(), ctx.Event()
+    senders = ctx.Process(target=run_senders, args=(targets, int(engine.opus_frame_ms), ready, stop), daemon=True)
+    senders.start()
+    steps = []
+    try:
+        if not ready.wait(15.0):
+            return {"error": "sender process did not start"}
+        idle = _measure(seconds)
+        engine.start(host_base, "127.0.0.1", peer_listen[0], "test:sine:440", "null")
+        if engine.conf_mixer is None:
+            return {"error": "conference mixer not available (audiomixer missing?)"}
+        for count in range(1, peers + 1):
+            if count > 1:
+                idx = count - 1
+                if not engine.add_peer(f"peer{idx}", "127.0.0.1", peer_listen[idx], host_base + STRIDE * idx):
+                    return {"error": f"add_peer failed at {count} participants"}
+            time.sleep(warmup)
+            cpu = _measure(seconds, engine)
+            steps.append({"participants": count, "cpu_ms_per_s": round(cpu, 2)})
+            print(f"{count} participant(s): {cpu:7.2f} ms CPU/s")
+        jitter_ms = engine.jitter_latency_ms
+        engine.stop(refill=False)
+        decode = measure_decode_branch(reference_port, seconds, warmup, jitter_ms) - idle
+    finally:
+        if engine.pipeline:
+            engine.stop(refill=False)
+        stop.set()
+        senders.join(timeout=5.0)
+    deltas = [b["cpu_ms_per_s"] - a["cpu_ms_per_s"] for a, b in zip(steps, steps[1:])]
+    per_peer = sum(deltas) / len(deltas) if deltas else None
+    return {
+        "peers": peers,
+        "seconds": seconds,
+        "idle_cpu_ms_per_s": round(idle, 2),
+        "steps": steps,
+        "per_participant_ms_per_s": round(per_peer, 2) if per_peer is not None else None,
+        "decode_branch_ms_per_s": round(decode, 2),
+        "ratio": round(per_peer / decode, 2) if per_peer is not None and decode > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peers", type=int, default=4, help="participants besides the host (default 4)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="measurement window per step")
+    parser.add_argument("--warmup", type=float, default=2.0, help="settle time after each change")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    Gst.init(["--gst-disable-registry-fork"])
+    result = run(max(1, args.peers), args.seconds, args.warmup)
+    if "error" in result:
+        print("failed:", result["error"])
+        return 1
+    if result["per_participant_ms_per_s"] is not None:
+        print(
+            f"per added participant {result['per_participant_ms_per_s']:.2f} ms/s; "
+            f"one decode branch alone {result['decode_branch_ms_per_s']:.2f} ms/s "
+            f"(ratio {result['ratio'] if result['ratio'] is not None else '-'})"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "conference", **result}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""VAD-driven DTX on a call recording: bandwidth and encoder CPU per TCHAT_VAD_DTX mode.
+
+Side A plays a WAV file (a real call: speech with pauses, so the VAD has something to decide)
+as its microphone, and side B receives over localhost. For each mode the bench reports A's
+packets/s and wire kbps, frames encoded, CPU of the thread that runs opusenc, process CPU and
+the share of the call A spent in DTX. Savings are relative to "off".
+
+Usage:
+    python bench_dtx.py call.wav [--modes off,thin,drop] [--seconds 60] [--json out.json]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import wave
+
+os.environ.setdefault("GST_PLUGIN_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "native", "build", "gst-plugins"))
+
+import gi
+
+gi.require_version("Gst", "1.0")
+from gi.repository import Gst
+
+import numpy as np
+
+from bench_e2e import thread_cpu
+from testutil import free_port
+
+RATE = 48000
+
+
+def load_wav(path, seconds=None):
+    """16-bit PCM WAV → float32 mono at RATE (linear resampling is enough for a VAD/bitrate bench)."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError("expected 16-bit PCM")
+        channels, rate = wav.getnchannels(), wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    audio = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    audio = audio.reshape(-1, channels).mean(axis=1)
+    if rate != RATE:
+        positions = np.arange(int(len(audio) * RATE / rate)) * (rate / RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    if seconds:
+        audio = audio[: int(seconds * RATE)]
+    return audio
+
+
+def run_mode(mode, audio):
+    from app.backends import NullSink, NumpySource
+    from app.media import MediaEngine
+    from app.metrics import Metrics
+    from app.vad import VADManager
+
+    model = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "silero_vad.onnx")
+    os.environ["TCHAT_VAD_DTX"] = mode
+    engines = []
+    for _side in ("a", "b"):
+        metrics = Metrics()
+        engine = MediaEngine(metrics, VADManager(metrics, model))
+        engine.standby_pool = False
+        engines.append(engine)
+    side_a, side_b = engines
+    port_a, port_b = free_port(), free_port()
+    source = NumpySource(audio)
+    encoder_threads = set()
+    frames = [0]
+
+    def on_encoded(_pad, _info):
+        encoder_threads.add(str(threading.get_native_id()))
+        frames[0] += 1
+        return Gst.PadProbeReturn.OK
+
+    try:
+        side_b.start(port_b, "127.0.0.1", port_a, NumpySource(np.zeros(RATE, dtype=np.float32), loop=True), NullSink())
+        side_a.start(port_a, "127.0.0.1", port_b, source, NullSink())
+        side_a.opusenc.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_encoded)
+        started, proc0, cpu0 = time.monotonic(), time.process_time(), thread_cpu()
+        deadline = started + len(audio) / RATE + 2.0
+        while time.monotonic() < deadline and not source.done.is_set():
+            for engine in engines:
+                if not engine.sampling:
+                    engine.poll_metrics()
+            time.sleep(0.05)
+        seconds = time.monotonic() - started
+        proc, cpu1 = time.process_time() - proc0, thread_cpu()
+        side_a.poll_metrics()
+        snapshot = side_a.metrics.snapshot()
+    except Exception as exc:
+        return {"error": str(exc)}
+    finally:
+        for engine in engines:
+            engine.stop(refill=False)
+    tx = snapshot["rtp_tx"]
+    encoder_cpu = None
+    if cpu0 is not None and cpu1 is not None:
+        # The encoding thread also runs EQ/limiter/payloader, which DTX does not skip.
+        used = sum(cpu - cpu0.get(key, 0.0) for key, cpu in cpu1.items() if key[0] in encoder_threads)
+        encoder_cpu = round(used * 1000.0 / seconds, 2)
+    return {
+        "mode": mode,
+        "seconds": round(seconds, 2),
+        "packets": tx.get("packets"),
+        "pps": round((tx.get("packets") or 0) / seconds, 1),
+        "kbps": round(((tx.get("bytes") or 0) + 28 * (tx.get("packets") or 0)) * 8.0 / seconds / 1000.0, 2),
+        "encoder_frames": frames[0],
+        "encoder_thread_cpu_ms_per_s": encoder_cpu,
+        "cpu_ms_per_s": round(proc * 1000.0 / seconds, 1),
+        "dtx": snapshot["vad_dtx"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wav", help="16-bit PCM WAV call recording")
+    parser.add_argument("--modes", default="off,thin,drop")
+    parser.add_argument("--seconds", type=float, help="use only the first N seconds")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    Gst.init(["--gst-disable-registry-fork"])
+    audio = load_wav(args.wav, args.seconds)
+    results = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        result = run_mode(mode, audio)
+        results[mode] = result
+        if "error" in result:
+            print(f"{mode:5s} failed: {result['error']}")
+            continue
+        dtx = result["dtx"] or {}
+        print(
+            f"{mode:5s} {result['pps']:6.1f} pps  {result['kbps']:6.2f} kbps  "
+            f"encoded {result['encoder_frames']} frames, thread cpu {result['encoder_thread_cpu_ms_per_s'] or 0:.1f} ms/s  "
+            f"cpu {result['cpu_ms_per_s']:6.1f} ms/s  in DTX {dtx.get('silent_pct', '-')}%"
+        )
+    base = results.get("off")
+    if base and "error" not in base:
+        for mode, result in results.items():
+            if mode == "off" or "error" in result:
+                continue
+            saved_kbps = base["kbps"] - result["kbps"]
+            saved_frames = base["encoder_frames"] - result["encoder_frames"]
+            text = (
+                f"{mode:5s} saves {saved_kbps:.2f} kbps ({100.0 * saved_kbps / max(base['kbps'], 1e-9):.0f} %), "
+                f"{base['pps'] - result['pps']:.1f} pps, {100.0 * saved_frames / max(base['encoder_frames'], 1):.0f} % of encoded frames"
+            )
+            if base["encoder_thread_cpu_ms_per_s"] and result["encoder_thread_cpu_ms_per_s"] is not None:
+                text += f", encoder thread {base['encoder_thread_cpu_ms_per_s'] - result['encoder_thread_cpu_ms_per_s']:.1f} ms/s"
+            print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "dtx", "wav": args.wav, "results": results}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
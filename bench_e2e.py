@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""End-to-end loopback benchmark: two MediaEngines over localhost UDP.
+
+Side A captures a NumPy signal with chirp markers; side B records its playout. Markers are
+found by normalised cross-correlation and matched against their capture time to get
+mouth-to-ear latency. Per-thread CPU (GStreamer names streaming threads `<queue>:src`),
+queue overruns and A's send rate (packets/s, kbps on the wire) are reported per configuration.
+The ptime-* configs compare packet times.
+
+Usage:
+    python bench_e2e.py [--configs all-on,dfn-off] [--seconds 10] [--json out.json]
+    python bench_e2e.py --json new.json --baseline main.json   # exit 1 on regression
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("GST_PLUGIN_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "native", "build", "gst-plugins"))
+
+import gi
+
+gi.require_version("Gst", "1.0")
+from gi.repository import Gst
+
+import numpy as np
+
+from testutil import env_override, free_port
+
+RATE = 48000
+MARKER_MS = 10
+MARKER_INTERVAL_S = 0.5
+WARMUP_S = 1.0
+DETECT_THRESHOLD = 0.5
+
+CONFIGS = {
+    "all-on": {},
+    "aec-off": {"TCHAT_DISABLE_AEC": "1"},
+    "dfn-off": {"TCHAT_DISABLE_DFN": "1"},
+    "cng-off": {"TCHAT_CNG_ENABLED": "0"},
+    "all-off": {"TCHAT_DISABLE_AEC": "1", "TCHAT_DISABLE_DFN": "1", "TCHAT_CNG_ENABLED": "0"},
+    "jitter-tight": {"TCHAT_JITTER_LATENCY_MS": "10", "TCHAT_JITTER_MIN_MS": "5", "TCHAT_JITTER_MAX_MS": "40"},
+    "jitter-loose": {"TCHAT_JITTER_LATENCY_MS": "80", "TCHAT_JITTER_MIN_MS": "40", "TCHAT_JITTER_MAX_MS": "200"},
+    "ptime-10": {"TCHAT_OPUS_FRAME_MS": "10"},
+    "ptime-20": {"TCHAT_OPUS_FRAME_MS": "20"},
+    "ptime-40": {"TCHAT_OPUS_FRAME_MS": "40"},
+    "ptime-60": {"TCHAT_OPUS_FRAME_MS": "60"},
+}
+
+
+def chirp():
+    t = np.arange(int(RATE * MARKER_MS / 1000)) / RATE
+    f0, f1 = 500.0, 4000.0
+    phase = 2 * np.pi * (f0 * t + (f1 - f0) * t * t / (2 * t[-1]))
+    return (0.7 * np.hanning(t.size) * np.sin(phase)).astype(np.float32)
+
+
+def marker_signal(seconds):
+    """Low-level noise bed with a chirp every MARKER_INTERVAL_S; returns (signal, marker sample indices)."""
+    rng = np.random.default_rng(1)
+    signal = (0.003 * rng.standard_normal(int(RATE * seconds))).astype(np.float32)
+    template = chirp()
+    markers = []
+    pos = int(WARMUP_S * RATE)
+    while pos + template.size < signal.size:
+        signal[pos:pos + template.size] += template
+        markers.append(pos)
+        pos += int(MARKER_INTERVAL_S * RATE)
+    return signal, markers
+
+
+def detect(recorded, template):
+    """Sample indices where the normalised cross-correlation with template peaks above threshold."""
+    if recorded.size < template.size:
+        return []
+    n = recorded.size + template.size - 1
+    nfft = 1 << (n - 1).bit_length()
+    corr = np.fft.irfft(np.fft.rfft(recorded, nfft) * np.conj(np.fft.rfft(template, nfft)), nfft)[:recorded.size]
+    energy = np.concatenate(([0.0], np.cumsum(recorded.astype(np.float64) ** 2)))
+    window = energy[template.size:] - energy[:-template.size]
+    window = np.concatenate((window, np.full(recorded.size - window.size, np.inf)))
+    ncc = corr / (np.sqrt(np.maximum(window, 1e-12)) * np.linalg.norm(template))
+    hits = []
+    guard = int(MARKER_INTERVAL_S * RATE / 2)
+    idx = 0
+    while idx < ncc.size:
+        if ncc[idx] >= DETECT_THRESHOLD:
+            end = min(ncc.size, idx + guard)
+            hits.append(idx + int(np.argmax(ncc[idx:end])))
+            idx = end
+        else:
+            idx += 1
+    return hits
+
+
+def _wall_at(index, timeline):
+    """time.monotonic() of sample `index` given (first sample, wall) pairs per buffer."""
+    for (start, wall), nxt in zip(timeline, timeline[1:] + [(None, None)]):
+        if nxt[0] is None or index < nxt[0]:
+            return wall + (index - start) / RATE if index >= start else None
+    return None
+
+
+def match_latencies(markers, sent, detections, arrivals):
+    sent_walls = [_wall_at(m, sent) for m in markers]
+    latencies = []
+    next_marker = 0
+    for hit in detections:
+        heard = _wall_at(hit, arrivals)
+        if heard is None:
+            continue
+        # Latest marker already captured before it was heard, not yet claimed.
+        best = None
+        for idx in range(next_marker, len(sent_walls)):
+            wall = sent_walls[idx]
+            if wall is None or wall > heard:
+                break
+            best = idx
+        if best is None:
+            continue
+        latency_ms = (heard - sent_walls[best]) * 1000.0
+        if latency_ms < 1000.0:
+            latencies.append(latency_ms)
+            next_marker = best + 1
+    return latencies
+
+
+def thread_cpu():
+    """CPU seconds per thread name (Linux only; None elsewhere)."""
+    root = "/proc/self/task"
+    if not os.path.isdir(root):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    usage = {}
+    for tid in os.listdir(root):
+        try:
+            with open(os.path.join(root, tid, "comm"), encoding="utf-8") as fh:
+                name = fh.read().strip()
+            with open(os.path.join(root, tid, "stat"), encoding="utf-8") as fh:
+                fields = fh.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        usage[(tid, name)] = (int(fields[11]) + int(fields[12])) / ticks
+    return usage
+
+
+def cpu_by_stage(before, after, seconds):
+    if before is None or after is None:
+        return None
+    stages = {}
+    for key, cpu in after.items():
+        name = key[1]
+        stages[name] = stages.get(name, 0.0) + cpu - before.get(key, 0.0)
+    return {name: round(cpu * 1000.0 / seconds, 2) for name, cpu in sorted(stages.items(), key=lambda kv: -kv[1]) if cpu > 0}
+
+
+def percentiles(values):
+    if not values:
+        return None
+    arr = np.asarray(values)
+    return {
+        "min": float(arr.min()),
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+        "max": float(arr.max()),
+    }
+
+
+def run_config(name, overrides, seconds):
+    from app.backends import NullSink, NumpySink, NumpySource
+    from app.media import MediaEngine
+    from app.metrics import Metrics
+    from app.vad import VADManager
+
+    model = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "silero_vad.onnx")
+    signal, markers = marker_signal(seconds)
+    with env_override(overrides):
+        engines = []
+        for _side in ("a", "b"):
+            metrics = Metrics()
+            engine = MediaEngine(metrics, VADManager(metrics, model))
+            engine.standby_pool = False
+            engines.append(engine)
+        side_a, side_b = engines
+        port_a, port_b = free_port(), free_port()
+        source = NumpySource(signal)
+        recorder = NumpySink()
+        try:
+            side_b.start(port_b, "127.0.0.1", port_a, NumpySource(np.zeros(RATE, dtype=np.float32), loop=True), recorder)
+            cpu0, proc0 = thread_cpu(), time.process_time()
+            side_a.start(port_a, "127.0.0.1", port_b, source, NullSink())
+            deadline = time.monotonic() + seconds + 2.0
+            tx_rates = []
+            while time.monotonic() < deadline and not source.done.is_set():
+                for engine in engines:
+                    engine.poll_metrics()
+                tx = side_a.metrics.snapshot()["rtp_tx"]
+                if tx and (not tx_rates or tx_rates[-1] != (tx["pps"], tx["kbps"])):
+                    tx_rates.append((tx["pps"], tx["kbps"]))
+                time.sleep(0.25)
+            time.sleep(0.5)
+            cpu1, proc1 = thread_cpu(), time.process_time()
+            overruns = {side: dict(engine.metrics.snapshot()["queue_overruns"]) for side, engine in zip("ab", engines)}
+        except Exception as exc:
+            return {"error": str(exc)}
+        finally:
+            for engine in engines:
+                engine.stop(refill=False)
+    detections = detect(recorder.audio(), chirp())
+    latencies = match_latencies(markers, source.sent, detections, recorder.arrivals)
+    return {
+        "overrides": overrides,
+        "markers_sent": len(markers),
+        "markers_detected": len(latencies),
+        "latency_ms": percentiles(latencies),
+        "cpu_ms_per_s": round((proc1 - proc0) * 1000.0 / seconds, 2),
+        "cpu_ms_per_s_by_thread": cpu_by_stage(cpu0, cpu1, seconds),
+        "queue_overruns": overruns,
+        "send_pps": float(np.median([pps for pps, _kbps in tx_rates])) if tx_rates else None,
+        "send_kbps": float(np.median([kbps for _pps, kbps in tx_rates])) if tx_rates else None,
+    }
+
+
+def find_regressions(results, baseline, tolerance):
+    problems = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or "error" in result or "error" in base:
+            continue
+        old, new = (base.get("latency_ms") or {}).get("p95"), (result.get("latency_ms") or {}).get("p95")
+        if old is not None and (new is None or new > old * (1.0 + tolerance) + 2.0):
+            problems.append(f"{name}: p95 latency {old:.1f} -> {new if new is None else round(new, 1)} ms")
+        old_rate = base["markers_detected"] / max(1, base["markers_sent"])
+        new_rate = result["markers_detected"] / max(1, result["markers_sent"])
+        if new_rate < old_rate - 0.1:
+            problems.append(f"{name}: marker detection {old_rate:.0%} -> {new_rate:.0%}")
+        if base.get("cpu_ms_per_s") and result["cpu_ms_per_s"] > base["cpu_ms_per_s"] * (1.0 + tolerance) + 5.0:
+            problems.append(f"{name}: CPU {base['cpu_ms_per_s']:.0f} -> {result['cpu_ms_per_s']:.0f} ms/s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", default=",".join(CONFIGS), help="comma-separated subset of: " + ", ".join(CONFIGS))
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--profile", help="TCHAT_PROFILE for both engines")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="earlier --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    args = parser.parse_args()
+
+    Gst.init(["--gst-disable-registry-fork"])
+    if args.profile:
+        os.environ["TCHAT_PROFILE"] = args.profile
+    results = {}
+    for name in [c.strip() for c in args.configs.split(",") if c.strip()]:
+        if name not in CONFIGS:
+            parser.error(f"unknown config {name}")
+        result = run_config(name, CONFIGS[name], args.seconds)
+        results[name] = result
+        if "error" in result:
+            print(f"{name:13s} skipped: {result['error']}")
+            continue
+        lat = result["latency_ms"] or {}
+        print(
+            f"{name:13s} markers {result['markers_detected']}/{result['markers_sent']}  "
+            f"latency p50/p95/p99 {lat.get('p50', float('nan')):.1f}/{lat.get('p95', float('nan')):.1f}/{lat.get('p99', float('nan')):.1f} ms  "
+            f"cpu {result['cpu_ms_per_s']:.0f} ms/s  "
+            f"send {result['send_pps'] or 0:.0f} pps {result['send_kbps'] or 0:.1f} kbps"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "e2e", "seconds": args.seconds, "profile": args.profile, "results": results}, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            problems = find_regressions(results, json.load(fh)["results"], args.tolerance)
+        for problem in problems:
+            print("REGRESSION", problem)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Replay packet arrival traces through the jitter-buffer latency controllers.
+
+Compares the percentile playout-delay estimator with the legacy avg-jitter EWMA follower.
+For each trace it reports late-packet loss and the latency the buffer added (mean and p95
+over packets). A packet counts as late when its delay above the sliding minimum transit
+exceeds the buffer latency in force when it arrived.
+
+Traces are text files with one packet per line: `arrival_s rtp_ts seq [remote_silent]`.
+Record one from a live call with TCHAT_JITTER_TRACE=path. Without --trace, synthetic
+network scenarios are generated.
+
+Usage:
+    python bench_jitter.py [--trace call1.txt --trace call2.txt] [--percentile 0.97] [--json out.json]
+"""
+import argparse
+import json
+import math
+import random
+import sys
+from collections import deque
+
+from app.jitter import PlayoutDelayEstimator
+
+CLOCK_RATE = 48000
+FRAME_MS = 20
+POLL_S = 0.05  # MediaEngine metrics sampler period during calls
+LEGACY_POLL_S = 0.5  # the GUI timer the legacy follower ran on
+MIN_MS, MAX_MS, START_MS = 10, 120, 30
+
+
+def load_trace(path):
+    packets = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            fields = line.split()
+            if len(fields) < 3:
+                continue
+            silent = bool(int(fields[3])) if len(fields) > 3 else True
+            packets.append((float(fields[0]), int(fields[1]), int(fields[2]), silent))
+    return packets
+
+
+def synthetic(kind, seconds=60.0, seed=3):
+    """Generated arrivals for a 20 ms Opus stream; talkspurts of 1.5 s speech / 1 s silence."""
+    rng = random.Random(seed)
+    packets = []
+    frames = int(seconds * 1000 / FRAME_MS)
+    spike = 0.0
+    for idx in range(frames):
+        t = idx * FRAME_MS / 1000.0
+        if kind == "steady":
+            delay = abs(rng.gauss(0.0, 0.004))
+        elif kind == "bursty":
+            if rng.random() < 0.01:
+                spike = rng.uniform(0.04, 0.09)
+            spike = max(0.0, spike - FRAME_MS / 1000.0)
+            delay = spike + abs(rng.gauss(0.0, 0.003))
+        elif kind == "step":
+            sigma = 0.025 if 20.0 <= t < 40.0 else 0.003
+            delay = abs(rng.gauss(0.0, sigma))
+        elif kind == "wifi":
+            delay = rng.expovariate(1.0 / 0.008)
+        else:
+            raise ValueError(kind)
+        silent = (t % 2.5) >= 1.5
+        packets.append((1.0 + t + 0.020 + delay, (idx * CLOCK_RATE * FRAME_MS // 1000) & 0xFFFFFFFF, idx & 0xFFFF, silent))
+    packets.sort()
+    return packets
+
+
+class LegacyController:
+    """MediaEngine._adapt_jitter fed with the RFC 3550 interarrival jitter rtpjitterbuffer reports."""
+
+    def __init__(self):
+        self.latency_ms = START_MS
+        self._jitter_ms = 0.0
+        self._prev = None
+        self._last_adjust = -1e9
+        self._next_poll = None
+
+    def on_packet(self, arrival_s, rtp_ts, _silent):
+        transit = arrival_s * 1000.0 - rtp_ts * 1000.0 / CLOCK_RATE
+        if self._prev is not None:
+            self._jitter_ms += (abs(transit - self._prev) - self._jitter_ms) / 16.0
+        self._prev = transit
+        if self._next_poll is None:
+            self._next_poll = arrival_s
+        while arrival_s >= self._next_poll:
+            self._poll(self._next_poll)
+            self._next_poll += LEGACY_POLL_S
+
+    def _poll(self, now):
+        if now - self._last_adjust < 2.0:
+            return
+        target = max(MIN_MS, min(MAX_MS, self._jitter_ms * 2.0 + 5.0))
+        new_latency = int(round(self.latency_ms * 0.9 + target * 0.1))
+        if abs(new_latency - self.latency_ms) >= 5:
+            self.latency_ms = new_latency
+            self._last_adjust = now
+
+
+class PercentileController:
+    """MediaEngine._adapt_jitter_percentile: estimator per packet, silence-gated updates per poll."""
+
+    def __init__(self, percentile, decay_ms_per_s, attack_wait_ms=200, min_step_ms=5):
+        self.latency_ms = START_MS
+        self.estimator = PlayoutDelayEstimator(
+            percentile=percentile, decay_ms_per_s=decay_ms_per_s, min_ms=MIN_MS, max_ms=MAX_MS, clock_rate=CLOCK_RATE
+        )
+        self.attack_wait_ms = attack_wait_ms
+        self.min_step_ms = min_step_ms
+        self._pending_since = None
+        self._next_poll = None
+        self._silent = True
+
+    def on_packet(self, arrival_s, rtp_ts, silent):
+        self.estimator.add(arrival_s, rtp_ts)
+        self._silent = silent
+        if self._next_poll is None:
+            self._next_poll = arrival_s
+        while arrival_s >= self._next_poll:
+            self._poll(self._next_poll)
+            self._next_poll += POLL_S
+
+    def _poll(self, now):
+        target = self.estimator.update(now)
+        if target is None:
+            return
+        new_latency = int(max(MIN_MS, min(MAX_MS, round(target))))
+        if abs(new_latency - self.latency_ms) < self.min_step_ms:
+            self._pending_since = None
+            return
+        if self._pending_since is None:
+            self._pending_since = now
+        overdue = new_latency > self.latency_ms and (now - self._pending_since) * 1000.0 >= self.attack_wait_ms
+        if self._silent or overdue:
+            self.latency_ms = new_latency
+            self._pending_since = None
+
+
+def simulate(packets, controller, window_s=10.0):
+    late = 0
+    latencies = []
+    transits = deque()
+    rtp_ext = 0
+    last_rtp = None
+    for arrival, rtp_ts, _seq, silent in packets:
+        if last_rtp is not None:
+            step = (rtp_ts - last_rtp) & 0xFFFFFFFF
+            rtp_ext += step - 0x100000000 if step >= 0x80000000 else step
+        last_rtp = rtp_ts
+        transit = arrival - rtp_ext / CLOCK_RATE
+        while transits and transits[-1][1] >= transit:
+            transits.pop()
+        transits.append((arrival, transit))
+        while transits[0][0] < arrival - window_s:
+            transits.popleft()
+        latency = controller.latency_ms
+        if (transit - transits[0][1]) * 1000.0 > latency:
+            late += 1
+        latencies.append(latency)
+        controller.on_packet(arrival, rtp_ts, silent)
+    latencies.sort()
+    return {
+        "packets": len(packets),
+        "late_pct": 100.0 * late / max(1, len(packets)),
+        "latency_mean_ms": sum(latencies) / max(1, len(latencies)),
+        "latency_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", action="append", default=[], help="recorded trace file (repeatable)")
+    parser.add_argument("--percentile", type=float, default=0.97)
+    parser.add_argument("--decay", type=float, default=20.0, help="decay in ms per second (default 20)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    traces = {path: load_trace(path) for path in args.trace}
+    if not traces:
+        traces = {kind: synthetic(kind) for kind in ("steady", "bursty", "step", "wifi")}
+    results = {}
+    print(f"{'trace':12s} {'algorithm':11s} {'late %':>7s} {'mean ms':>8s} {'p95 ms':>7s}")
+    for name, packets in traces.items():
+        results[name] = {
+            "ewma": simulate(packets, LegacyController()),
+            "percentile": simulate(packets, PercentileController(args.percentile, args.decay)),
+        }
+        for algo, res in results[name].items():
+            p95 = res["latency_p95_ms"]
+            print(f"{name[-12:]:12s} {algo:11s} {res['late_pct']:7.2f} {res['latency_mean_ms']:8.1f} "
+                  f"{p95 if p95 is not None else math.nan:7.0f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "jitter", "percentile": args.percentile, "results": results}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Loss-feedback loopback check: A → lossy UDP relay → B, receiver reports back over signaling.
+
+Two MediaEngines and two Signaling endpoints run on localhost. A's RTP goes through a relay
+that drops packets according to a schedule. B reports what its jitter buffer saw over the
+signaling channel, and A adapts Opus bitrate, in-band FEC and expected loss. Each second
+prints the injected loss, what B measured and A's encoder settings. At the end it checks
+that FEC turned on under loss and the settings recovered once loss stopped.
+
+Usage:
+    python bench_loss.py [--schedule 0:0,10:5,20:15,35:0] [--seconds 50] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+os.environ.setdefault("GST_PLUGIN_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "native", "build", "gst-plugins"))
+os.environ.setdefault("TCHAT_SIGNAL_BIND", "127.0.0.1")
+
+import gi
+
+gi.require_version("Gst", "1.0")
+from gi.repository import Gst
+
+from testutil import free_port
+
+
+def parse_schedule(text):
+    """"t0:pct,t1:pct,..." → sorted [(start_s, drop probability)]."""
+    steps = []
+    for item in text.split(","):
+        start, pct = item.split(":")
+        steps.append((float(start), float(pct) / 100.0))
+    return sorted(steps)
+
+
+class LossRelay:
+    """UDP forwarder that drops each datagram with the probability scheduled for the current time."""
+
+    def __init__(self, target, schedule, seed=7):
+        self.target = target
+        self.schedule = schedule
+        self.rng = random.Random(seed)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.2)
+        self.port = self.sock.getsockname()[1]
+        self.forwarded = 0
+        self.dropped = 0
+        self.started = None
+        self._running = False
+        self._thread = None
+
+    def loss_at(self, elapsed):
+        prob = 0.0
+        for start, value in self.schedule:
+            if elapsed >= start:
+                prob = value
+        return prob
+
+    def start(self):
+        self.started = time.monotonic()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="loss-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        self.sock.close()
+
+    def _run(self):
+        while self._running:
+            try:
+                data, _addr = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if self.rng.random() < self.loss_at(time.monotonic() - self.started):
+                self.dropped += 1
+                continue
+            self.sock.sendto(data, self.target)
+            self.forwarded += 1
+
+
+def run(schedule, seconds):
+    from app.media import MediaEngine
+    from app.metrics import Metrics
+    from app.signaling import Signaling
+    from app.vad import VADManager
+
+    model = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "silero_vad.onnx")
+    sides = {}
+    for side in ("a", "b"):
+        metrics = Metrics()
+        engine = MediaEngine(metrics, VADManager(metrics, model))
+        engine.standby_pool = False
+        signaling = Signaling(metrics=metrics, on_report=engine.apply_receiver_report)
+        engine.on_receiver_report = signaling.send_report
+        sides[side] = (engine, signaling, free_port(), free_port())
+    (engine_a, sig_a, rtp_a, sig_port_a), (engine_b, sig_b, rtp_b, sig_port_b) = sides["a"], sides["b"]
+    relay = LossRelay(("127.0.0.1", rtp_b), schedule)
+    timeline = []
+    try:
+        sig_b.start_listen(sig_port_b, rtp_port=rtp_b)
+        sig_a.start_listen(sig_port_a, rtp_port=rtp_a)
+        engine_b.start(rtp_b, "127.0.0.1", rtp_a, "test:sine:330", "null")
+        engine_a.start(rtp_a, "127.0.0.1", relay.port, "test:sine:440", "null")
+        sig_a.call("127.0.0.1", sig_port_b)
+        deadline = time.monotonic() + 3.0
+        while sig_a.state != "connected" and time.monotonic() < deadline:
+            time.sleep(0.05)
+        if sig_a.state != "connected":
+            return {"error": "signaling did not connect"}
+        relay.start()
+        next_print = 1.0
+        while time.monotonic() - relay.started < seconds:
+            for engine in (engine_a, engine_b):
+                if not engine.sampling:
+                    engine.poll_metrics()
+            elapsed = time.monotonic() - relay.started
+            if elapsed >= next_print:
+                next_print += 1.0
+                measured = engine_b.metrics.snapshot()["loss_feedback"].get("local", {})
+                bitrate, fec, packet_loss = engine_a.opus_settings()
+                row = {
+                    "t": round(elapsed, 1),
+                    "injected_pct": round(relay.loss_at(elapsed) * 100.0, 1),
+                    "measured_pct": measured.get("loss_pct"),
+                    "bitrate": bitrate,
+                    "fec": fec,
+                    "packet_loss": packet_loss,
+                }
+                timeline.append(row)
+                print(f"{row['t']:5.1f}s  injected {row['injected_pct']:5.1f}%  measured {row['measured_pct'] if row['measured_pct'] is not None else '-':>5}%  "
+                      f"opus {bitrate // 1000}k fec={'on' if fec else 'off'} loss={packet_loss}%")
+            time.sleep(0.1)
+    finally:
+        relay.stop()
+        sig_a.hangup()
+        for engine, signaling, _rtp, _sig in sides.values():
+            signaling.stop()
+            engine.stop(refill=False)
+    lossy = [row for row in timeline if row["injected_pct"] > 0]
+    tail = timeline[-5:]
+    return {
+        "schedule": schedule,
+        "forwarded": relay.forwarded,
+        "dropped": relay.dropped,
+        "fec_under_loss": any(row["fec"] for row in lossy),
+        "recovered": bool(tail) and all(not row["fec"] for row in tail),
+        "timeline": timeline,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schedule", default="0:0,10:5,20:15,35:0", help="start_s:loss_pct steps (default 0:0,10:5,20:15,35:0)")
+    parser.add_argument("--seconds", type=float, default=50.0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    Gst.init(["--gst-disable-registry-fork"])
+    result = run(parse_schedule(args.schedule), args.seconds)
+    if "error" in result:
+        print("failed:", result["error"])
+        return 1
+    print(f"relay forwarded {result['forwarded']} dropped {result['dropped']}; "
+          f"FEC under loss: {result['fec_under_loss']}; recovered: {result['recovered']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "loss", **result}, fh, indent=2)
+    return 0 if result["fec_under_loss"] and result["recovered"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""Offline pipeline benchmarks (needs GStreamer; DFN/AEC plugins optional).
+
+Usage:
+    python bench_pipeline.py stages [--seconds 20]
+    python bench_pipeline.py caps [--seconds 20] [--device-caps CAPS]
+    python bench_pipeline.py profiles [--seconds 20] [--device-rate 44100]
+    python bench_pipeline.py startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import gi
+
+gi.require_version("Gst", "1.0")
+from gi.repository import Gst
+
+RATE = 48000
+F32 = f"audio/x-raw,format=F32LE,rate={RATE},channels=1,layout=interleaved"
+S16 = f"audio/x-raw,format=S16LE,rate={RATE},channels=1,layout=interleaved"
+
+
+def _have(name):
+    return Gst.ElementFactory.find(name) is not None
+
+
+def _dfn_desc():
+    if not _have("deepfilternet"):
+        return "identity"
+    models = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "DeepFilterNet")
+    return f"deepfilternet model-dir={models}" if os.path.isdir(models) else "deepfilternet"
+
+
+def _uplink_desc(seconds, full):
+    """Same element order as MediaEngine's uplink, fed by a non-live test source."""
+    buffers = int(seconds * 100)
+    parts = [
+        f"audiotestsrc is-live=false num-buffers={buffers} samplesperbuffer={RATE // 100} wave=pink-noise",
+        "audioconvert", "audioresample quality=10", f"capsfilter caps={F32}",
+    ]
+    if full and _have("audiocheblimit"):
+        parts.append("audiocheblimit mode=high-pass cutoff=100 poles=4")
+    parts.append("queue max-size-buffers=10 max-size-time=0 max-size-bytes=0")
+    if full:
+        parts += [
+            "queue max-size-buffers=10 max-size-time=0 max-size-bytes=0",
+            f"capsfilter caps={F32}",
+            _dfn_desc(),
+            "queue max-size-buffers=10 max-size-time=0 max-size-bytes=0",
+        ]
+    parts.append("valve drop=false")
+    if full and _have("equalizer-3bands"):
+        parts.append("equalizer-3bands band0=-2 band1=2 band2=1")
+    if _have("audiolimiter"):
+        parts.append("audiolimiter")
+    parts += [
+        "audioconvert", "audioresample quality=10", f"capsfilter caps={S16}",
+        "opusenc frame-size=10 audio-type=voice complexity=10",
+        "rtpopuspay pt=96", "fakesink sync=false",
+    ]
+    return " ! ".join(parts)
+
+
+def run_cpu(desc, seconds):
+    pipeline = Gst.parse_launch(desc)
+    elements = sum(1 for _ in pipeline.iterate_elements())
+    bus = pipeline.get_bus()
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    pipeline.set_state(Gst.State.PLAYING)
+    msg = bus.timed_pop_filtered(Gst.CLOCK_TIME_NONE, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+    pipeline.set_state(Gst.State.NULL)
+    if msg and msg.type == Gst.MessageType.ERROR:
+        err, _debug = msg.parse_error()
+        raise RuntimeError(err.message)
+    return {
+        "elements": elements,
+        "cpu_ms_per_audio_s": cpu * 1000.0 / seconds,
+        "realtime_factor": seconds / wall if wall > 0 else None,
+    }
+
+
+def bench_stages(args):
+    results = {}
+    for label, full in (("minimal", False), ("full", True)):
+        results[label] = run_cpu(_uplink_desc(args.seconds, full), args.seconds)
+        r = results[label]
+        print(f"{label:8s} elements={r['elements']:3d}  cpu={r['cpu_ms_per_audio_s']:7.1f} ms/s  x{r['realtime_factor']:.0f} realtime")
+    saved = results["full"]["cpu_ms_per_audio_s"] - results["minimal"]["cpu_ms_per_audio_s"]
+    print(f"minimal saves {saved:.1f} ms CPU per second of audio")
+    return results
+
+
+def _converters(need, quality=10):
+    parts = []
+    if need[0]:
+        parts.append("audioconvert")
+    if need[1]:
+        parts.append(f"audioresample quality={quality}")
+    return parts
+
+
+def _roundtrip_desc(seconds, device_caps, plan):
+    """Capture → Opus → decode → playout with the converter pairs MediaEngine would build."""
+    buffers = int(seconds * 100)
+    enc_format = "S16LE" if plan["enc"][0] else "F32LE"
+    playout_format = "S16LE" if plan["playout"][0] else "F32LE"
+    parts = [
+        f"audiotestsrc is-live=false num-buffers={buffers} samplesperbuffer={RATE // 100} wave=pink-noise",
+        f"capsfilter caps={device_caps}",
+        *_converters(plan["capture"]),
+        f"capsfilter caps={F32}",
+        *_converters(plan["enc"]),
+        f"capsfilter caps=audio/x-raw,format={enc_format},rate={RATE},channels=1,layout=interleaved",
+        "opusenc frame-size=10 audio-type=voice",
+        "rtpopuspay pt=96",
+        "rtpopusdepay",
+        "opusdec",
+        *_converters(plan["dec"]),
+        f"capsfilter caps={F32}",
+        *_converters(plan["playout"]),
+        f"capsfilter caps=audio/x-raw,format={playout_format},rate={RATE},channels=1,layout=interleaved",
+        "fakesink sync=false",
+    ]
+    return " ! ".join(parts)
+
+
+def bench_caps(args):
+    from app.media import MediaEngine
+    from app.metrics import Metrics
+
+    engine = MediaEngine(Metrics(), None)
+    engine.target_sample_rate = RATE
+    device = Gst.Caps.from_string(args.device_caps)
+    opusenc = Gst.ElementFactory.make("opusenc", None)
+    opusdec = Gst.ElementFactory.make("opusdec", None)
+    planned = {
+        "capture": engine._conversions_needed(device, "F32LE"),
+        "enc": engine._conversions_needed(engine._probe_caps(opusenc, "sink"), "F32LE"),
+        "dec": engine._conversions_needed(engine._probe_caps(opusdec, "src"), "F32LE"),
+        "playout": engine._conversions_needed(device, "F32LE"),
+    }
+    baseline = {name: (True, True) for name in planned}
+    results = {}
+    for label, plan in (("all", baseline), ("planned", planned)):
+        results[label] = run_cpu(_roundtrip_desc(args.seconds, args.device_caps, plan), args.seconds)
+        results[label]["converters"] = sum(sum(need) for need in plan.values())
+        r = results[label]
+        print(f"{label:8s} converters={r['converters']}  elements={r['elements']:3d}  cpu={r['cpu_ms_per_audio_s']:7.1f} ms/s")
+    saved = results["all"]["elements"] - results["planned"]["elements"]
+    cpu = results["all"]["cpu_ms_per_audio_s"] - results["planned"]["cpu_ms_per_audio_s"]
+    print(f"planner saves {saved} elements and {cpu:.1f} ms CPU per second of audio (device caps {args.device_caps})")
+    return results
+
+
+def _profile_desc(profile, seconds, device_rate, live):
+    """Device-rate capture → resample → Opus → RTP → jitter buffer (live only) → decode → resample."""
+    queue = f"queue max-size-buffers={profile['queue_max_buffers']} max-size-time=0 max-size-bytes=0"
+    resample = f"audioresample quality={profile['resample_quality']}"
+    samples = device_rate // 100
+    parts = [
+        f"audiotestsrc is-live={'true' if live else 'false'} num-buffers={int(seconds * 100)} samplesperbuffer={samples} wave=pink-noise",
+        f"capsfilter caps=audio/x-raw,format=F32LE,rate={device_rate},channels=1,layout=interleaved",
+        queue, resample, f"capsfilter caps={F32}",
+        queue, "audioconvert", f"capsfilter caps={S16}",
+        f"opusenc frame-size={profile['opus_frame_ms']} audio-type=voice complexity={profile['opus_complexity']}",
+        "rtpopuspay pt=96",
+    ]
+    if live:
+        parts.append(f"rtpjitterbuffer latency={profile['jitter_latency_ms']}")
+    parts += [
+        "rtpopusdepay", "opusdec", queue, resample,
+        f"capsfilter caps=audio/x-raw,format=F32LE,rate={device_rate},channels=1,layout=interleaved",
+        f"fakesink sync={'true' if live else 'false'}",
+    ]
+    return " ! ".join(parts)
+
+
+def run_latency(desc, settle=1.0):
+    """Negotiated end-to-end latency (ms) of a live pipeline once it is PLAYING."""
+    pipeline = Gst.parse_launch(desc)
+    pipeline.set_state(Gst.State.PLAYING)
+    pipeline.get_state(5 * Gst.SECOND)
+    time.sleep(settle)
+    query = Gst.Query.new_latency()
+    ok = pipeline.query(query)
+    pipeline.set_state(Gst.State.NULL)
+    if not ok:
+        return None
+    _live, min_lat, _max_lat = query.parse_latency()
+    return min_lat / Gst.MSECOND
+
+
+def bench_profiles(args):
+    from app.profiles import PROFILES
+
+    results = {}
+    for name, profile in PROFILES.items():
+        result = run_cpu(_profile_desc(profile, args.seconds, args.device_rate, live=False), args.seconds)
+        result["latency_ms"] = run_latency(_profile_desc(profile, 5, args.device_rate, live=True))
+        result["settings"] = profile
+        results[name] = result
+        latency = "n/a" if result["latency_ms"] is None else f"{result['latency_ms']:6.1f} ms"
+        print(f"{name:12s} latency={latency}  cpu={result['cpu_ms_per_audio_s']:7.1f} ms/s  x{result['realtime_factor']:.0f} realtime")
+    return results
+
+
+READY_RE = re.compile(r"Ready \((\w+)\) in (\d+) ms, peak RSS ([\d.]+) MB")
+
+
+def run_startup(mode):
+    """Spawn app.main once and time it to its ready line; the app reports its own peak RSS."""
+    cmd = [sys.executable, "-m", "app.main", "--exit-after", "0.2"]
+    if mode == "headless":
+        cmd.insert(3, "--headless")
+    env = dict(os.environ, QT_QPA_PLATFORM=os.getenv("QT_QPA_PLATFORM", "offscreen"), TCHAT_STANDBY_POOL="0")
+    root = os.path.dirname(os.path.abspath(__file__))
+    wall0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    result = None
+    for line in proc.stdout:
+        match = READY_RE.search(line)
+        if match and result is None:
+            result = {
+                "wall_ms": (time.perf_counter() - wall0) * 1000.0,
+                "in_process_ms": float(match.group(2)),
+                "rss_mb": float(match.group(3)),
+            }
+    proc.wait(timeout=30)
+    if result is None:
+        raise RuntimeError(f"{mode} run never reported ready (exit {proc.returncode})")
+    return result
+
+
+def bench_startup(args):
+    results = {}
+    for mode in ("gui", "headless"):
+        runs = [run_startup(mode) for _ in range(args.runs)]
+        results[mode] = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+        r = results[mode]
+        print(f"{mode:8s} cold start {r['wall_ms']:6.0f} ms (in-process {r['in_process_ms']:.0f} ms)  peak RSS {r['rss_mb']:.1f} MB")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+    stages = sub.add_parser("stages", help="CPU of the uplink with all optional stages vs none")
+    stages.add_argument("--seconds", type=float, default=20.0)
+    stages.set_defaults(func=bench_stages)
+    caps = sub.add_parser("caps", help="round trip with every convert/resample pair vs the caps plan")
+    caps.add_argument("--seconds", type=float, default=20.0)
+    caps.add_argument("--device-caps", default=f"audio/x-raw,format=F32LE,rate={RATE},channels=1,layout=interleaved")
+    caps.set_defaults(func=bench_caps)
+    prof = sub.add_parser("profiles", help="negotiated latency and CPU of each named profile's round trip")
+    prof.add_argument("--seconds", type=float, default=20.0)
+    prof.add_argument("--device-rate", type=int, default=44100, help="simulated device rate (forces resampling)")
+    prof.set_defaults(func=bench_profiles)
+    startup = sub.add_parser("startup", help="cold start time and peak RSS of the GUI vs --headless")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.set_defaults(func=bench_startup)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    Gst.init(None)
+    results = args.func(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": args.bench, "results": results}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Relay throughput: RTP packets/s per core through RtpRelay on loopback.
+
+The relay runs in this process with one local port per peer. Each peer is a separate process
+that sends Opus-sized RTP packets to its relay port (at --rate packets/s, or as fast as it can
+with --rate 0) and counts what the relay sends back. The bench reports packets in and forwarded
+per second, the relay process's CPU, and forwarded packets per CPU second (packets/s per core).
+Peer 0 talks louder so every other peer hears it and the relay forwards without rewriting.
+
+Usage:
+    python bench_relay.py [--peers 3] [--rate 0] [--seconds 10] [--payload 80] [--json out.json]
+"""
+import argparse
+import json
+import multiprocessing
+import socket
+import struct
+import sys
+import time
+
+from app.relay import RtpRelay
+from testutil import free_port
+
+
+def run_peer(index, target, listen, rate, payload, ready, stop, results):
+    """Peer side (own process): send RTP to the relay, count what comes back."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    sock.bind(("127.0.0.1", listen))
+    sock.setblocking(False)
+    body = bytes([index]) * (payload if index == 0 else max(1, payload // 4))
+    header = struct.Struct("!BBHII")
+    ssrc = 0x1000 + index
+    sent = received = 0
+    interval = 1.0 / rate if rate > 0 else 0.0
+    ready.set()
+    next_send = time.monotonic()
+    while not stop.is_set():
+        now = time.monotonic()
+        if now >= next_send:
+            next_send += interval
+            try:
+                sock.sendto(header.pack(0x80, 96, sent & 0xFFFF, (960 * sent) & 0xFFFFFFFF, ssrc) + body, ("127.0.0.1", target))
+                sent += 1
+            except BlockingIOError:
+                pass
+        elif interval:
+            time.sleep(min(next_send - now, 0.005))
+        while True:
+            try:
+                sock.recv(2048)
+            except BlockingIOError:
+                break
+            received += 1
+    sock.close()
+    results.put((index, sent, received))
+
+
+def run(peers, rate, seconds, payload):
+    relay = RtpRelay(hold_ms=1000.0)
+    ports = [(free_port(), free_port()) for _ in range(peers)]
+    for idx, (relay_port, peer_port) in enumerate(ports):
+        if not relay.add_peer(f"peer{idx}", "127.0.0.1", peer_port, relay_port):
+            return {"error": f"cannot bind relay port {relay_port}"}
+    relay.start()
+    ctx = multiprocessing.get_context("spawn")
+    stop, results = ctx.Event(), ctx.Queue()
+    workers = []
+    try:
+        for idx, (relay_port, peer_port) in enumerate(ports):
+            ready = ctx.Event()
+            worker = ctx.Process(target=run_peer, args=(idx, relay_port, peer_port, rate, payload, ready, stop, results), daemon=True)
+            worker.start()
+            workers.append(worker)
+            if not ready.wait(15.0):
+                return {"error": f"peer {idx} did not start"}
+        time.sleep(1.0)
+        before = dict(relay.counters)
+        proc0, wall0 = time.process_time(), time.monotonic()
+        time.sleep(seconds)
+        proc, wall = time.process_time() - proc0, time.monotonic() - wall0
+        after = dict(relay.counters)
+        stop.set()
+        per_peer = sorted(results.get(timeout=10.0) for _ in workers)
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=5.0)
+        relay.stop()
+    delta = {key: after[key] - before[key] for key in after}
+    return {
+        "peers": peers,
+        "rate": rate,
+        "payload": payload,
+        "seconds": round(wall, 2),
+        "in_pps": round(delta["received"] / wall, 1),
+        "forwarded_pps": round(delta["forwarded"] / wall, 1),
+        "rewritten": delta["rewritten"],
+        "not_selected": delta["not_selected"],
+        "send_errors": delta["send_errors"],
+        "cpu_ms_per_s": round(proc * 1000.0 / wall, 1),
+        "pps_per_core": round(delta["forwarded"] / proc, 1) if proc > 0 else None,
+        "per_peer": [{"peer": idx, "sent": sent, "received": received} for idx, sent, received in per_peer],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peers", type=int, default=3, help="peers on the relay (default 3)")
+    parser.add_argument("--rate", type=float, default=0.0, help="packets/s per peer, 0 = as fast as possible")
+    parser.add_argument("--seconds", type=float, default=10.0, help="measurement window")
+    parser.add_argument("--payload", type=int, default=80, help="talker payload bytes (others send a quarter)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    result = run(max(2, args.peers), args.rate, args.seconds, max(1, args.payload))
+    if "error" in result:
+        print("failed:", result["error"])
+        return 1
+    print(
+        f"{result['peers']} peers: in {result['in_pps']:.0f} pps, forwarded {result['forwarded_pps']:.0f} pps, "
+        f"cpu {result['cpu_ms_per_s']:.1f} ms/s, {result['pps_per_core'] or 0:.0f} pps per core "
+        f"(rewritten {result['rewritten']}, send errors {result['send_errors']})"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "relay", **result}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -86,6 +86,12 @@ run_test "app.metrics" "python -c 'from app.metrics import Metrics; m = Metrics(
 run_test "app.utils" "python -c 'from app.utils import FrameRingBuffer; r = FrameRingBuffer(10); print(\"OK\")'"
 run_test "app.logging_config" "python -c 'from app.logging_config import setup_logging; print(\"OK\")'"
 run_test "app.signaling" "python -c 'from app.signaling import Signaling; s = Signaling(); print(\"OK\")'"
+run_test "Signaling loopback" "python test_signaling.py"
+run_test "RTP relay" "python test_relay.py"
+run_test "Latency model" "python test_latency.py"
+run_test "Playout delay estimator" "python test_jitter.py"
+run_test "Time-scale modification" "python test_tsm.py"
+run_test "Loss feedback" "python test_feedback.py"
 
 # Test 4: VAD model
 echo ""
@@ -154,9 +160,16 @@ sources, sinks = engine.list_devices()
 print(f'Found {len(sources)} sources, {len(sinks)} sinks')
 \" 2>/dev/null"
 
-# Test 7: Full functionality test
+# Test 7: Engine graphs on file/NumPy backends (no sound hardware)
 echo ""
-echo "--- Phase 7: Full Functionality Test ---"
+echo "--- Phase 7: Engine Graphs ---"
+run_test "Audio backends" "python test_backends.py"
+run_test "RTCP statistics" "python test_rtcp.py"
+run_test "Call recording" "python test_recording.py"
+
+# Test 8: Full functionality test
+echo ""
+echo "--- Phase 8: Full Functionality Test ---"
 run_test "Comprehensive test" "python test_functionality.py 2>/dev/null"
 
 # Summary
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Receiver loss reports and the Opus loss adapter (pure Python, no GStreamer needed)."""
+from app.feedback import LossCounter, OpusLossAdapter
+
+
+def _report(loss_pct, received=50):
+    lost = int(round(received * loss_pct / (100.0 - loss_pct)))
+    return {"received": received, "lost": lost, "late": 0, "duplicates": 0, "loss_pct": loss_pct, "interval_ms": 1000}
+
+
+def test_counter_deltas():
+    counter = LossCounter()
+    assert counter.update({"num-pushed": 100, "num-lost": 2}, 0.0) is None
+    report = counter.update({"num-pushed": 145, "num-lost": 7, "num-late": 1, "num-duplicates": 3}, 1.0)
+    assert report["received"] == 45 and report["lost"] == 5
+    assert report["late"] == 1 and report["duplicates"] == 3
+    assert report["loss_pct"] == 10.0 and report["interval_ms"] == 1000
+    # A rebuilt jitter buffer restarts its counters.
+    report = counter.update({"num-pushed": 20, "num-lost": 0}, 2.0)
+    assert report["received"] == 20 and report["loss_pct"] == 0.0
+
+
+def test_configured_until_first_report():
+    adapter = OpusLossAdapter(min_bitrate=16000)
+    assert adapter.settings(48000, True, 5) == (48000, True, 5)
+    assert not adapter.update({"received": 0, "lost": 0, "loss_pct": 0.0})
+    assert adapter.settings(48000, True, 5) == (48000, True, 5)
+
+
+def test_fec_hysteresis():
+    adapter = OpusLossAdapter(fec_on_pct=2.0, fec_off_pct=0.5, hold=3, smoothing=1.0)
+    adapter.update(_report(0.0))
+    assert adapter.settings(48000, True, 5)[1:] == (False, 0)
+    adapter.update(_report(4.0))
+    assert adapter.settings(48000, True, 5)[1:] == (True, 4)
+    # Between the thresholds FEC holds; the hint only falls after `hold` calmer reports.
+    for _ in range(2):
+        adapter.update(_report(1.0))
+        assert adapter.settings(48000, True, 5)[1:] == (True, 4)
+    adapter.update(_report(1.0))
+    assert adapter.settings(48000, True, 5)[1:] == (True, 1)
+    adapter.update(_report(0.0))
+    assert adapter.settings(48000, True, 5)[1] is False
+
+
+def test_bitrate_backs_off_and_recovers():
+    adapter = OpusLossAdapter(min_bitrate=16000, congested_pct=8.0, hold=2, smoothing=1.0)
+    for _ in range(10):
+        adapter.update(_report(20.0))
+    bitrate = adapter.settings(48000, True, 5)[0]
+    assert bitrate == 16000
+    for _ in range(40):
+        adapter.update(_report(0.0))
+    assert adapter.settings(48000, True, 5)[0] == 48000
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✓ {name}")
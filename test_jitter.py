@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Playout delay estimator (pure Python, no GStreamer needed)."""
+import random
+
+from app.jitter import PlayoutDelayEstimator
+
+RATE = 48000
+FRAME = RATE // 50
+
+
+def _feed(estimator, delays_ms, start=0, rtp0=0):
+    for idx, delay in enumerate(delays_ms):
+        n = start + idx
+        estimator.add(n * 0.02 + delay / 1000.0, (rtp0 + n * FRAME) & 0xFFFFFFFF)
+    return start + len(delays_ms)
+
+
+def test_percentile_of_relative_delay():
+    est = PlayoutDelayEstimator(percentile=0.8, min_ms=0, max_ms=200, clock_rate=RATE)
+    # 90 % of packets on time, 10 % held back 40 ms.
+    _feed(est, [40.0 if idx % 10 == 9 else 0.0 for idx in range(500)])
+    assert est.target_ms() == 0
+    est.percentile = 0.95
+    assert est.target_ms() == 40
+
+
+def test_fast_attack_slow_decay():
+    est = PlayoutDelayEstimator(percentile=0.95, forget=0.95, decay_ms_per_s=10.0, min_ms=5, max_ms=200, clock_rate=RATE)
+    rng = random.Random(1)
+    n = _feed(est, [rng.uniform(0.0, 60.0) for _ in range(200)])
+    high = est.update(0.0)
+    assert high >= 50
+    # The network calms down; the histogram forgets quickly but the follower only decays.
+    _feed(est, [0.0] * 200, start=n)
+    assert est.target_ms() == 5
+    assert est.update(1.0) == high - 10.0
+    assert est.update(100.0) == 5.0
+
+
+def test_rtp_wraparound():
+    est = PlayoutDelayEstimator(percentile=0.99, min_ms=0, max_ms=200, clock_rate=RATE)
+    _feed(est, [0.0] * 100, rtp0=0xFFFFFFFF - 50 * FRAME)
+    assert est.packets == 100
+    assert est.target_ms() == 0
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✓ {name}")
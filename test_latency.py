@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Latency model arithmetic (pure Python, no GStreamer needed)."""
+from app.latency import LatencyModel
+
+
+def test_breakdown_splits_measured_terms():
+    model = LatencyModel()
+    for value in (30.0, 32.0, 34.0):
+        model.add("capture_to_send", value)
+    for value in (40.0, 60.0, 50.0):
+        model.add("jitter_hold", value)
+    model.add("receive_to_sink", 58.0)
+    result = model.breakdown(capture_device_ms=10.0, playout_device_ms=20.0, pipeline_ms=70.0, network_ms=15.0)
+    up, down = result["uplink"], result["downlink"]
+    assert up["processing_ms"] == 22.0
+    assert up["total_ms"] == 10.0 + 22.0 + 15.0
+    assert down["jitter_buffer_ms"] == 50.0
+    assert down["decode_playout_ms"] == 8.0
+    assert down["total_ms"] == 15.0 + 50.0 + 8.0 + 20.0
+    assert down["receive_to_playout_ms"] == 78.0
+    assert result["pipeline_ms"] == 70.0
+
+
+def test_unknown_terms_are_left_out():
+    model = LatencyModel()
+    model.add("capture_to_send", -3.0)
+    result = model.breakdown(capture_device_ms=10.0)
+    assert result["uplink"]["processing_ms"] is None
+    assert result["uplink"]["total_ms"] == 10.0
+    assert result["downlink"]["total_ms"] is None
+    assert result["downlink"]["receive_to_playout_ms"] is None
+
+
+def test_window_and_reset():
+    model = LatencyModel()
+    for value in range(200):
+        model.add("jitter_hold", float(value))
+    # Only the last WINDOW samples count.
+    assert model.measured("jitter_hold") == 200 - LatencyModel.WINDOW / 2 - 0.5
+    model.reset()
+    assert model.measured("jitter_hold") is None
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✓ {name}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Call recording from the encoded Opus streams (needs GStreamer)."""
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from testutil import env_override, free_port, init_gst, make_engine
+
+init_gst()
+
+import numpy as np
+
+from app.backends import NullSink, NumpySource
+
+RATE = 48000
+
+
+def _engine(record_dir, queue_buffers=500):
+    return make_engine(record_dir=record_dir, record_queue_buffers=queue_buffers)
+
+
+def _tone(seconds):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (0.3 * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+
+
+def test_loopback_call_records_both_directions():
+    tmp = tempfile.mkdtemp()
+    # The far end is ourselves; echo cancellation would remove what the downlink should record.
+    with env_override({"TCHAT_DISABLE_AEC": "1"}):
+        engine = _engine(tmp)
+        port = free_port()
+        try:
+            engine.start(port, "127.0.0.1", port, NumpySource(_tone(3.0)), NullSink())
+            time.sleep(1.5)
+            engine.poll_metrics()
+            summary = engine.metrics.snapshot()["recording"]
+            writers = dict(engine.recorders)
+        finally:
+            engine.stop(refill=False)
+    assert set(writers) == {"up", "down"}
+    assert summary["up"]["dropped"] == 0 and summary["down"]["dropped"] == 0
+    for direction, writer in writers.items():
+        assert writer.error is None, writer.error
+        assert writer.written >= 25, (direction, writer.written)
+        with open(writer.path, "rb") as fh:
+            data = fh.read()
+        assert os.path.dirname(writer.path) == tmp
+        # A real Ogg/Opus file: pages, the Opus headers, and an end-of-stream page at the end.
+        assert data.startswith(b"OggS")
+        assert b"OpusHead" in data and b"OpusTags" in data
+        last_page = data.rfind(b"OggS")
+        assert data[last_page + 5] & 0x04
+
+
+def test_stalled_writer_never_blocks_the_call():
+    tmp = tempfile.mkdtemp()
+    fifo = os.path.join(tmp, "stalled.ogg")
+    # Opening a FIFO for writing blocks until someone reads it: a disk that never answers.
+    os.mkfifo(fifo)
+    rx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    rx.bind(("127.0.0.1", 0))
+    rx.settimeout(0.5)
+    engine = _engine(tmp, queue_buffers=10)
+    engine._record_path = lambda direction: fifo
+    received = []
+    running = threading.Event()
+    running.set()
+
+    def _drain():
+        while running.is_set():
+            try:
+                received.append(rx.recv(2048))
+            except socket.timeout:
+                continue
+
+    reader = threading.Thread(target=_drain, daemon=True)
+    reader.start()
+    try:
+        engine.start(free_port(), "127.0.0.1", rx.getsockname()[1], NumpySource(_tone(3.0)), NullSink())
+        time.sleep(1.5)
+        engine.poll_metrics()
+        summary = engine.metrics.snapshot()["recording"]
+        start = time.monotonic()
+        engine.stop(refill=False)
+        stop_s = time.monotonic() - start
+    finally:
+        running.clear()
+        reader.join(timeout=2.0)
+        rx.close()
+        # Let the stuck writer open the FIFO and finish.
+        fd = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+        os.close(fd)
+    # The call kept sending at full rate while nothing was written.
+    assert len(received) >= 1000 // 20
+    assert summary["up"]["written"] <= 1
+    assert summary["up"]["dropped"] >= 25
+    assert stop_s < 3.0
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✓ {name}")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""RTP relay tests over loopback (pure Python, no GStreamer needed)."""
+import os
+import socket
+import struct
+import time
+
+os.environ.setdefault("TCHAT_KEEPALIVE_INTERVAL", "0.2")
+os.environ.setdefault("TCHAT_SIGNAL_BIND", "127.0.0.1")
+os.environ.setdefault("TCHAT_RELAY_BIND", "127.0.0.1")
+
+from app.relay import RtpRelay
+from app.signaling import Signaling
+from testutil import free_port, wait_for
+
+
+def _rtp(seq, ts, ssrc, payload):
+    return struct.pack("!BBHII", 0x80, 96, seq & 0xFFFF, ts & 0xFFFFFFFF, ssrc) + payload
+
+
+class _Endpoint:
+    """A peer's RTP socket: receives what the relay sends, sends to its relay port."""
+
+    def __init__(self, relay_port):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.05)
+        self.port = self.sock.getsockname()[1]
+        self.relay_port = relay_port
+
+    def send(self, packet):
+        self.sock.sendto(packet, ("127.0.0.1", self.relay_port))
+
+    def drain(self):
+        packets = []
+        while True:
+            try:
+                packets.append(self.sock.recv(2048))
+            except socket.timeout:
+                return packets
+
+    def close(self):
+        self.sock.close()
+
+
+def _relay_with(count, **kwargs):
+    relay = RtpRelay(**kwargs)
+    endpoints = []
+    for idx in range(count):
+        endpoint = _Endpoint(free_port())
+        assert relay.add_peer(f"p{idx}", "127.0.0.1", endpoint.port, endpoint.relay_port)
+        endpoints.append(endpoint)
+    relay.start()
+    return relay, endpoints
+
+
+def test_two_peers_pass_through_unchanged():
+    relay, (a, b) = _relay_with(2)
+    try:
+        sent = [_rtp(100 + idx, 960 * idx, 0xA, bytes([idx]) * 40) for idx in range(20)]
+        for packet in sent:
+            a.send(packet)
+        time.sleep(0.1)
+        assert b.drain() == sent
+        assert a.drain() == []
+        stats = relay.stats()
+        assert stats["forwarded"] == 20 and stats["rewritten"] == 0
+    finally:
+        relay.stop()
+        for endpoint in (a, b):
+            endpoint.close()
+
+
+def test_speaker_switch_keeps_one_continuous_stream():
+    relay, (a, b, c) = _relay_with(3, hold_ms=50, switch_ratio=1.5)
+    try:
+        # A talks (large packets), B is quiet; C hears A.
+        for idx in range(30):
+            a.send(_rtp(1000 + idx, 960 * idx, 0xA, b"a" * 120))
+            b.send(_rtp(50000 + idx, 7777 + 960 * idx, 0xB, b"b" * 3))
+            time.sleep(0.005)
+        # A falls silent (DTX-sized packets), B starts talking: after the hold C switches to B.
+        for idx in range(30, 130):
+            a.send(_rtp(1000 + idx, 960 * idx, 0xA, b"a" * 3))
+            b.send(_rtp(50000 + idx, 7777 + 960 * idx, 0xB, b"b" * 120))
+            time.sleep(0.005)
+        time.sleep(0.1)
+        received = c.drain()
+    finally:
+        relay.stop()
+        for endpoint in (a, b, c):
+            endpoint.close()
+    headers = [struct.unpack("!BBHII", packet[:12]) for packet in received]
+    payloads = [packet[12:13] for packet in received]
+    assert payloads[0] == b"a" and payloads[-1] == b"b"
+    switch = payloads.index(b"b")
+    assert all(payload == b"a" for payload in payloads[:switch])
+    assert all(payload == b"b" for payload in payloads[switch:])
+    # One SSRC (the first talker's), contiguous sequence numbers, timestamps moving forward.
+    assert {header[4] for header in headers} == {0xA}
+    seqs = [header[2] for header in headers]
+    assert seqs == list(range(seqs[0], seqs[0] + len(seqs)))
+    stamps = [header[3] for header in headers]
+    assert all(later > earlier for earlier, later in zip(stamps, stamps[1:]))
+    # The switch is flagged as a talkspurt start, and packets before it went out untouched.
+    assert headers[switch][1] & 0x80
+    assert received[0] == _rtp(1000, 0, 0xA, b"a" * 120)
+    assert relay.stats()["switches"] == 1
+
+
+def test_foreign_and_malformed_packets_dropped():
+    relay, (a, b) = _relay_with(2)
+    try:
+        a.send(b"\x00" * 8)
+        a.send(b"\x00" * 20)
+        foreign = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        foreign.bind(("127.0.0.2", 0))
+        foreign.sendto(_rtp(1, 1, 0xF, b"x" * 20), ("127.0.0.1", a.relay_port))
+        foreign.close()
+        time.sleep(0.1)
+        assert b.drain() == []
+        stats = relay.stats()
+        assert stats["dropped_malformed"] == 2
+        assert stats["dropped_foreign"] == 1
+    finally:
+        relay.stop()
+        for endpoint in (a, b):
+            endpoint.close()
+
+
+def test_signaling_sessions_become_relayed_peers():
+    hub = Signaling(max_sessions=3)
+    relay = RtpRelay()
+    relay.attach(hub)
+    hub_port = free_port()
+    hub.start_listen(hub_port, rtp_port=hub_port - 1)
+    relay.start()
+    peers = [Signaling() for _ in range(3)]
+    try:
+        for peer in peers:
+            port = free_port()
+            peer.start_listen(port, rtp_port=port - 1)
+            peer.call("127.0.0.1", hub_port)
+            assert wait_for(lambda: peer.state == "connected")
+        assert wait_for(lambda: len(relay.peers) == 3)
+        # Every peer learned its own relay port.
+        assert sorted(peer.remote_rtp_port for peer in peers) == sorted(
+            hub_port - 1 + Signaling.SESSION_PORT_STRIDE * slot for slot in range(3))
+        # Without an anchor the first peer can leave and the others stay.
+        peers[0].hangup()
+        assert wait_for(lambda: len(relay.peers) == 2)
+        assert all(peer.state == "connected" for peer in peers[1:])
+        hub.hangup()
+        assert wait_for(lambda: not relay.peers and all(peer.state == "idle" for peer in peers))
+    finally:
+        relay.stop()
+        hub.stop()
+        for peer in peers:
+            peer.stop()
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✓ {name}")
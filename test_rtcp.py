@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""RTCP statistics against impairments injected by a loopback proxy (needs GStreamer)."""
+import heapq
+import os
+import random
+import socket
+import threading
+import time
+
+os.environ.setdefault("TCHAT_RTCP_INTERVAL_MS", "500")
+
+from testutil import free_port, init_gst, make_engine
+
+Gst = init_gst()
+
+from app import rtcp
+
+OFFSET = 2
+LOSS = 0.10
+JITTER_MS = 30.0
+RTCP_DELAY_MS = 40.0
+
+
+def _free_port_pair():
+    """A port P with P + OFFSET also free."""
+    while True:
+        port = free_port()
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.bind(("127.0.0.1", port + OFFSET))
+            return port
+        except OSError:
+            continue
+
+
+class _ImpairmentProxy:
+    """RTP: random loss plus uniform extra delay. RTCP: fixed delay, never dropped."""
+
+    def __init__(self, target_port, seed=11):
+        self.port = _free_port_pair()
+        self.rng = random.Random(seed)
+        self._lines = [
+            (self._bind(self.port), target_port, self._rtp_delay),
+            (self._bind(self.port + OFFSET), target_port + OFFSET, lambda: RTCP_DELAY_MS / 1000.0),
+        ]
+        self._out = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._pending = []
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._running = True
+        self._threads = [threading.Thread(target=self._recv, args=line, daemon=True) for line in self._lines]
+        self._threads.append(threading.Thread(target=self._send, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _bind(self, port):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", port))
+        sock.settimeout(0.2)
+        return sock
+
+    def _rtp_delay(self):
+        if self.rng.random() < LOSS:
+            return None
+        return self.rng.uniform(0.0, JITTER_MS / 1000.0)
+
+    def _recv(self, sock, target_port, delay):
+        while self._running:
+            try:
+                data, _addr = sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            hold = delay()
+            if hold is None:
+                continue
+            with self._cond:
+                self._seq += 1
+                heapq.heappush(self._pending, (time.monotonic() + hold, self._seq, data, target_port))
+                self._cond.notify()
+
+    def _send(self):
+        while self._running:
+            with self._cond:
+                while self._running and (not self._pending or self._pending[0][0] > time.monotonic()):
+                    timeout = self._pending[0][0] - time.monotonic() if self._pending else 0.2
+                    self._cond.wait(max(0.0, timeout))
+                if not self._running:
+                    return
+                _due, _seq, data, target_port = heapq.heappop(self._pending)
+            self._out.sendto(data, ("127.0.0.1", target_port))
+
+    def close(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        for sock, _port, _delay in self._lines:
+            sock.close()
+        self._out.close()
+
+
+def test_summarize_units():
+    summary = rtcp.summarize([
+        {"internal": True, "ssrc": 1, "is-sender": True},
+        {
+            "internal": False, "ssrc": 2, "is-sender": True, "clock-rate": 48000,
+            "packets-received": 100, "packets-lost": 3, "jitter": 480,
+            "sent-rb": True, "sent-rb-fractionlost": 64,
+            "have-rb": True, "rb-fractionlost": 26, "rb-packetslost": 5, "rb-jitter": 960, "rb-round-trip": 3277,
+        },
+    ], 48000)
+    assert summary["ssrc"] == 2
+    assert summary["receive"] == {"packets_received": 100, "packets_lost": 3, "jitter_ms": 10.0, "fraction_lost_pct": 25.0}
+    assert summary["send"] == {"packets_lost": 5, "jitter_ms": 20.0, "fraction_lost_pct": 10.16}
+    assert abs(summary["rtt_ms"] - 50.0) < 0.1
+    assert rtcp.summarize([{"internal": True}], 48000) == {}
+
+
+def test_reports_match_injected_impairments():
+    if not Gst.ElementFactory.find("rtpsession"):
+        print("rtpsession not available; skipping")
+        return
+    side_a, side_b = make_engine(rtcp_port_offset=OFFSET), make_engine(rtcp_port_offset=OFFSET)
+    port_a, port_b = _free_port_pair(), _free_port_pair()
+    proxy = _ImpairmentProxy(port_b)
+    try:
+        # A → proxy → B; B → A direct. A's RTT is the proxy's RTCP delay.
+        side_b.start(port_b, "127.0.0.1", port_a, "test:sine:330", "null")
+        side_a.start(port_a, "127.0.0.1", proxy.port, "test:sine:440", "null")
+        deadline = time.monotonic() + 15.0
+        summary_a = summary_b = {}
+        while time.monotonic() < deadline:
+            for engine in (side_a, side_b):
+                if not engine.sampling:
+                    engine.poll_metrics()
+            summary_a = side_a.metrics.snapshot()["rtcp"]
+            summary_b = side_b.metrics.snapshot()["rtcp"]
+            received = (summary_b.get("receive") or {}).get("packets_received") or 0
+            if received >= 400 and summary_a.get("rtt_ms") is not None:
+                break
+            time.sleep(0.25)
+    finally:
+        side_a.stop(refill=False)
+        side_b.stop(refill=False)
+        proxy.close()
+
+    receive_b = summary_b["receive"]
+    expected = receive_b["packets_received"] + receive_b["packets_lost"]
+    assert abs(receive_b["packets_lost"] / expected - LOSS) < 0.05
+    # Uniform extra delay on [0, J]: mean |D_i - D_j| is J / 3.
+    assert JITTER_MS / 6.0 < receive_b["jitter_ms"] < JITTER_MS / 1.5
+    send_a = summary_a["send"]
+    assert send_a["fraction_lost_pct"] is not None and send_a["fraction_lost_pct"] < 25.0
+    assert JITTER_MS / 6.0 < send_a["jitter_ms"] < JITTER_MS / 1.5
+    assert RTCP_DELAY_MS * 0.8 < summary_a["rtt_ms"] < RTCP_DELAY_MS + 30.0
+    # Nothing impairs B → A.
+    assert summary_a["receive"]["packets_lost"] == 0
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✓ {name}")
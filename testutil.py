@@ -0,0 +1,76 @@
+"""Helpers shared by the test_*.py files and the network benches.
+
+Nothing here imports gi at module level: the pure-Python tests use the socket helpers, and the
+engine tests call init_gst() before they import app.media.
+"""
+import os
+import socket
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    """A UDP port on 127.0.0.1 that was free a moment ago."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(predicate, timeout=3.0):
+    """Poll `predicate` until it holds or `timeout` seconds pass; returns its last value."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+@contextmanager
+def env_override(overrides):
+    """Set environment variables for the duration of a block and restore the previous values."""
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def init_gst():
+    """Initialise GStreamer for an engine test and return the Gst module.
+
+    Uses the plugins from native/build, keeps comfort noise out (its source is randomly seeded)
+    and turns AEC/DFN off when their plugins are missing.
+    """
+    os.environ.setdefault("GST_PLUGIN_PATH", os.path.join(ROOT, "native", "build", "gst-plugins"))
+    os.environ.setdefault("TCHAT_CNG_ENABLED", "0")
+    import gi
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    Gst.init(["--gst-disable-registry-fork"])
+    for plugin, knob in (("webrtcaec3", "TCHAT_DISABLE_AEC"), ("deepfilternet", "TCHAT_DISABLE_DFN")):
+        if not Gst.ElementFactory.find(plugin):
+            os.environ.setdefault(knob, "1")
+    return Gst
+
+
+def make_engine(**attrs):
+    """A MediaEngine without the standby pool; `attrs` are set on it before it starts."""
+    from app.media import MediaEngine
+    from app.metrics import Metrics
+    from app.vad import VADManager
+
+    metrics = Metrics()
+    engine = MediaEngine(metrics, VADManager(metrics, os.path.join(ROOT, "models", "silero_vad.onnx")))
+    engine.standby_pool = False
+    for name, value in attrs.items():
+        setattr(engine, name, value)
+    return engine